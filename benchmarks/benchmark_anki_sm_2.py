@@ -0,0 +1,299 @@
+"""
+Benchmarks for the hot paths of the anki-sm-2 package.
+
+Run with:
+    python benchmarks/benchmark_anki_sm_2.py --output results.json
+
+Compare against the results of a previous release, exiting with status 1 if anything got slower by more than the threshold:
+    python benchmarks/benchmark_anki_sm_2.py --compare baseline.json --threshold 1.2
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import timeit
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any
+
+from anki_sm_2 import Card, CardStore, Rating, ReviewLog, Scheduler, State, replay
+
+START = datetime(2024, 1, 1, 0, 0, 0, 0, timezone.utc)
+
+
+def time_per_call(function: Callable[[], Any], repeat: int = 5) -> float:
+    """
+    Returns the fastest time in seconds of a single call to function, out of several repeated runs.
+    """
+
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def time_once(
+    function: Callable[..., Any],
+    repeat: int = 3,
+    setup: Callable[[], tuple[Any, ...]] | None = None,
+) -> float:
+    """
+    Returns the fastest time in seconds of a single call to function, for functions too slow to call many times.
+
+    If setup is given, it is called before each run without being timed and function is called with the arguments it
+    returns, e.g. to give each run a fresh copy of state that function modifies.
+    """
+
+    times = []
+    for _ in range(repeat):
+        args = () if setup is None else setup()
+        started = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def make_card(state: State) -> Card:
+    if state == State.Learning:
+        return Card(card_id=1, state=State.Learning, step=1, due=START)
+    if state == State.Review:
+        return Card(
+            card_id=1, state=State.Review, ease=2.5, current_interval=10, due=START
+        )
+    return Card(
+        card_id=1,
+        state=State.Relearning,
+        step=0,
+        ease=2.5,
+        current_interval=10,
+        due=START,
+    )
+
+
+def make_collection(size: int) -> tuple[list[Card], list[ReviewLog]]:
+    """
+    Builds a collection of cards in a mix of states, along with the review logs that produced them.
+    """
+
+    scheduler = Scheduler(rng=random.Random(0))
+    rating_rng = random.Random(0)
+
+    cards = []
+    review_logs = []
+    for card_id in range(size):
+        card = Card(card_id=card_id, due=START + timedelta(seconds=card_id))
+        for _ in range(card_id % 5):
+            card, review_log = scheduler.review_card(
+                card=card,
+                rating=Rating(rating_rng.choice([1, 3, 3, 3, 4])),
+                review_datetime=card.due,
+            )
+            review_logs.append(review_log)
+        cards.append(card)
+
+    return cards, review_logs
+
+
+def benchmark_review_card() -> list[dict[str, Any]]:
+    scheduler = Scheduler()
+    results = []
+    for state in State:
+        card = make_card(state)
+        for rating in Rating:
+            seconds = time_per_call(
+                lambda card=card, rating=rating: scheduler.review_card(
+                    card=card, rating=rating, review_datetime=START
+                )
+            )
+            results.append(
+                {
+                    "name": f"review_card[{state.name}-{rating.name}]",
+                    "size": 1,
+                    "seconds": seconds,
+                }
+            )
+    return results
+
+
+def benchmark_fuzz() -> list[dict[str, Any]]:
+    scheduler = Scheduler()
+    return [
+        {
+            "name": f"_get_fuzzed_interval[{interval}]",
+            "size": 1,
+            "seconds": time_per_call(
+                lambda interval=interval: scheduler._get_fuzzed_interval(interval)
+            ),
+        }
+        for interval in (5, 50, 5000)
+    ]
+
+
+def benchmark_serialization() -> list[dict[str, Any]]:
+    scheduler = Scheduler()
+    card, review_log = scheduler.review_card(
+        card=make_card(State.Review), rating=Rating.Good, review_datetime=START
+    )
+    card_dict = card.to_dict()
+    review_log_dict = review_log.to_dict()
+    scheduler_dict = scheduler.to_dict()
+
+    return [
+        {"name": name, "size": 1, "seconds": time_per_call(function)}
+        for name, function in (
+            ("Card.to_dict", card.to_dict),
+            ("Card.from_dict", lambda: Card.from_dict(card_dict)),
+            ("ReviewLog.to_dict", review_log.to_dict),
+            ("ReviewLog.from_dict", lambda: ReviewLog.from_dict(review_log_dict)),
+            ("Scheduler.to_dict", scheduler.to_dict),
+            ("Scheduler.from_dict", lambda: Scheduler.from_dict(scheduler_dict)),
+        )
+    ]
+
+
+def benchmark_collection(size: int) -> list[dict[str, Any]]:
+    cards, review_logs = make_collection(size)
+    card_dicts = [card.to_dict() for card in cards]
+    cards_json = json.dumps(card_dicts)
+    cards_data = Card.dumps_many(cards)
+    review_log_dicts = [review_log.to_dict() for review_log in review_logs]
+    ratings = [Rating(i % 4 + 1) for i in range(size)]
+    review_datetimes = [card.due + timedelta(days=1) for card in cards]
+    card_ids = [card.card_id for card in cards]
+    review_times = [review_datetime.timestamp() for review_datetime in review_datetimes]
+
+    results = [
+        {"name": name, "size": size, "seconds": time_once(function)}
+        for name, function in (
+            (
+                "load_cards[json]",
+                lambda: [
+                    Card.from_dict(card_dict) for card_dict in json.loads(cards_json)
+                ],
+            ),
+            ("load_cards[binary]", lambda: Card.loads_many(cards_data)),
+            ("load_cards[CardStore]", lambda: CardStore.from_dicts(card_dicts)),
+            (
+                "dump_cards[json]",
+                lambda: json.dumps([card.to_dict() for card in cards]),
+            ),
+            ("dump_cards[binary]", lambda: Card.dumps_many(cards)),
+            (
+                "review_cards_batch",
+                lambda: Scheduler().review_cards_batch(
+                    cards, ratings, review_datetimes
+                ),
+            ),
+            (
+                "replay",
+                lambda: list(replay(review_log_dicts, Scheduler(rng=random.Random(0)))),
+            ),
+        )
+    ]
+
+    # CardStore.review updates the store in place, so each run reviews a fresh store
+    results.append(
+        {
+            "name": "CardStore.review",
+            "size": size,
+            "seconds": time_once(
+                lambda card_store: card_store.review(
+                    Scheduler(), card_ids, ratings, review_times
+                ),
+                setup=lambda: (CardStore(cards),),
+            ),
+        }
+    )
+
+    return results
+
+
+def compare(
+    results: list[dict[str, Any]], baseline: list[dict[str, Any]], threshold: float
+) -> list[str]:
+    """
+    Returns a description of each benchmark that is slower than in the baseline by more than the threshold ratio.
+    """
+
+    baseline_seconds = {
+        (result["name"], result["size"]): result["seconds"] for result in baseline
+    }
+
+    regressions = []
+    for result in results:
+        key = (result["name"], result["size"])
+        if key in baseline_seconds:
+            ratio = result["seconds"] / baseline_seconds[key]
+            if ratio > threshold:
+                regressions.append(
+                    f"{result['name']} (size {result['size']}): {ratio:.2f}x slower"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1_000, 100_000],
+        help="collection sizes for the bulk benchmarks, e.g. --sizes 1000 100000 1000000",
+    )
+    parser.add_argument(
+        "--output", help="file to write the results to as json, instead of stdout"
+    )
+    parser.add_argument(
+        "--compare", help="json results of a previous run to compare against"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="slowdown ratio above which a benchmark counts as a regression",
+    )
+    args = parser.parse_args()
+
+    results = benchmark_review_card() + benchmark_fuzz() + benchmark_serialization()
+    for size in args.sizes:
+        results += benchmark_collection(size)
+
+    try:
+        package_version = version("anki-sm-2")
+    except PackageNotFoundError:
+        package_version = None
+
+    report = {
+        "package_version": package_version,
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(regression, file=sys.stderr)
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,4 +4,40 @@ anki-sm-2
 The SM-2 based Anki scheduler for spaced repetition, implemented as a python package.
 """
 
-from .anki_sm_2 import Scheduler, Card, Rating, ReviewLog, State
+from .anki_import import import_anki_cards, import_anki_review_logs
+from .anki_sm_2 import (
+    Card,
+    FrozenCard,
+    FrozenReviewLog,
+    LazyCard,
+    Rating,
+    ReviewLog,
+    Scheduler,
+    SchedulerStats,
+    State,
+)
+from .archive import ReviewLogArchive
+from .arrow_io import (
+    cards_from_record_batches,
+    cards_to_record_batches,
+    read_cards_parquet,
+    read_review_logs_parquet,
+    read_schedulers_parquet,
+    review_logs_from_record_batches,
+    review_logs_to_record_batches,
+    schedulers_from_record_batch,
+    schedulers_to_record_batch,
+    write_cards_parquet,
+    write_review_logs_parquet,
+    write_schedulers_parquet,
+)
+from .async_scheduler import AsyncScheduler
+from .card_store import CardStore
+from .concurrent_collection import ConcurrentCollection
+from .due_forecast import DueForecast
+from .due_index import DueIndex
+from .replay import replay, replay_parallel, replay_steps
+from .scheduler_registry import SchedulerRegistry
+from .simulation import simulate_workload
+from .sqlite_repository import SQLiteRepository
+from .sweep import ReviewHistory, sweep
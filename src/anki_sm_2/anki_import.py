@@ -0,0 +1,254 @@
+"""
+anki_sm_2.anki_import
+
+This module defines an importer for the SQLite collection files of the Anki desktop app.
+
+Functions:
+    import_anki_cards: Reads the cards table of an Anki collection into a CardStore.
+    import_anki_review_logs: Reads the revlog table of an Anki collection into a ReviewLogArchive.
+"""
+
+import math
+import os
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+from .anki_sm_2 import _REVIEW_LOG_RECORD, Rating, Scheduler, State
+from .archive import ReviewLogArchive
+from .card_store import CardStore
+
+# anki card types (cards.type) and the states they map to
+_CARD_TYPE_STATES = {
+    0: State.Learning,  # new
+    1: State.Learning,
+    2: State.Review,
+    3: State.Relearning,
+}
+
+# anki card types (cards.type) whose due value can be in seconds since the unix epoch rather than days. as in anki,
+# it is only taken as seconds if it is too large to be a day number, since learning cards due on a later day store a
+# day number and suspended or buried cards keep their due value but not their learning queue
+_LEARNING_CARD_TYPES = (1, 3)
+_MIN_EPOCH_DUE = 1_000_000_000
+
+# anki review types (revlog.type). higher types are manual changes rather than reviews
+_REVIEW_TYPE_LEARN = 0
+_REVIEW_TYPE_RELEARN = 2
+_REVIEW_TYPE_FILTERED = 3
+
+
+def import_anki_cards(
+    path: str | os.PathLike[str],
+    card_store: CardStore | None = None,
+    scheduler: Scheduler | None = None,
+    now: float | None = None,
+    chunk_size: int = 10_000,
+) -> CardStore:
+    """
+    Reads the cards table of an Anki collection (e.g. collection.anki2) into a CardStore.
+
+    Rows are fetched chunk_size at a time and written straight into the store's columns, so no Card objects are
+    created. Anki card types map onto states as new and learning -> Learning, review -> Review and relearning ->
+    Relearning. A card's step is worked out from the number of steps Anki has left for it and the steps of the
+    scheduler, its ease from its factor in permille and its current interval from its ivl in days. Cards in filtered
+    decks are given the due date of their home deck.
+
+    Args:
+        path (str | os.PathLike[str]): The path of the Anki collection file. It is opened read-only.
+        card_store (CardStore | None): The store to add the cards to. If unspecified, a new store is created.
+        scheduler (Scheduler | None): The scheduler whose learning and relearning steps the cards are mapped onto and whose starting ease is given to review cards without one. If unspecified, a default Scheduler.
+        now (int | float | None): The due time given to new cards, in seconds since the unix epoch. If unspecified, the current time.
+        chunk_size (int): The number of rows fetched at a time.
+
+    Returns:
+        CardStore: The store the cards were added to.
+    """
+
+    if card_store is None:
+        card_store = CardStore()
+    if scheduler is None:
+        scheduler = Scheduler()
+    if now is None:
+        now = time.time()
+
+    num_steps = {
+        State.Learning: len(scheduler.learning_steps),
+        State.Relearning: len(scheduler.relearning_steps),
+    }
+    starting_ease = scheduler.starting_ease
+    append_or_replace = card_store._append_or_replace
+
+    with closing(_connect(path)) as connection:
+        (collection_created,) = connection.execute("SELECT crt FROM col").fetchone()
+
+        cursor = connection.execute(
+            "SELECT id, type, due, ivl, factor, left, odid, odue FROM cards"
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+
+            for card_id, card_type, due, ivl, factor, left, odid, odue in rows:
+                state = _CARD_TYPE_STATES.get(card_type, State.Learning)
+
+                if odid and odue:
+                    due = odue
+
+                step: int | None
+                if card_type == 0:
+                    step = 0
+                    due_seconds = now
+                elif card_type in _LEARNING_CARD_TYPES and due > _MIN_EPOCH_DUE:
+                    step = _step(state, left, num_steps)
+                    due_seconds = due
+                else:
+                    step = _step(state, left, num_steps)
+                    due_seconds = collection_created + due * 86400
+
+                if state == State.Learning:
+                    ease = None
+                    current_interval = None
+                else:
+                    ease = factor / 1000 if factor > 0 else starting_ease
+                    current_interval = max(ivl, 1)
+
+                append_or_replace(
+                    card_id, int(state), step, ease, due_seconds, current_interval
+                )
+
+    return card_store
+
+
+def import_anki_review_logs(
+    path: str | os.PathLike[str],
+    archive: ReviewLogArchive,
+    chunk_size: int = 10_000,
+) -> int:
+    """
+    Reads the revlog table of an Anki collection (e.g. collection.anki2) into a ReviewLogArchive.
+
+    Rows are read in order of card and review time, chunk_size at a time, and each chunk is packed straight into
+    archive records, so memory use does not grow with the size of the revlog. Rows that are not reviews, such as
+    manual reschedules, are skipped.
+
+    Anki does not store the state of a card before each review, so the card in each review log is rebuilt from the
+    card's previous revlog row: its state from the review type, its ease from the previous factor, its current
+    interval from the last interval and its due date from the previous review time and interval. Steps are counted
+    from the ratings given since the card entered learning or relearning.
+
+    Args:
+        path (str | os.PathLike[str]): The path of the Anki collection file. It is opened read-only.
+        archive (ReviewLogArchive): The archive to append the review logs to.
+        chunk_size (int): The number of rows fetched and appended at a time.
+
+    Returns:
+        int: The number of review logs appended.
+    """
+
+    pack = _REVIEW_LOG_RECORD.pack
+    num_review_logs = 0
+
+    previous_card_id = None
+    previous_factor = 0
+    previous_due_microseconds = 0
+    step = 0
+
+    with closing(_connect(path)) as connection:
+        cursor = connection.execute(
+            "SELECT id, cid, ease, ivl, lastIvl, factor, time, type FROM revlog ORDER BY cid, id"
+        )
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+
+            records = bytearray()
+            for (
+                review_id,
+                card_id,
+                rating,
+                ivl,
+                last_ivl,
+                factor,
+                duration,
+                review_type,
+            ) in rows:
+                review_microseconds = review_id * 1000
+
+                if card_id != previous_card_id:
+                    previous_card_id = card_id
+                    previous_factor = factor
+                    previous_due_microseconds = review_microseconds
+                    step = 0
+
+                due_microseconds = previous_due_microseconds
+                if ivl > 0:
+                    previous_due_microseconds = (
+                        review_microseconds + ivl * 86_400_000_000
+                    )
+                elif ivl < 0:
+                    previous_due_microseconds = review_microseconds - ivl * 1_000_000
+
+                if review_type > _REVIEW_TYPE_FILTERED or not 1 <= rating <= 4:
+                    # manual reschedule, not a review
+                    previous_factor = factor or previous_factor
+                    continue
+
+                if review_type == _REVIEW_TYPE_LEARN or (
+                    review_type == _REVIEW_TYPE_FILTERED and last_ivl <= 0
+                ):
+                    state = State.Learning
+                elif review_type == _REVIEW_TYPE_RELEARN:
+                    state = State.Relearning
+                else:
+                    state = State.Review
+
+                if state == State.Learning:
+                    ease = math.nan
+                    current_interval = -1
+                else:
+                    ease = (previous_factor or factor) / 1000
+                    current_interval = last_ivl if last_ivl > 0 else -1
+
+                records += pack(
+                    card_id,
+                    state,
+                    -1 if state == State.Review else step,
+                    ease,
+                    due_microseconds,
+                    0,
+                    current_interval,
+                    rating,
+                    review_microseconds,
+                    0,
+                    duration,
+                )
+
+                # the step the card is at for its next review, if it is still in learning or relearning
+                if ivl >= 0 or state == State.Review or rating == Rating.Again:
+                    step = 0
+                elif rating == Rating.Good:
+                    step += 1
+
+                previous_factor = factor or previous_factor
+
+            archive._append_records(records)
+            num_review_logs += len(records) // _REVIEW_LOG_RECORD.size
+
+    return num_review_logs
+
+
+def _connect(path: str | os.PathLike[str]) -> sqlite3.Connection:
+    return sqlite3.connect(Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+
+
+def _step(state: State, left: int, num_steps: dict[State, int]) -> int | None:
+    # anki stores the number of steps a card has left in the last three digits of left
+    if state == State.Review:
+        return None
+
+    steps = num_steps[state]
+    return min(max(steps - left % 1000, 0), steps)
@@ -7,15 +7,25 @@ Classes:
     State: Enum representing the learning state of a Card object.
     Rating: Enum representing the four possible Anki ratings when reviewing a card.
     Card: Represents a flashcard in the Anki system.
+    ReviewLog: Represents the log entry of a Card object that has been reviewed.
+    FrozenCard: Immutable, memory-compact version of Card.
+    FrozenReviewLog: Immutable, memory-compact version of ReviewLog.
+    LazyCard: Card that decodes each field from its serialized form the first time the field is accessed.
+    SchedulerStats: Counters and timings collected from a Scheduler's reviews.
     Scheduler: The Anki SM-2 scheduler.
 """
 
-from enum import IntEnum
-from datetime import datetime, timezone, timedelta
-from copy import deepcopy
-from typing import Any
 import math
 import random
+import struct
+import time
+from collections.abc import Iterable, Sequence
+from copy import copy
+from datetime import datetime, timedelta, timezone
+from enum import IntEnum
+from itertools import repeat
+from operator import add, attrgetter, floordiv, sub
+from typing import Any, overload
 
 
 class State(IntEnum):
@@ -39,6 +49,124 @@ class Rating(IntEnum):
     Easy = 4  # correct - recalled effortlessly
 
 
+# lookups for the columnar review path
+_STATES = (None, State.Learning, State.Review, State.Relearning)
+_STATE_VALUES = frozenset(State)
+_RATING_VALUES = frozenset(Rating)
+_INT_OR_NONE = frozenset((int, type(None)))
+_FLOAT_OR_NONE = frozenset((float, type(None)))
+_CARD_ATTRIBUTES = tuple(
+    map(attrgetter, ("card_id", "state", "step", "ease", "due", "current_interval"))
+)
+
+# default of the replace arguments, for attributes that are left unchanged
+_UNSET: Any = object()
+
+# lengths of a day used by the datetime and epoch second review paths
+_ONE_DAY = timedelta(days=1)
+_SECONDS_PER_DAY = 86400
+_MICROSECONDS_PER_DAY = 86_400_000_000
+
+_numpy: Any = None
+
+
+def _import_numpy() -> Any:
+    """
+    Returns the numpy module, or None if the optional numpy dependency is not installed.
+    """
+
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            _numpy = False
+        else:
+            _numpy = numpy
+
+    return _numpy or None
+
+
+# binary record format used by Card.dumps_many and ReviewLog.dumps_many:
+# a header of (magic, format version, number of records) followed by fixed-width little-endian records.
+# datetimes are stored as epoch microseconds plus their utc offset in seconds, so they round-trip exactly.
+_BINARY_FORMAT_VERSION = 1
+_BINARY_HEADER = struct.Struct("<4sHQ")
+_CARD_MAGIC = b"SM2C"
+_REVIEW_LOG_MAGIC = b"SM2R"
+# card_id, state, step, ease, due (microseconds, utc offset), current_interval
+_CARD_RECORD = struct.Struct("<qBidqii")
+# card fields, rating, review_datetime (microseconds, utc offset), review_duration
+_REVIEW_LOG_RECORD = struct.Struct("<qBidqiiBqiq")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_NAIVE_OFFSET = -(2**31)  # utc offset stored for naive datetimes
+
+
+def _datetime_to_fields(value: datetime) -> tuple[int, int]:
+    offset = value.utcoffset()
+    if offset is None:
+        return (value - _NAIVE_EPOCH) // _MICROSECOND, _NAIVE_OFFSET
+
+    return (value - _EPOCH) // _MICROSECOND, offset // timedelta(seconds=1)
+
+
+def _datetime_from_fields(microseconds: int, offset: int) -> datetime:
+    if offset == _NAIVE_OFFSET:
+        return _NAIVE_EPOCH + timedelta(0, 0, microseconds)
+
+    value = _EPOCH + timedelta(0, 0, microseconds)
+    if offset != 0:
+        value = value.astimezone(timezone(timedelta(seconds=offset)))
+
+    return value
+
+
+def _card_to_fields(card: Any) -> tuple[int, int, int, float, int, int, int]:
+    return (
+        card.card_id,
+        card.state,
+        -1 if card.step is None else card.step,
+        math.nan if card.ease is None else card.ease,
+        *_datetime_to_fields(card.due),
+        -1 if card.current_interval is None else card.current_interval,
+    )
+
+
+def _card_from_fields(
+    card_id: int,
+    state: int,
+    step: int,
+    ease: float,
+    due_microseconds: int,
+    due_offset: int,
+    current_interval: int,
+) -> "Card":
+    return Card(
+        card_id=card_id,
+        state=State(state),
+        step=None if step < 0 else step,
+        ease=None if math.isnan(ease) else ease,
+        due=_datetime_from_fields(due_microseconds, due_offset),
+        current_interval=None if current_interval < 0 else current_interval,
+    )
+
+
+def _read_binary_header(data: bytes | bytearray | memoryview, magic: bytes) -> int:
+    if len(data) < _BINARY_HEADER.size:
+        raise ValueError("data is too short to contain a header")
+
+    data_magic, version, num_records = _BINARY_HEADER.unpack_from(data)
+    if data_magic != magic:
+        raise ValueError(f"expected magic {magic!r}, got {data_magic!r}")
+    if version != _BINARY_FORMAT_VERSION:
+        raise ValueError(f"unsupported binary format version {version}")
+
+    return num_records
+
+
 class Card:
     """
     Represents a flashcard in the Anki system.
@@ -88,6 +216,13 @@ class Card:
 
         self.current_interval = current_interval
 
+    def __copy__(self) -> "Card":
+        # every attribute is immutable, so copying the instance dict is enough
+        # and much faster than the generic copy protocol
+        card = object.__new__(type(self))
+        card.__dict__.update(self.__dict__)
+        return card
+
     def to_dict(self) -> dict[str, int | float | str | None]:
         return_dict = {
             "card_id": self.card_id,
@@ -118,6 +253,37 @@ class Card:
             current_interval=current_interval,
         )
 
+    @staticmethod
+    def dumps_many(cards: Iterable["Card | FrozenCard"]) -> bytes:
+        """
+        Encodes cards into a compact binary format of fixed-width records.
+
+        The encoding is lossless: Card.loads_many returns cards with the same to_dict output.
+        """
+
+        records = [_CARD_RECORD.pack(*_card_to_fields(card)) for card in cards]
+
+        return _BINARY_HEADER.pack(
+            _CARD_MAGIC, _BINARY_FORMAT_VERSION, len(records)
+        ) + b"".join(records)
+
+    @staticmethod
+    def loads_many(data: bytes | bytearray | memoryview) -> list["Card"]:
+        """
+        Decodes cards encoded with Card.dumps_many.
+
+        Raises:
+            ValueError: If the data is not a valid encoding of cards.
+        """
+
+        num_records = _read_binary_header(data, _CARD_MAGIC)
+
+        body = memoryview(data)[_BINARY_HEADER.size :]
+        if len(body) != num_records * _CARD_RECORD.size:
+            raise ValueError("data length does not match the number of records")
+
+        return [_card_from_fields(*fields) for fields in _CARD_RECORD.iter_unpack(body)]
+
 
 class ReviewLog:
     """
@@ -142,7 +308,7 @@ class ReviewLog:
         review_datetime: datetime,
         review_duration: int | None = None,
     ) -> None:
-        self.card = deepcopy(card)
+        self.card = copy(card)
         self.rating = rating
         self.review_datetime = review_datetime
         self.review_duration = review_duration
@@ -173,6 +339,520 @@ class ReviewLog:
             review_duration=review_duration,
         )
 
+    @staticmethod
+    def dumps_many(review_logs: Iterable["ReviewLog | FrozenReviewLog"]) -> bytes:
+        """
+        Encodes review logs into a compact binary format of fixed-width records.
+
+        The encoding is lossless: ReviewLog.loads_many returns review logs with the same to_dict output.
+        """
+
+        records = [
+            _REVIEW_LOG_RECORD.pack(
+                *_card_to_fields(review_log.card),
+                review_log.rating,
+                *_datetime_to_fields(review_log.review_datetime),
+                -1
+                if review_log.review_duration is None
+                else review_log.review_duration,
+            )
+            for review_log in review_logs
+        ]
+
+        return _BINARY_HEADER.pack(
+            _REVIEW_LOG_MAGIC, _BINARY_FORMAT_VERSION, len(records)
+        ) + b"".join(records)
+
+    @staticmethod
+    def loads_many(data: bytes | bytearray | memoryview) -> list["ReviewLog"]:
+        """
+        Decodes review logs encoded with ReviewLog.dumps_many.
+
+        Raises:
+            ValueError: If the data is not a valid encoding of review logs.
+        """
+
+        num_records = _read_binary_header(data, _REVIEW_LOG_MAGIC)
+
+        body = memoryview(data)[_BINARY_HEADER.size :]
+        if len(body) != num_records * _REVIEW_LOG_RECORD.size:
+            raise ValueError("data length does not match the number of records")
+
+        return [
+            _review_log_from_fields(*fields)
+            for fields in _REVIEW_LOG_RECORD.iter_unpack(body)
+        ]
+
+
+def _review_log_from_fields(
+    card_id: int,
+    state: int,
+    step: int,
+    ease: float,
+    due_microseconds: int,
+    due_offset: int,
+    current_interval: int,
+    rating: int,
+    review_microseconds: int,
+    review_offset: int,
+    review_duration: int,
+) -> ReviewLog:
+    return ReviewLog(
+        card=_card_from_fields(
+            card_id, state, step, ease, due_microseconds, due_offset, current_interval
+        ),
+        rating=Rating(rating),
+        review_datetime=_datetime_from_fields(review_microseconds, review_offset),
+        review_duration=None if review_duration < 0 else review_duration,
+    )
+
+
+class FrozenCard:
+    """
+    Immutable, memory-compact version of Card.
+
+    Has the same attributes and dict format as Card, but stores them in slots and cannot be modified after creation.
+    Use replace to get a copy with some attributes changed. Reviewing a FrozenCard returns a FrozenCard.
+    """
+
+    __slots__ = ("card_id", "current_interval", "due", "ease", "state", "step")
+
+    card_id: int
+    state: State
+    step: int | None
+    ease: float | None
+    due: datetime
+    current_interval: int | None
+
+    def __init__(
+        self,
+        card_id: int | None = None,
+        state: State = State.Learning,
+        step: int | None = None,
+        ease: float | None = None,
+        due: datetime | None = None,
+        current_interval: int | None = None,
+    ) -> None:
+        if card_id is None:
+            # epoch miliseconds of when the card was created
+            card_id = int(datetime.now(timezone.utc).timestamp() * 1000)
+
+        if state == State.Learning and step is None:
+            step = 0
+
+        if due is None:
+            due = datetime.now(timezone.utc)
+
+        object.__setattr__(self, "card_id", card_id)
+        object.__setattr__(self, "state", state)
+        object.__setattr__(self, "step", step)
+        object.__setattr__(self, "ease", ease)
+        object.__setattr__(self, "due", due)
+        object.__setattr__(self, "current_interval", current_interval)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"FrozenCard is immutable, use replace() to change {name}")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"FrozenCard is immutable, cannot delete {name}")
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FrozenCard):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __hash__(self) -> int:
+        return hash(self._fields())
+
+    def __repr__(self) -> str:
+        return (
+            f"FrozenCard(card_id={self.card_id!r}, state={self.state!r}, step={self.step!r}, "
+            f"ease={self.ease!r}, due={self.due!r}, current_interval={self.current_interval!r})"
+        )
+
+    def __reduce__(self) -> tuple[type["FrozenCard"], tuple[Any, ...]]:
+        return (FrozenCard, self._fields())
+
+    def __copy__(self) -> "FrozenCard":
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "FrozenCard":
+        return self
+
+    def _fields(self) -> tuple[Any, ...]:
+        return (
+            self.card_id,
+            self.state,
+            self.step,
+            self.ease,
+            self.due,
+            self.current_interval,
+        )
+
+    def replace(
+        self,
+        *,
+        card_id: int = _UNSET,
+        state: State = _UNSET,
+        step: int | None = _UNSET,
+        ease: float | None = _UNSET,
+        due: datetime = _UNSET,
+        current_interval: int | None = _UNSET,
+    ) -> "FrozenCard":
+        """
+        Returns a new FrozenCard with the given attributes changed.
+        """
+
+        return FrozenCard(
+            card_id=self.card_id if card_id is _UNSET else card_id,
+            state=self.state if state is _UNSET else state,
+            step=self.step if step is _UNSET else step,
+            ease=self.ease if ease is _UNSET else ease,
+            due=self.due if due is _UNSET else due,
+            current_interval=(
+                self.current_interval
+                if current_interval is _UNSET
+                else current_interval
+            ),
+        )
+
+    @staticmethod
+    def from_card(card: Card) -> "FrozenCard":
+        return FrozenCard(
+            card_id=card.card_id,
+            state=card.state,
+            step=card.step,
+            ease=card.ease,
+            due=card.due,
+            current_interval=card.current_interval,
+        )
+
+    def to_card(self) -> Card:
+        return Card(
+            card_id=self.card_id,
+            state=self.state,
+            step=self.step,
+            ease=self.ease,
+            due=self.due,
+            current_interval=self.current_interval,
+        )
+
+    def to_dict(self) -> dict[str, int | float | str | None]:
+        return_dict = {
+            "card_id": self.card_id,
+            "state": self.state.value,
+            "step": self.step,
+            "ease": self.ease,
+            "due": self.due.isoformat(),
+            "current_interval": self.current_interval,
+        }
+
+        return return_dict
+
+    @staticmethod
+    def from_dict(source_dict: dict[str, Any]) -> "FrozenCard":
+        return FrozenCard(
+            card_id=int(source_dict["card_id"]),
+            state=State(int(source_dict["state"])),
+            step=source_dict["step"],
+            ease=source_dict["ease"],
+            due=datetime.fromisoformat(source_dict["due"]),
+            current_interval=source_dict["current_interval"],
+        )
+
+
+class FrozenReviewLog:
+    """
+    Immutable, memory-compact version of ReviewLog.
+
+    Has the same attributes and dict format as ReviewLog. The reviewed card is stored as a FrozenCard,
+    so it is shared rather than copied.
+    """
+
+    __slots__ = ("card", "rating", "review_datetime", "review_duration")
+
+    card: FrozenCard
+    rating: Rating
+    review_datetime: datetime
+    review_duration: int | None
+
+    def __init__(
+        self,
+        card: FrozenCard | Card,
+        rating: Rating,
+        review_datetime: datetime,
+        review_duration: int | None = None,
+    ) -> None:
+        if not isinstance(card, FrozenCard):
+            card = FrozenCard.from_card(card)
+
+        object.__setattr__(self, "card", card)
+        object.__setattr__(self, "rating", rating)
+        object.__setattr__(self, "review_datetime", review_datetime)
+        object.__setattr__(self, "review_duration", review_duration)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(
+            f"FrozenReviewLog is immutable, use replace() to change {name}"
+        )
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"FrozenReviewLog is immutable, cannot delete {name}")
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FrozenReviewLog):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __hash__(self) -> int:
+        return hash(self._fields())
+
+    def __repr__(self) -> str:
+        return (
+            f"FrozenReviewLog(card={self.card!r}, rating={self.rating!r}, "
+            f"review_datetime={self.review_datetime!r}, review_duration={self.review_duration!r})"
+        )
+
+    def __reduce__(self) -> tuple[type["FrozenReviewLog"], tuple[Any, ...]]:
+        return (FrozenReviewLog, self._fields())
+
+    def __copy__(self) -> "FrozenReviewLog":
+        return self
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> "FrozenReviewLog":
+        return self
+
+    def _fields(self) -> tuple[Any, ...]:
+        return (self.card, self.rating, self.review_datetime, self.review_duration)
+
+    def replace(
+        self,
+        *,
+        card: FrozenCard | Card = _UNSET,
+        rating: Rating = _UNSET,
+        review_datetime: datetime = _UNSET,
+        review_duration: int | None = _UNSET,
+    ) -> "FrozenReviewLog":
+        """
+        Returns a new FrozenReviewLog with the given attributes changed.
+        """
+
+        return FrozenReviewLog(
+            card=self.card if card is _UNSET else card,
+            rating=self.rating if rating is _UNSET else rating,
+            review_datetime=(
+                self.review_datetime if review_datetime is _UNSET else review_datetime
+            ),
+            review_duration=(
+                self.review_duration if review_duration is _UNSET else review_duration
+            ),
+        )
+
+    def to_dict(
+        self,
+    ) -> dict[str, dict[str, int | float | str | None] | int | str | None]:
+        return_dict = {
+            "card": self.card.to_dict(),
+            "rating": self.rating.value,
+            "review_datetime": self.review_datetime.isoformat(),
+            "review_duration": self.review_duration,
+        }
+
+        return return_dict
+
+    @staticmethod
+    def from_dict(source_dict: dict[str, Any]) -> "FrozenReviewLog":
+        return FrozenReviewLog(
+            card=FrozenCard.from_dict(source_dict["card"]),
+            rating=Rating(int(source_dict["rating"])),
+            review_datetime=datetime.fromisoformat(source_dict["review_datetime"]),
+            review_duration=source_dict["review_duration"],
+        )
+
+
+def _lazy_field(name: str, decode_dict: Any, decode_record: Any) -> Any:
+    """
+    Returns a property that decodes a LazyCard field on first access and stores it in the instance dict.
+
+    decode_dict decodes the field from a Card.to_dict dict and decode_record from an unpacked binary record.
+    A binary record is unpacked into a tuple once, on the first access to any of its fields.
+    """
+
+    def get(self: "LazyCard") -> Any:
+        try:
+            return self.__dict__[name]
+        except KeyError:
+            source = self._source
+            if isinstance(source, dict):
+                value = decode_dict(source)
+            else:
+                if not isinstance(source, tuple):
+                    source = self._source = _CARD_RECORD.unpack(source)
+                value = decode_record(source)
+            self.__dict__[name] = value
+            return value
+
+    def set(self: "LazyCard", value: Any) -> None:
+        self.__dict__[name] = value
+
+    return property(get, set)
+
+
+class LazyCard(Card):
+    """
+    Card that decodes each field from its serialized form the first time the field is accessed.
+
+    Wraps either a dict in the format of Card.to_dict or a single record in the binary format of Card.dumps_many.
+    Creating a LazyCard does no parsing, so loading a large collection is cheap when most cards are never used.
+    A LazyCard can be used anywhere a Card can, and fields can be assigned as usual.
+    """
+
+    _source: dict[str, Any] | tuple[Any, ...] | bytes
+
+    def __init__(self, source: dict[str, Any] | bytes | bytearray | memoryview) -> None:
+        # a binary record is unpacked the first time any field is accessed. it is copied to bytes, so the card can be
+        # pickled and copied and doesn't keep the buffer it was sliced from alive
+        if isinstance(source, (bytearray, memoryview)):
+            source = bytes(source)
+        self._source = source
+
+    @staticmethod
+    def loads_many(data: bytes | bytearray | memoryview) -> list[Card]:
+        """
+        Wraps each record of cards encoded with Card.dumps_many in a LazyCard.
+
+        The list is typed as list[Card], as in Card.loads_many which this overrides, but every element is a LazyCard.
+
+        Raises:
+            ValueError: If the data is not a valid encoding of cards.
+        """
+
+        num_records = _read_binary_header(data, _CARD_MAGIC)
+
+        body = memoryview(data)[_BINARY_HEADER.size :]
+        if len(body) != num_records * _CARD_RECORD.size:
+            raise ValueError("data length does not match the number of records")
+
+        return [
+            LazyCard(body[offset : offset + _CARD_RECORD.size])
+            for offset in range(0, len(body), _CARD_RECORD.size)
+        ]
+
+    card_id = _lazy_field(
+        "card_id",
+        lambda source: int(source["card_id"]),
+        lambda record: record[0],
+    )
+    state = _lazy_field(
+        "state",
+        lambda source: State(int(source["state"])),
+        lambda record: State(record[1]),
+    )
+    step = _lazy_field(
+        "step",
+        lambda source: source["step"],
+        lambda record: None if record[2] < 0 else record[2],
+    )
+    ease = _lazy_field(
+        "ease",
+        lambda source: source["ease"],
+        lambda record: None if math.isnan(record[3]) else record[3],
+    )
+    due = _lazy_field(
+        "due",
+        lambda source: datetime.fromisoformat(source["due"]),
+        lambda record: _datetime_from_fields(record[4], record[5]),
+    )
+    current_interval = _lazy_field(
+        "current_interval",
+        lambda source: source["current_interval"],
+        lambda record: None if record[6] < 0 else record[6],
+    )
+
+
+class SchedulerStats:
+    """
+    Counters and timings collected from a Scheduler's reviews.
+
+    Pass an instance to a Scheduler to start collecting. Subclass it and override record_review to add your own hooks.
+    Updates are not synchronized, so give each thread its own Scheduler and SchedulerStats.
+
+    Attributes:
+        transitions (dict[tuple[State, Rating, State], int]): The number of reviews for each (state before, rating, state after).
+        review_time_histogram (list[int]): The number of reviews whose duration in nanoseconds has each bit length,
+                                           so bucket i counts durations in [2 ** (i - 1), 2 ** i).
+        fuzz_applied (int): The number of intervals that were fuzzed.
+        maximum_interval_clamps (int): The number of intervals that were capped at the maximum interval.
+        minimum_interval_clamps (int): The number of intervals that were raised to the minimum interval.
+    """
+
+    transitions: dict[tuple[State, Rating, State], int]
+    review_time_histogram: list[int]
+    fuzz_applied: int
+    maximum_interval_clamps: int
+    minimum_interval_clamps: int
+
+    def __init__(self) -> None:
+        self.transitions = {}
+        self.review_time_histogram = [0] * 64
+        self.fuzz_applied = 0
+        self.maximum_interval_clamps = 0
+        self.minimum_interval_clamps = 0
+
+    def record_review(
+        self, state: State, rating: Rating, next_state: State, elapsed_ns: int
+    ) -> None:
+        """
+        Called by the Scheduler after every review with the card's state before and after and how long it took.
+        """
+
+        key = (state, rating, next_state)
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        self.review_time_histogram[min(elapsed_ns.bit_length(), 63)] += 1
+
+    def review_time_percentile(self, percentile: float) -> int | None:
+        """
+        Returns an upper bound in nanoseconds on the given percentile (0 to 100) of review durations, or None if no
+        reviews were recorded.
+        """
+
+        num_reviews = sum(self.review_time_histogram)
+        if num_reviews == 0:
+            return None
+
+        threshold = num_reviews * percentile / 100.0
+        num_seen = 0
+        for bit_length, count in enumerate(self.review_time_histogram):
+            num_seen += count
+            if count and num_seen >= threshold:
+                return 2**bit_length
+
+        return 2**63
+
+    def to_dict(self) -> dict[str, Any]:
+        return_dict = {
+            "reviews": sum(self.transitions.values()),
+            "transitions": {
+                f"{state.name}-{rating.name}-{next_state.name}": count
+                for (state, rating, next_state), count in self.transitions.items()
+            },
+            "review_time_ns": {
+                "p50": self.review_time_percentile(50),
+                "p90": self.review_time_percentile(90),
+                "p99": self.review_time_percentile(99),
+                "histogram": {
+                    str(2**bit_length): count
+                    for bit_length, count in enumerate(self.review_time_histogram)
+                    if count
+                },
+            },
+            "fuzz_applied": self.fuzz_applied,
+            "maximum_interval_clamps": self.maximum_interval_clamps,
+            "minimum_interval_clamps": self.minimum_interval_clamps,
+        }
+
+        return return_dict
+
 
 class Scheduler:
     """
@@ -192,6 +872,9 @@ class Scheduler:
         interval_modifier (float): A factor used as a multiplier to determine future review interval lengths. It is used on Review-state cards and Relearning-state cards about to graduate the relearning steps.
         hard_interval (float): The multiplier applied to a review interval when answering Hard.
         new_interval (float): The multiplier applied to a review interval when answering Again.
+        rng (Any | None): The random number generator used to fuzz intervals. Any object with a random() method returning a float in [0, 1) can be used,
+                          such as random.Random or numpy.random.Generator. If None, the global random module is used.
+        stats (SchedulerStats | None): Collects counters and timings of the scheduler's reviews, or None to collect nothing.
     """
 
     learning_steps: tuple[timedelta, ...]
@@ -205,6 +888,8 @@ class Scheduler:
     interval_modifier: float
     hard_interval: float
     new_interval: float
+    rng: Any | None
+    stats: SchedulerStats | None
 
     def __init__(
         self,
@@ -224,6 +909,8 @@ class Scheduler:
         interval_modifier: float = 1.0,
         hard_interval: float = 1.2,
         new_interval: float = 0.0,
+        rng: Any | None = None,
+        stats: SchedulerStats | None = None,
     ) -> None:
         self.learning_steps = tuple(learning_steps)
         self.graduating_interval = graduating_interval
@@ -236,19 +923,145 @@ class Scheduler:
         self.interval_modifier = interval_modifier
         self.hard_interval = hard_interval
         self.new_interval = new_interval
+        self.rng = rng
+        self.stats = stats
 
+        self._compile_transitions()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if self.__dict__.get("_frozen", False):
+            raise AttributeError(f"cannot set {name!r} on a frozen Scheduler")
+
+        super().__setattr__(name, value)
+
+        # keep the transition table in sync with the steps it was compiled from
+        if name in ("learning_steps", "relearning_steps") and "_transitions" in vars(
+            self
+        ):
+            self._compile_transitions()
+
+    def __delattr__(self, name: str) -> None:
+        if self.__dict__.get("_frozen", False):
+            raise AttributeError(f"cannot delete {name!r} from a frozen Scheduler")
+
+        super().__delattr__(name)
+
+    def freeze(self) -> "Scheduler":
+        """
+        Makes the scheduler immutable, so it can be safely shared, e.g. between users with the same settings.
+
+        Setting any attribute of a frozen scheduler, including rng and stats, raises an AttributeError. Reviewing
+        cards does not modify a scheduler, so frozen schedulers can review cards as usual.
+
+        Returns:
+            Scheduler: The scheduler itself.
+        """
+
+        self._frozen = True
+        return self
+
+    def _compile_transitions(self) -> None:
+        """
+        Precomputes the outcome of reviewing a Learning or Relearning card at each of its steps.
+
+        The table maps (state, step, rating) to (next state, next step, due offset). A due offset of None means
+        the card graduates to the Review state and its interval must be calculated. Cards at a step without an
+        entry graduate as well.
+        """
+
+        transitions: dict[
+            tuple[State, int, Rating], tuple[State, int | None, timedelta | None]
+        ] = {}
+
+        for state, steps in (
+            (State.Learning, self.learning_steps),
+            (State.Relearning, self.relearning_steps),
+        ):
+            if len(steps) == 0:
+                continue
+
+            if len(steps) == 1:
+                first_hard_step = steps[0] * 1.5
+            else:
+                first_hard_step = (steps[0] + steps[1]) / 2.0
+
+            for step in range(len(steps)):
+                transitions[(state, step, Rating.Again)] = (state, 0, steps[0])
+
+                # card step stays the same
+                if step == 0:
+                    transitions[(state, step, Rating.Hard)] = (
+                        state,
+                        step,
+                        first_hard_step,
+                    )
+                else:
+                    transitions[(state, step, Rating.Hard)] = (state, step, steps[step])
+
+                if step + 1 == len(steps):  # the last step
+                    transitions[(state, step, Rating.Good)] = (State.Review, None, None)
+                else:
+                    transitions[(state, step, Rating.Good)] = (
+                        state,
+                        step + 1,
+                        steps[step + 1],
+                    )
+
+                transitions[(state, step, Rating.Easy)] = (State.Review, None, None)
+
+            # a card one step past the end, left by a scheduler with more steps, can still be reset or sent to Review
+            transitions[(state, len(steps), Rating.Again)] = (state, 0, steps[0])
+            transitions[(state, len(steps), Rating.Easy)] = (State.Review, None, None)
+
+        self._transitions = transitions
+
+        # the same table for Scheduler.review_epoch, with due offsets in seconds, kept integral for whole-second steps
+        epoch_transitions: dict[
+            tuple[State, int, Rating], tuple[State, int | None, int | float | None]
+        ] = {}
+        for key, (next_state, next_step, due_offset) in transitions.items():
+            if due_offset is None:
+                epoch_transitions[key] = (next_state, next_step, None)
+            else:
+                seconds = due_offset.total_seconds()
+                epoch_transitions[key] = (
+                    next_state,
+                    next_step,
+                    int(seconds) if seconds.is_integer() else seconds,
+                )
+
+        self._epoch_transitions = epoch_transitions
+
+    @overload
     def review_card(
         self,
         card: Card,
         rating: Rating,
         review_datetime: datetime | None = None,
         review_duration: int | None = None,
-    ) -> tuple[Card, ReviewLog]:
+    ) -> tuple[Card, ReviewLog]: ...
+
+    @overload
+    def review_card(
+        self,
+        card: FrozenCard,
+        rating: Rating,
+        review_datetime: datetime | None = None,
+        review_duration: int | None = None,
+    ) -> tuple[FrozenCard, FrozenReviewLog]: ...
+
+    def review_card(
+        self,
+        card: Card | FrozenCard,
+        rating: Rating,
+        review_datetime: datetime | None = None,
+        review_duration: int | None = None,
+    ) -> tuple[Card, ReviewLog] | tuple[FrozenCard, FrozenReviewLog]:
         """
         Reviews a card with a given rating at a specified time and duration.
 
         Args:
-            card (Card): The card being reviewed.
+            card (Card | FrozenCard): The card being reviewed. A FrozenCard is reviewed into a FrozenCard and a FrozenReviewLog.
             rating (Rating): The chosen rating for the card being reviewed.
             review_datetime (datetime | None): The date and time of the review. If unspecified, the date and time will be the current time in UTC.
             review_duration (int | None): The number of miliseconds it took to review the card or None if unspecified.
@@ -257,11 +1070,127 @@ class Scheduler:
             tuple: A tuple containing the updated, reviewed card and its corresponding review log.
         """
 
-        card = deepcopy(card)
+        if self.stats is None:
+            return self._review_card(card, rating, review_datetime, review_duration)
+
+        started = time.perf_counter_ns()
+        reviewed = self._review_card(card, rating, review_datetime, review_duration)
+        self.stats.record_review(
+            card.state, rating, reviewed[0].state, time.perf_counter_ns() - started
+        )
+
+        return reviewed
+
+    def review_epoch(
+        self,
+        state: State,
+        step: int | None,
+        ease: float | None,
+        current_interval: int | None,
+        due: float,
+        rating: Rating,
+        review_time: float | None = None,
+    ) -> tuple[State, int | None, float | None, int | None, int | float]:
+        """
+        Reviews a card given as its fields, with times in seconds since the unix epoch instead of datetimes.
+
+        The results are the same as review_card on a card due at datetime.fromtimestamp(due, timezone.utc), including
+        the rounding of intervals and the number of days a card is overdue, but no datetime, Card or ReviewLog objects
+        are created. Due times stay integers as long as due, review_time and the learning and relearning steps are
+        whole seconds.
 
+        Args:
+            state (State): The state of the card being reviewed, as a State or its integer value.
+            step (int | None): The card's step or None if it has no step.
+            ease (float | None): The card's ease factor or None if it has no ease factor.
+            current_interval (int | None): The card's current interval in days or None if it has no interval.
+            due (int | float): When the card is due, in seconds since the unix epoch.
+            rating (Rating): The chosen rating for the card being reviewed.
+            review_time (int | float | None): When the card was reviewed, in seconds since the unix epoch. If unspecified, the current time rounded down to a whole second.
+
+        Returns:
+            tuple: The card's new state, step, ease, current interval and due time in seconds since the unix epoch.
+        """
+
+        if review_time is None:
+            review_time = int(time.time())
+
+        # states read from columns or databases are often plain ints. a card that stays in its state is returned
+        # with the state it was given, so convert it to return a State either way
+        state = State(state)
+
+        if self.stats is None:
+            return self._next_fields(
+                state,
+                step,
+                ease,
+                current_interval,
+                due,
+                rating,
+                review_time,
+                self._epoch_transitions,
+                _SECONDS_PER_DAY,
+            )
+
+        started = time.perf_counter_ns()
+        fields = self._next_fields(
+            state,
+            step,
+            ease,
+            current_interval,
+            due,
+            rating,
+            review_time,
+            self._epoch_transitions,
+            _SECONDS_PER_DAY,
+        )
+        self.stats.record_review(
+            state, rating, fields[0], time.perf_counter_ns() - started
+        )
+
+        return fields
+
+    def _review_card(
+        self,
+        card: Card | FrozenCard,
+        rating: Rating,
+        review_datetime: datetime | None,
+        review_duration: int | None,
+    ) -> tuple[Card, ReviewLog] | tuple[FrozenCard, FrozenReviewLog]:
         if review_datetime is None:
             review_datetime = datetime.now(timezone.utc)
 
+        # the next card is built from these values instead of copying and mutating the reviewed card
+        state, step, ease, current_interval, due = self._next_fields(
+            card.state,
+            card.step,
+            card.ease,
+            card.current_interval,
+            card.due,
+            rating,
+            review_datetime,
+            self._transitions,
+            _ONE_DAY,
+        )
+
+        if isinstance(card, FrozenCard):
+            return (
+                FrozenCard(
+                    card_id=card.card_id,
+                    state=state,
+                    step=step,
+                    ease=ease,
+                    due=due,
+                    current_interval=current_interval,
+                ),
+                FrozenReviewLog(
+                    card=card,
+                    rating=rating,
+                    review_datetime=review_datetime,
+                    review_duration=review_duration,
+                ),
+            )
+
         review_log = ReviewLog(
             card=card,
             rating=rating,
@@ -269,246 +1198,712 @@ class Scheduler:
             review_duration=review_duration,
         )
 
-        if card.state == State.Learning:
-            assert type(card.step) == int  # mypy
+        card = Card(
+            card_id=card.card_id,
+            state=state,
+            step=step,
+            ease=ease,
+            due=due,
+            current_interval=current_interval,
+        )
+
+        return card, review_log
+
+    def _next_fields(
+        self,
+        state: State,
+        step: int | None,
+        ease: float | None,
+        current_interval: int | None,
+        due: Any,
+        rating: Rating,
+        review_time: Any,
+        transitions: dict[tuple[State, int, Rating], tuple[State, int | None, Any]],
+        day: Any,
+        fuzz: bool = True,
+        record_stats: bool = True,
+    ) -> tuple[State, int | None, float | None, int | None, Any]:
+        """
+        Calculates the state, step, ease, current interval and due time of a card after a review.
+
+        Times are either datetimes, with transitions=self._transitions and day=timedelta(days=1), or epoch seconds,
+        with transitions=self._epoch_transitions and day=86400. The arithmetic is the same in both cases. If fuzz is
+        False, intervals are not fuzzed. If record_stats is False, fuzzing and clamping intervals are not counted in
+        self.stats, e.g. for previews.
+        """
+
+        if state == State.Learning:
+            assert type(step) == int  # mypy
+
+            # look up the card's next state, step and due offset in the precompiled transition table
+            # no transition: no learning steps are defined, or the card was originally scheduled with a scheduler with more
+            # learning steps than the current scheduler, so move card to Review state
+            transition = transitions.get((state, step, rating))
 
-            # calculate the card's next interval
-            # len(self.learning_steps) == 0: no learning steps defined so move card to Review state
-            # card.step > len(self.learning_steps): handles the edge-case when a card was originally scheduled with a scheduler with more
-            # learning steps than the current scheduler
-            if len(self.learning_steps) == 0 or card.step > len(self.learning_steps):
-                card.state = State.Review
-                card.step = None
-                card.ease = self.starting_ease
-                card.current_interval = self.graduating_interval
-                card.due = review_datetime + timedelta(days=card.current_interval)
+            if transition is not None and transition[2] is not None:
+                state, step, due_offset = transition
+                due = review_time + due_offset
 
             else:
+                state = State.Review
+                step = None
+                ease = self.starting_ease
+                if transition is not None and rating == Rating.Easy:
+                    current_interval = self.easy_interval
+                else:
+                    current_interval = self.graduating_interval
+                due = review_time + current_interval * day
 
-                if rating == Rating.Again:
-                    card.step = 0
-                    card.due = review_datetime + self.learning_steps[card.step]
-
-                elif rating == Rating.Hard:
-                    # card step stays the same
-
-                    if card.step == 0 and len(self.learning_steps) == 1:
-                        card.due = review_datetime + (self.learning_steps[card.step] * 1.5)
-                    elif card.step == 0 and len(self.learning_steps) >= 2:
-                        card.due = review_datetime + (
-                            (
-                                self.learning_steps[card.step]
-                                + self.learning_steps[card.step + 1]
-                            )
-                            / 2.0
-                        )
-                    else:
-                        card.due = review_datetime + self.learning_steps[card.step]
-
-                elif rating == Rating.Good:
-                    if card.step + 1 == len(self.learning_steps):  # the last step
-                        card.state = State.Review
-                        card.step = None
-                        card.ease = self.starting_ease
-                        card.current_interval = self.graduating_interval
-                        card.due = review_datetime + timedelta(days=card.current_interval)
-
-                    else:
-                        card.step += 1
-                        card.due = review_datetime + self.learning_steps[card.step]
-
-                elif rating == Rating.Easy:
-                    card.state = State.Review
-                    card.step = None
-                    card.ease = self.starting_ease
-                    card.current_interval = self.easy_interval
-                    card.due = review_datetime + timedelta(days=card.current_interval)
-
-        elif card.state == State.Review:
-            assert type(card.ease) == float  # mypy
-            assert type(card.current_interval) == int  # mypy
-
-            if rating == Rating.Again: # the card is "lapsed"
-
-                card.ease = max(1.3, card.ease * 0.80)  # reduce ease by 20%
-
-                current_interval = max(
-                    self.minimum_interval,
-                    round(
-                        card.current_interval
-                        * self.new_interval
-                        * self.interval_modifier
-                    ),
+        elif state == State.Review:
+            assert type(ease) == float  # mypy
+            assert type(current_interval) == int  # mypy
+
+            if rating == Rating.Again:  # the card is "lapsed"
+                ease = max(1.3, ease * 0.80)  # reduce ease by 20%
+
+                current_interval = round(
+                    current_interval * self.new_interval * self.interval_modifier
                 )
-                card.current_interval = self._get_fuzzed_interval(current_interval)
+                if current_interval < self.minimum_interval:
+                    current_interval = self.minimum_interval
+                    if record_stats and self.stats is not None:
+                        self.stats.minimum_interval_clamps += 1
+                if fuzz:
+                    current_interval = self._get_fuzzed_interval(
+                        current_interval, record_stats
+                    )
 
                 # if there are no relearning steps (they were left blank)
                 if len(self.relearning_steps) > 0:
+                    state = State.Relearning
+                    step = 0
 
-                    card.state = State.Relearning
-                    card.step = 0
-
-                    card.due = review_datetime + self.relearning_steps[card.step]
+                    due = (
+                        review_time
+                        + transitions[(State.Relearning, 0, Rating.Again)][2]
+                    )
 
                 else:
-
-                    card.due = review_datetime + timedelta(days=card.current_interval)
+                    due = review_time + current_interval * day
 
             elif rating == Rating.Hard:
-                card.ease = max(1.3, card.ease * 0.85)  # reduce ease by 15%
-                current_interval = min(
-                    self.maximum_interval,
+                ease = max(1.3, ease * 0.85)  # reduce ease by 15%
+                current_interval = self._limit_interval(
                     round(
-                        card.current_interval
-                        * self.hard_interval
-                        * self.interval_modifier
+                        current_interval * self.hard_interval * self.interval_modifier
                     ),
+                    record_stats,
                 )
-                card.current_interval = self._get_fuzzed_interval(current_interval)
-                card.due = review_datetime + timedelta(days=card.current_interval)
+                if fuzz:
+                    current_interval = self._get_fuzzed_interval(
+                        current_interval, record_stats
+                    )
+                due = review_time + current_interval * day
 
             elif rating == Rating.Good:
                 # ease stays the same
 
-                days_overdue = (review_datetime - card.due).days
+                days_overdue = (review_time - due) // day
                 if days_overdue >= 1:
-                    current_interval = min(
-                        self.maximum_interval,
+                    current_interval = self._limit_interval(
                         round(
-                            (card.current_interval + (days_overdue / 2.0))
-                            * card.ease
+                            (current_interval + (days_overdue / 2.0))
+                            * ease
                             * self.interval_modifier
                         ),
+                        record_stats,
                     )
 
                 else:
-                    current_interval = min(
-                        self.maximum_interval,
-                        round(
-                            card.current_interval * card.ease * self.interval_modifier
-                        ),
+                    current_interval = self._limit_interval(
+                        round(current_interval * ease * self.interval_modifier),
+                        record_stats,
                     )
 
-                card.current_interval = self._get_fuzzed_interval(current_interval)
+                if fuzz:
+                    current_interval = self._get_fuzzed_interval(
+                        current_interval, record_stats
+                    )
 
-                card.due = review_datetime + timedelta(days=card.current_interval)
+                due = review_time + current_interval * day
 
             elif rating == Rating.Easy:
-                days_overdue = (review_datetime - card.due).days
+                days_overdue = (review_time - due) // day
                 if days_overdue >= 1:
-                    current_interval = min(
-                        self.maximum_interval,
+                    current_interval = self._limit_interval(
                         round(
-                            (card.current_interval + days_overdue)
-                            * card.ease
+                            (current_interval + days_overdue)
+                            * ease
                             * self.easy_bonus
                             * self.interval_modifier
                         ),
+                        record_stats,
                     )
 
                 else:
-                    current_interval = min(
-                        self.maximum_interval,
+                    current_interval = self._limit_interval(
                         round(
-                            card.current_interval
-                            * card.ease
+                            current_interval
+                            * ease
                             * self.easy_bonus
                             * self.interval_modifier
                         ),
+                        record_stats,
                     )
 
-                card.current_interval = self._get_fuzzed_interval(current_interval)
+                if fuzz:
+                    current_interval = self._get_fuzzed_interval(
+                        current_interval, record_stats
+                    )
 
-                card.ease = card.ease * 1.15  # increase ease by 15%
-                card.due = review_datetime + timedelta(days=card.current_interval)
+                ease = ease * 1.15  # increase ease by 15%
+                due = review_time + current_interval * day
 
-        elif card.state == State.Relearning:
-            assert type(card.step) == int  # mypy
-            assert type(card.current_interval) == int  # mypy
-            assert type(card.ease) == float  # mypy
+        elif state == State.Relearning:
+            assert type(step) == int  # mypy
+            assert type(current_interval) == int  # mypy
+            assert type(ease) == float  # mypy
 
-            # calculate the card's next interval
-            # len(self.relearning_steps) == 0: no relearning steps defined so move card to Review state
-            # card.step > len(self.relearning_steps): handles the edge-case when a card was originally scheduled with a scheduler with more
-            # relearning steps than the current scheduler
-            if len(self.relearning_steps) == 0 or card.step > len(self.relearning_steps):
-                card.state = State.Review
-                card.step = None
+            # look up the card's next state, step and due offset in the precompiled transition table
+            # no transition: no relearning steps are defined, or the card was originally scheduled with a scheduler with more
+            # relearning steps than the current scheduler, so move card to Review state
+            transition = transitions.get((state, step, rating))
 
-                # don't update ease
-                card.current_interval = min(
-                    self.maximum_interval,
-                    round(
-                        card.current_interval * card.ease * self.interval_modifier
-                    ),
-                )
-                card.due = review_datetime + timedelta(days=card.current_interval)
+            if transition is not None and transition[2] is not None:
+                state, step, due_offset = transition
+                due = review_time + due_offset
 
             else:
+                state = State.Review
+                step = None
 
-                if rating == Rating.Again:
-                    card.step = 0
-                    card.due = review_datetime + self.relearning_steps[card.step]
-
-                elif rating == Rating.Hard:
-                    # card step stays the same
-
-                    if card.step == 0 and len(self.relearning_steps) == 1:
-                        card.due = review_datetime + (
-                            self.relearning_steps[card.step] * 1.5
-                        )
-                    elif card.step == 0 and len(self.relearning_steps) >= 2:
-                        card.due = review_datetime + (
-                            (
-                                self.relearning_steps[card.step]
-                                + self.relearning_steps[card.step + 1]
-                            )
-                            / 2.0
-                        )
-                    else:
-                        card.due = review_datetime + self.relearning_steps[card.step]
-
-                elif rating == Rating.Good:
-                    if card.step + 1 == len(self.relearning_steps):  # the last step
-                        card.state = State.Review
-                        card.step = None
-                        # don't update ease
-                        card.current_interval = min(
-                            self.maximum_interval,
-                            round(
-                                card.current_interval * card.ease * self.interval_modifier
-                            ),
-                        )
-                        card.due = review_datetime + timedelta(days=card.current_interval)
-
-                    else:
-                        card.step += 1
-                        card.due = review_datetime + self.relearning_steps[card.step]
-
-                elif rating == Rating.Easy:
-                    card.state = State.Review
-                    card.step = None
-                    # don't update ease
-                    card.current_interval = min(
-                        self.maximum_interval,
+                # don't update ease
+                if transition is not None and rating == Rating.Easy:
+                    current_interval = self._limit_interval(
                         round(
-                            card.current_interval
-                            * card.ease
+                            current_interval
+                            * ease
                             * self.easy_bonus
                             * self.interval_modifier
                         ),
+                        record_stats,
+                    )
+                else:
+                    current_interval = self._limit_interval(
+                        round(current_interval * ease * self.interval_modifier),
+                        record_stats,
                     )
-                    card.due = review_datetime + timedelta(days=card.current_interval)
+                due = review_time + current_interval * day
 
-        return card, review_log
+        return state, step, ease, current_interval, due
+
+    def _review_cards_columnar(
+        self,
+        np: Any,
+        cards: Sequence[Card | FrozenCard],
+        ratings: Sequence[Rating],
+        review_datetimes: Sequence[datetime | None],
+        review_durations: Sequence[int | None],
+    ) -> tuple[list[Any], list[Any]] | None:
+        """
+        Reviews cards with _review_columns, or returns None if any card or rating would make review_card raise, so
+        that the caller can fall back to review_card and raise the same error.
+
+        Cards are read and the results built with map over the columns rather than with per card code, since building
+        the objects is most of the cost. Batches that mix Card and FrozenCard objects also return None.
+        """
+
+        if len(cards) == 0:
+            return [], []
+
+        card_types = set(map(type, cards))
+        if card_types == {Card}:
+            card_class: Any = Card
+            review_log_class: Any = ReviewLog
+        elif card_types == {FrozenCard}:
+            card_class = FrozenCard
+            review_log_class = FrozenReviewLog
+        else:
+            return None
+
+        now = datetime.now(timezone.utc)
+        review_datetimes = [
+            now if review_datetime is None else review_datetime
+            for review_datetime in review_datetimes
+        ]
+
+        # one list per attribute rather than a tuple per card, which would all be tracked by the garbage collector
+        card_ids, states, steps, eases, dues, intervals = (
+            list(map(attribute, cards)) for attribute in _CARD_ATTRIBUTES
+        )
+
+        # the same checks as the assertions in _next_fields
+        if not (
+            set(map(type, steps)) <= _INT_OR_NONE
+            and set(map(type, eases)) <= _FLOAT_OR_NONE
+            and set(map(type, intervals)) <= _INT_OR_NONE
+            and set(states) <= _STATE_VALUES
+            and set(ratings) <= _RATING_VALUES
+        ):
+            return None
+
+        # None becomes nan in float arrays
+        step_values = np.array(steps, dtype=np.float64)
+        ease_values = np.array(eases, dtype=np.float64)
+        interval_values = np.array(intervals, dtype=np.float64)
+        state_values = np.array(states, dtype=np.int64)
+        if (
+            np.isnan(step_values) & (state_values != State.Review)
+            | (np.isnan(ease_values) | np.isnan(interval_values))
+            & (state_values != State.Learning)
+        ).any():
+            return None
+
+        # -1 and nan stand for None in the columns, so cards that really have them are left to review_card
+        if (
+            (step_values < 0).any()
+            or (interval_values < 0).any()
+            or np.isnan(ease_values).sum() != eases.count(None)
+        ):
+            return None
+
+        try:
+            elapsed = list(
+                map(floordiv, map(sub, review_datetimes, dues), repeat(_MICROSECOND))
+            )
+        except TypeError:
+            # e.g. naive and aware datetimes, which review_card only raises on for some cards
+            return None
+
+        transitions = {
+            key: (
+                next_state,
+                next_step,
+                None if due_offset is None else due_offset // _MICROSECOND,
+            )
+            for key, (next_state, next_step, due_offset) in self._transitions.items()
+        }
+
+        new_states, new_steps, new_eases, new_intervals, due_offsets = (
+            self._review_columns(
+                np,
+                state_values,
+                np.nan_to_num(step_values, nan=-1).astype(np.int64),
+                ease_values,
+                np.nan_to_num(interval_values, nan=-1).astype(np.int64),
+                np.array(elapsed, dtype=np.int64),
+                np.array(ratings, dtype=np.int64),
+                transitions,
+                _MICROSECONDS_PER_DAY,
+            )
+        )
+
+        new_states = map(_STATES.__getitem__, new_states.tolist())
+        new_steps = [None if step < 0 else step for step in new_steps.tolist()]
+        new_eases = [None if math.isnan(ease) else ease for ease in new_eases.tolist()]
+        new_intervals = [
+            None if interval < 0 else interval for interval in new_intervals.tolist()
+        ]
+        new_dues = map(
+            add,
+            review_datetimes,
+            map(timedelta, repeat(0), repeat(0), due_offsets.tolist()),
+        )
+
+        reviewed_cards = list(
+            map(
+                card_class,
+                card_ids,
+                new_states,
+                new_steps,
+                new_eases,
+                new_dues,
+                new_intervals,
+            )
+        )
+        review_logs = list(
+            map(review_log_class, cards, ratings, review_datetimes, review_durations)
+        )
+
+        return reviewed_cards, review_logs
+
+    def _review_columns(
+        self,
+        np: Any,
+        states: Any,
+        steps: Any,
+        eases: Any,
+        intervals: Any,
+        elapsed: Any,
+        ratings: Any,
+        transitions: dict[tuple[State, int, Rating], tuple[State, int | None, Any]],
+        day: int,
+    ) -> tuple[Any, Any, Any, Any, Any]:
+        """
+        Calculates the result of reviewing many cards at once with numpy array operations, in the same way as
+        _next_fields.
+
+        The cards are given as columns: their states, steps (-1 for None), eases (nan for None), current intervals
+        (-1 for None), the time elapsed from when each card was due to its review and each card's rating. Times are
+        in the units of day and of the due offsets in transitions. Every card must be valid for _next_fields.
 
-    def _get_fuzzed_interval(self, interval: int) -> int:
+        Random numbers for fuzzing are drawn one card at a time in the order of the cards, so the random stream is
+        the same as reviewing the cards one after the other. Stats are not collected.
+
+        Returns:
+            tuple: The new states, steps, eases and current intervals of the cards, in the same form as given, and
+                   the offset from each card's review time to when it is next due.
+        """
+
+        num_cards = len(states)
+        new_states = states.copy()
+        new_steps = steps.copy()
+        new_eases = eases.copy()
+        new_intervals = intervals.copy()
+        due_offsets = np.zeros(num_cards, dtype=elapsed.dtype)
+        # cards due current_interval days after the review, once their interval is known
+        due_in_days = np.zeros(num_cards, dtype=bool)
+        # cards whose interval is fuzzed
+        fuzzed = np.zeros(num_cards, dtype=bool)
+
+        def limit(interval: Any) -> Any:
+            return np.minimum(interval, self.maximum_interval)
+
+        def rounded(value: Any) -> Any:
+            # round half to even, as the builtin round
+            return np.rint(value).astype(np.int64)
+
+        # learning and relearning steps, looked up in the transition table laid out as arrays
+        max_step = max((step for _, step, _ in transitions), default=-1)
+        has_transition = np.zeros((4, max_step + 2, 5), dtype=bool)
+        graduates = np.zeros((4, max_step + 2, 5), dtype=bool)
+        transition_states = np.zeros((4, max_step + 2, 5), dtype=np.int64)
+        transition_steps = np.zeros((4, max_step + 2, 5), dtype=np.int64)
+        transition_offsets = np.zeros((4, max_step + 2, 5), dtype=elapsed.dtype)
+        for (state, step, rating), (
+            next_state,
+            next_step,
+            due_offset,
+        ) in transitions.items():
+            has_transition[state, step, rating] = True
+            graduates[state, step, rating] = due_offset is None
+            transition_states[state, step, rating] = next_state
+            transition_steps[state, step, rating] = (
+                -1 if next_step is None else next_step
+            )
+            if due_offset is not None:
+                transition_offsets[state, step, rating] = due_offset
+
+        learning = states == State.Learning
+        relearning = states == State.Relearning
+        stepping = np.flatnonzero(
+            (learning | relearning) & (steps >= 0) & (steps <= max_step + 1)
+        )
+        found = np.zeros(num_cards, dtype=bool)
+        moves = np.zeros(num_cards, dtype=bool)
+        table_index = (states[stepping], steps[stepping], ratings[stepping])
+        found[stepping] = has_transition[table_index]
+        moves[stepping] = has_transition[table_index] & ~graduates[table_index]
+
+        index = np.flatnonzero(moves)
+        move_index = (states[index], steps[index], ratings[index])
+        new_states[index] = transition_states[move_index]
+        new_steps[index] = transition_steps[move_index]
+        due_offsets[index] = transition_offsets[move_index]
+
+        # graduating to the Review state
+        easy_graduation = found & (ratings == Rating.Easy)
+
+        index = np.flatnonzero(learning & ~moves)
+        new_states[index] = State.Review
+        new_steps[index] = -1
+        new_eases[index] = self.starting_ease
+        new_intervals[index] = np.where(
+            easy_graduation[index], self.easy_interval, self.graduating_interval
+        )
+        due_in_days[index] = True
+
+        index = np.flatnonzero(relearning & ~moves)
+        interval = intervals[index]
+        ease = eases[index]
+        new_states[index] = State.Review
+        new_steps[index] = -1
+        new_intervals[index] = np.where(
+            easy_graduation[index],
+            limit(rounded(interval * ease * self.easy_bonus * self.interval_modifier)),
+            limit(rounded(interval * ease * self.interval_modifier)),
+        )
+        due_in_days[index] = True
+
+        # review cards
+        review = states == State.Review
+
+        index = np.flatnonzero(review & (ratings == Rating.Again))
+        new_eases[index] = np.maximum(1.3, eases[index] * 0.80)
+        new_intervals[index] = np.maximum(
+            rounded(intervals[index] * self.new_interval * self.interval_modifier),
+            self.minimum_interval,
+        )
+        fuzzed[index] = True
+        if len(self.relearning_steps) > 0:
+            new_states[index] = State.Relearning
+            new_steps[index] = 0
+            due_offsets[index] = transitions[(State.Relearning, 0, Rating.Again)][2]
+        else:
+            due_in_days[index] = True
+
+        index = np.flatnonzero(review & (ratings == Rating.Hard))
+        new_eases[index] = np.maximum(1.3, eases[index] * 0.85)
+        new_intervals[index] = limit(
+            rounded(intervals[index] * self.hard_interval * self.interval_modifier)
+        )
+        fuzzed[index] = True
+        due_in_days[index] = True
+
+        index = np.flatnonzero(review & (ratings == Rating.Good))
+        interval = intervals[index]
+        ease = eases[index]
+        days_overdue = elapsed[index] // day
+        new_intervals[index] = limit(
+            rounded(
+                np.where(
+                    days_overdue >= 1,
+                    (interval + (days_overdue / 2.0)) * ease * self.interval_modifier,
+                    interval * ease * self.interval_modifier,
+                )
+            )
+        )
+        fuzzed[index] = True
+        due_in_days[index] = True
+
+        index = np.flatnonzero(review & (ratings == Rating.Easy))
+        interval = intervals[index]
+        ease = eases[index]
+        days_overdue = elapsed[index] // day
+        new_intervals[index] = limit(
+            rounded(
+                np.where(
+                    days_overdue >= 1,
+                    (interval + days_overdue)
+                    * ease
+                    * self.easy_bonus
+                    * self.interval_modifier,
+                    interval * ease * self.easy_bonus * self.interval_modifier,
+                )
+            )
+        )
+        new_eases[index] = ease * 1.15
+        fuzzed[index] = True
+        due_in_days[index] = True
+
+        # fuzz, as in _get_fuzzed_interval and _get_fuzz_range, drawing random numbers in the order of the cards
+        index = np.flatnonzero(fuzzed & (new_intervals >= 3))
+        random_function = random.random if self.rng is None else self.rng.random
+        random_values = np.array(
+            [random_function() for _ in range(len(index))], dtype=np.float64
+        )
+
+        interval = new_intervals[index].astype(np.float64)
+        delta = 1.0 + 0.15 * (np.minimum(interval, 7.0) - 2.5)
+        delta = np.where(
+            interval > 7.0, delta + 0.1 * (np.minimum(interval, 20.0) - 7.0), delta
+        )
+        delta = np.where(interval > 20.0, delta + 0.05 * (interval - 20.0), delta)
+        min_ivl = np.maximum(2, rounded(interval - delta))
+        max_ivl = np.minimum(rounded(interval + delta), self.maximum_interval)
+        min_ivl = np.minimum(min_ivl, max_ivl)
+        new_intervals[index] = limit(
+            rounded((random_values * (max_ivl - min_ivl + 1)) + min_ivl)
+        )
+
+        index = np.flatnonzero(due_in_days)
+        due_offsets[index] = new_intervals[index] * day
+
+        return new_states, new_steps, new_eases, new_intervals, due_offsets
+
+    @overload
+    def review_cards_batch(
+        self,
+        cards: Sequence[Card],
+        ratings: Sequence[Rating],
+        review_datetimes: Sequence[datetime | None] | None = None,
+        review_durations: Sequence[int | None] | None = None,
+    ) -> tuple[list[Card], list[ReviewLog]]: ...
+
+    @overload
+    def review_cards_batch(
+        self,
+        cards: Sequence[FrozenCard],
+        ratings: Sequence[Rating],
+        review_datetimes: Sequence[datetime | None] | None = None,
+        review_durations: Sequence[int | None] | None = None,
+    ) -> tuple[list[FrozenCard], list[FrozenReviewLog]]: ...
+
+    def review_cards_batch(
+        self,
+        cards: Sequence[Card | FrozenCard],
+        ratings: Sequence[Rating],
+        review_datetimes: Sequence[datetime | None] | None = None,
+        review_durations: Sequence[int | None] | None = None,
+    ) -> (
+        tuple[list[Card], list[ReviewLog]]
+        | tuple[list[FrozenCard], list[FrozenReviewLog]]
+    ):
+        """
+        Reviews many cards at once.
+
+        The results are identical to calling review_card on each card in order, including the
+        sequence of random numbers drawn for fuzzing. If the optional numpy dependency is installed,
+        the cards are reviewed together with array operations on their columns, unless the scheduler
+        collects stats, in which case each review is timed on its own. Most of the cost of a batch is
+        creating the new Card and ReviewLog objects, so for the largest collections CardStore.review,
+        which updates columns in place, is much faster.
+
+        Args:
+            cards (Sequence[Card]): The cards being reviewed.
+            ratings (Sequence[Rating]): The chosen rating for each card.
+            review_datetimes (Sequence[datetime | None] | None): The date and time of each review. If unspecified, every review happens at the current time in UTC.
+            review_durations (Sequence[int | None] | None): The number of miliseconds it took to review each card or None if unspecified.
+
+        Returns:
+            tuple: A tuple containing the list of updated, reviewed cards and the list of their corresponding review logs.
+        """
+
+        num_cards = len(cards)
+
+        if review_datetimes is None:
+            review_datetimes = [datetime.now(timezone.utc)] * num_cards
+        if review_durations is None:
+            review_durations = [None] * num_cards
+
+        if not (
+            num_cards == len(ratings) == len(review_datetimes) == len(review_durations)
+        ):
+            raise ValueError(
+                "cards, ratings, review_datetimes and review_durations must have the same length"
+            )
+
+        np = _import_numpy()
+        if np is not None and self.stats is None:
+            reviewed = self._review_cards_columnar(
+                np, cards, ratings, review_datetimes, review_durations
+            )
+            if reviewed is not None:
+                return reviewed
+
+        review_card = self.review_card
+        reviewed_cards: list[Any] = []
+        review_logs: list[Any] = []
+        for card, rating, review_datetime, review_duration in zip(
+            cards, ratings, review_datetimes, review_durations
+        ):
+            reviewed_card, review_log = review_card(
+                card=card,
+                rating=rating,
+                review_datetime=review_datetime,
+                review_duration=review_duration,
+            )
+            reviewed_cards.append(reviewed_card)
+            review_logs.append(review_log)
+
+        return reviewed_cards, review_logs
+
+    @overload
+    def preview_card(
+        self,
+        card: Card,
+        review_datetime: datetime | None = None,
+        fuzz: bool = True,
+    ) -> dict[Rating, Card]: ...
+
+    @overload
+    def preview_card(
+        self,
+        card: FrozenCard,
+        review_datetime: datetime | None = None,
+        fuzz: bool = True,
+    ) -> dict[Rating, FrozenCard]: ...
+
+    def preview_card(
+        self,
+        card: Card | FrozenCard,
+        review_datetime: datetime | None = None,
+        fuzz: bool = True,
+    ) -> dict[Rating, Card] | dict[Rating, FrozenCard]:
+        """
+        Computes what a card would become if it were reviewed with each of the four ratings, e.g. to show the next
+        interval on each answer button.
+
+        No review logs are created, the card is not modified and nothing is counted in the scheduler's stats. With
+        fuzz=True, each rating's interval is fuzzed with a separate random number, so the previewed intervals may
+        differ slightly from those of a later review_card call.
+
+        Args:
+            card (Card | FrozenCard): The card being previewed. A FrozenCard is previewed into FrozenCards.
+            review_datetime (datetime | None): The date and time of the review. If unspecified, the current time in UTC.
+            fuzz (bool): Whether to fuzz the intervals. If False, each interval is the one fuzzing would be centered on.
+
+        Returns:
+            dict: The card after a review with each rating, keyed by rating.
+        """
+
+        if review_datetime is None:
+            review_datetime = datetime.now(timezone.utc)
+
+        card_class = FrozenCard if isinstance(card, FrozenCard) else Card
+        card_id = card.card_id
+        fields = (card.state, card.step, card.ease, card.current_interval, card.due)
+        next_fields = self._next_fields
+        transitions = self._transitions
+
+        previews: dict[Rating, Any] = {}
+        for rating in Rating:
+            state, step, ease, current_interval, due = next_fields(
+                *fields, rating, review_datetime, transitions, _ONE_DAY, fuzz, False
+            )
+            previews[rating] = card_class(
+                card_id=card_id,
+                state=state,
+                step=step,
+                ease=ease,
+                due=due,
+                current_interval=current_interval,
+            )
+
+        return previews
+
+    def preview_cards(
+        self,
+        cards: Iterable[Card | FrozenCard],
+        review_datetime: datetime | None = None,
+        fuzz: bool = True,
+    ) -> list[dict[Rating, Card] | dict[Rating, FrozenCard]]:
+        """
+        Previews many cards at once, e.g. to render a whole review queue, as with preview_card.
+
+        Args:
+            cards (Iterable[Card | FrozenCard]): The cards being previewed.
+            review_datetime (datetime | None): The date and time of the reviews. If unspecified, the current time in UTC.
+            fuzz (bool): Whether to fuzz the intervals.
+
+        Returns:
+            list[dict]: For each card, the card after a review with each rating, keyed by rating.
+        """
+
+        if review_datetime is None:
+            review_datetime = datetime.now(timezone.utc)
+
+        preview_card = self.preview_card
+        return [preview_card(card, review_datetime, fuzz) for card in cards]
+
+    def _get_fuzzed_interval(self, interval: int, record_stats: bool = True) -> int:
         """
         Takes the current calculated interval and adds a small amount of random fuzz to it.
         For example, a card that would've been due in 50 days, after fuzzing, might be due in 49, or 51 days.
 
         Args:
             interval (int): The calculated next interval, before fuzzing.
+            record_stats (bool): Whether to count the fuzzing in self.stats.
 
         Returns:
             int: The new interval, after fuzzing.
@@ -517,54 +1912,60 @@ class Scheduler:
         if interval < 2.5:  # fuzz is not applied to intervals less than 2.5
             return interval
 
-        def _get_fuzz_range(interval: int) -> tuple[int, int]:
-            """
-            Helper function that computes the possible upper and lower bounds of the interval after fuzzing.
-            """
+        if record_stats and self.stats is not None:
+            self.stats.fuzz_applied += 1
 
-            FUZZ_RANGES = [
-                {
-                    "start": 2.5,
-                    "end": 7.0,
-                    "factor": 0.15,
-                },
-                {
-                    "start": 7.0,
-                    "end": 20.0,
-                    "factor": 0.1,
-                },
-                {
-                    "start": 20.0,
-                    "end": math.inf,
-                    "factor": 0.05,
-                },
-            ]
+        min_ivl, max_ivl = self._get_fuzz_range(interval)
 
-            delta = 1.0
-            for fuzz_range in FUZZ_RANGES:
-                delta += fuzz_range["factor"] * max(
-                    min(interval, fuzz_range["end"]) - fuzz_range["start"], 0.0
-                )
+        if self.rng is None:
+            random_value = random.random()
+        else:
+            random_value = self.rng.random()
 
-            min_ivl = int(round(interval - delta))
-            max_ivl = int(round(interval + delta))
+        fuzzed_interval = (
+            random_value * (max_ivl - min_ivl + 1)
+        ) + min_ivl  # the next interval is a random value between min_ivl and max_ivl
 
-            # make sure the min_ivl and max_ivl fall into a valid range
-            min_ivl = max(2, min_ivl)
-            max_ivl = min(max_ivl, self.maximum_interval)
-            min_ivl = min(min_ivl, max_ivl)
+        fuzzed_interval = self._limit_interval(round(fuzzed_interval), record_stats)
 
-            return min_ivl, max_ivl
+        return fuzzed_interval
 
-        min_ivl, max_ivl = _get_fuzz_range(interval)
+    def _limit_interval(self, interval: int, record_stats: bool = True) -> int:
+        """
+        Caps an interval at the maximum interval, counting it in self.stats unless record_stats is False.
+        """
 
-        fuzzed_interval = (
-            random.random() * (max_ivl - min_ivl + 1)
-        ) + min_ivl  # the next interval is a random value between min_ivl and max_ivl
+        if interval > self.maximum_interval:
+            if record_stats and self.stats is not None:
+                self.stats.maximum_interval_clamps += 1
+            return self.maximum_interval
 
-        fuzzed_interval = min(round(fuzzed_interval), self.maximum_interval)
+        return interval
 
-        return fuzzed_interval
+    def _get_fuzz_range(self, interval: int) -> tuple[int, int]:
+        """
+        Computes the possible upper and lower bounds of an interval of at least 2.5 days after fuzzing.
+
+        The interval is fuzzed by 15% of the part between 2.5 and 7 days, 10% of the part between 7 and 20 days
+        and 5% of the part above 20 days, plus one day.
+        """
+
+        # each fuzz range only contributes when the interval reaches into it
+        delta = 1.0 + 0.15 * (min(interval, 7.0) - 2.5)
+        if interval > 7.0:
+            delta += 0.1 * (min(interval, 20.0) - 7.0)
+        if interval > 20.0:
+            delta += 0.05 * (interval - 20.0)
+
+        min_ivl = round(interval - delta)
+        max_ivl = round(interval + delta)
+
+        # make sure the min_ivl and max_ivl fall into a valid range
+        min_ivl = max(2, min_ivl)
+        max_ivl = min(max_ivl, self.maximum_interval)
+        min_ivl = min(min_ivl, max_ivl)
+
+        return min_ivl, max_ivl
 
     def to_dict(self) -> dict[str, Any]:
         return_dict = {
@@ -0,0 +1,230 @@
+"""
+anki_sm_2.archive
+
+This module defines an append-only, on-disk archive of review logs.
+
+Classes:
+    ReviewLogArchive: Append-only file of review logs with fast per-card lookups.
+"""
+
+import mmap
+import os
+import struct
+from array import array
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from .anki_sm_2 import (
+    _BINARY_HEADER,
+    _REVIEW_LOG_RECORD,
+    ReviewLog,
+    _datetime_to_fields,
+    _review_log_from_fields,
+)
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+_ARCHIVE_MAGIC = b"SM2A"
+_ARCHIVE_FORMAT_VERSION = 1
+_ARCHIVE_HEADER = struct.Struct("<4sH")
+
+# fields of a review log record that are read without decoding the whole record
+_CARD_ID_FIELD = struct.Struct("<q")
+_REVIEW_DATETIME_FIELD = struct.Struct("<q")
+_REVIEW_DATETIME_OFFSET = struct.calcsize("<qBidqiiB")
+
+
+class ReviewLogArchive:
+    """
+    Append-only file of review logs with fast per-card lookups.
+
+    Review logs are stored as fixed-width records in the binary format of ReviewLog.dumps_many, and read through a
+    memory map. An in-memory index from card_id to record numbers is built when the archive is opened and kept up
+    to date on every append.
+
+    Each call to append writes its records in a single write followed by an fsync. If the process crashes part way
+    through a write, the incomplete trailing record is discarded the next time the archive is opened.
+
+    Attributes:
+        path (str): The path of the archive file.
+    """
+
+    path: str
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = os.fspath(path)
+
+        # kept open until close, so it can't be opened in a with block
+        self._file = open(self.path, "a+b")  # noqa: SIM115
+        self._mmap: mmap.mmap | None = None
+        self._index: dict[int, array] = {}
+
+        self._file.seek(0, os.SEEK_END)
+        size = self._file.tell()
+
+        if size < _ARCHIVE_HEADER.size:
+            # new archive, or a crash while writing the header
+            self._file.truncate(0)
+            self._file.write(
+                _ARCHIVE_HEADER.pack(_ARCHIVE_MAGIC, _ARCHIVE_FORMAT_VERSION)
+            )
+            self._sync()
+            size = _ARCHIVE_HEADER.size
+
+        self._file.seek(0)
+        magic, version = _ARCHIVE_HEADER.unpack(self._file.read(_ARCHIVE_HEADER.size))
+        if magic != _ARCHIVE_MAGIC:
+            self._file.close()
+            raise ValueError(f"{self.path} is not a review log archive")
+        if version != _ARCHIVE_FORMAT_VERSION:
+            self._file.close()
+            raise ValueError(f"unsupported review log archive version {version}")
+
+        # drop an incomplete record left by a crash during an append
+        num_records, remainder = divmod(
+            size - _ARCHIVE_HEADER.size, _REVIEW_LOG_RECORD.size
+        )
+        if remainder:
+            self._file.truncate(size - remainder)
+            self._sync()
+
+        self._num_records = num_records
+        self._index_records(0, num_records)
+
+    def __len__(self) -> int:
+        return self._num_records
+
+    def __contains__(self, card_id: object) -> bool:
+        return card_id in self._index
+
+    def __iter__(self) -> Iterator[ReviewLog]:
+        for record_number in range(self._num_records):
+            yield self._read_record(record_number)
+
+    def __enter__(self) -> "Self":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def card_ids(self) -> list[int]:
+        """
+        Returns the ids of all cards with at least one review log in the archive.
+        """
+
+        return list(self._index)
+
+    def append(self, review_logs: Iterable[ReviewLog]) -> None:
+        """
+        Appends review logs to the end of the archive and flushes them to disk.
+        """
+
+        self._append_records(
+            memoryview(ReviewLog.dumps_many(review_logs))[_BINARY_HEADER.size :]
+        )
+
+    def history(self, card_id: int) -> list[ReviewLog]:
+        """
+        Returns the review logs of a card in the order they were appended.
+        """
+
+        return [
+            self._read_record(record_number)
+            for record_number in self._index.get(card_id, ())
+        ]
+
+    def iter_range(
+        self, start: datetime | None = None, end: datetime | None = None
+    ) -> Iterator[ReviewLog]:
+        """
+        Iterates over the review logs with a review_datetime in [start, end), in the order they were appended.
+
+        Only the review_datetime field of each record is read until a record matches. The range is taken over the
+        records in the archive when iteration starts, which are read through a memory map of their own, so review logs
+        appended during iteration are not included and don't invalidate the iterator.
+
+        Args:
+            start (datetime | None): The earliest review datetime to include or None for no lower bound.
+            end (datetime | None): The review datetime to stop before or None for no upper bound.
+        """
+
+        start_microseconds = None if start is None else _datetime_to_fields(start)[0]
+        end_microseconds = None if end is None else _datetime_to_fields(end)[0]
+
+        # self._map() is closed and replaced on the next append, so map the current records separately
+        num_records = self._num_records
+        size = _ARCHIVE_HEADER.size + num_records * _REVIEW_LOG_RECORD.size
+        with mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ) as data:
+            for record_number in range(num_records):
+                offset = _ARCHIVE_HEADER.size + record_number * _REVIEW_LOG_RECORD.size
+                (review_microseconds,) = _REVIEW_DATETIME_FIELD.unpack_from(
+                    data, offset + _REVIEW_DATETIME_OFFSET
+                )
+                if (
+                    start_microseconds is not None
+                    and review_microseconds < start_microseconds
+                ):
+                    continue
+                if (
+                    end_microseconds is not None
+                    and review_microseconds >= end_microseconds
+                ):
+                    continue
+
+                yield _review_log_from_fields(
+                    *_REVIEW_LOG_RECORD.unpack_from(data, offset)
+                )
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _append_records(self, records: bytes | bytearray | memoryview) -> None:
+        # appends review log records already packed with _REVIEW_LOG_RECORD
+        num_new_records = len(records) // _REVIEW_LOG_RECORD.size
+        if num_new_records == 0:
+            return
+
+        self._file.write(records)
+        self._sync()
+
+        start = self._num_records
+        self._num_records += num_new_records
+        self._index_records(start, self._num_records)
+
+    def _map(self) -> mmap.mmap:
+        size = _ARCHIVE_HEADER.size + self._num_records * _REVIEW_LOG_RECORD.size
+        if self._mmap is None or len(self._mmap) != size:
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+
+        return self._mmap
+
+    def _read_record(self, record_number: int) -> ReviewLog:
+        offset = _ARCHIVE_HEADER.size + record_number * _REVIEW_LOG_RECORD.size
+        return _review_log_from_fields(
+            *_REVIEW_LOG_RECORD.unpack_from(self._map(), offset)
+        )
+
+    def _index_records(self, start: int, stop: int) -> None:
+        if start == stop:
+            return
+
+        data = self._map()
+        for record_number in range(start, stop):
+            offset = _ARCHIVE_HEADER.size + record_number * _REVIEW_LOG_RECORD.size
+            (card_id,) = _CARD_ID_FIELD.unpack_from(data, offset)
+
+            record_numbers = self._index.get(card_id)
+            if record_numbers is None:
+                record_numbers = self._index[card_id] = array("q")
+            record_numbers.append(record_number)
@@ -0,0 +1,417 @@
+"""
+anki_sm_2.arrow_io
+
+This module defines columnar export and import of cards, review logs and schedulers as Apache Arrow record batches
+and Parquet files. It requires the optional pyarrow dependency, which can be installed with
+pip install "anki-sm-2[arrow]".
+
+The schemas mirror the fields of Card.to_dict, ReviewLog.to_dict and Scheduler.to_dict, with states and ratings
+as int8 and datetimes as UTC timestamps with microsecond precision. Fields that can be None are nullable.
+
+Functions:
+    cards_to_record_batches: Converts cards to Arrow record batches.
+    cards_from_record_batches: Converts Arrow record batches back to cards.
+    review_logs_to_record_batches: Converts review logs to Arrow record batches.
+    review_logs_from_record_batches: Converts Arrow record batches back to review logs.
+    schedulers_to_record_batch: Converts schedulers to an Arrow record batch.
+    schedulers_from_record_batch: Converts an Arrow record batch back to schedulers.
+    write_cards_parquet: Writes cards to a Parquet file.
+    read_cards_parquet: Reads cards from a Parquet file.
+    write_review_logs_parquet: Writes review logs to a Parquet file.
+    read_review_logs_parquet: Reads review logs from a Parquet file.
+    write_schedulers_parquet: Writes schedulers to a Parquet file.
+    read_schedulers_parquet: Reads schedulers from a Parquet file.
+"""
+
+import os
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from typing import Any
+
+from .anki_sm_2 import (
+    Card,
+    FrozenCard,
+    FrozenReviewLog,
+    Rating,
+    ReviewLog,
+    Scheduler,
+    State,
+)
+from .card_store import CardStore
+
+DEFAULT_BATCH_SIZE = 65_536
+
+
+def cards_to_record_batches(
+    cards: Iterable[Card | FrozenCard] | CardStore, batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[Any]:
+    """
+    Converts cards to Arrow record batches of at most batch_size rows, one batch at a time.
+
+    The columns of a CardStore are copied into each batch directly, without creating Card objects.
+
+    Args:
+        cards (Iterable[Card | FrozenCard] | CardStore): The cards to convert.
+        batch_size (int): The maximum number of rows in each record batch.
+
+    Returns:
+        Iterator[pyarrow.RecordBatch]: The record batches.
+    """
+
+    pa = _import_pyarrow()
+    schema = _card_schema(pa)
+
+    if isinstance(cards, CardStore):
+        for start in range(0, len(cards), batch_size):
+            yield _card_store_record_batch(pa, schema, cards, start, start + batch_size)
+        return
+
+    for chunk in _chunks(cards, batch_size):
+        yield pa.RecordBatch.from_arrays(
+            [
+                pa.array(values, field.type)
+                for values, field in zip(_card_columns(chunk), schema)
+            ],
+            schema=schema,
+        )
+
+
+def cards_from_record_batches(batches: Iterable[Any]) -> Iterator[Card]:
+    """
+    Converts Arrow record batches with the schema of cards_to_record_batches back to cards, one batch at a time.
+
+    Cards are returned with their due datetime in UTC.
+    """
+
+    for batch in batches:
+        yield from _cards_from_columns(
+            [batch.column(name).to_pylist() for name in _CARD_FIELDS]
+        )
+
+
+def review_logs_to_record_batches(
+    review_logs: Iterable[ReviewLog | FrozenReviewLog],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[Any]:
+    """
+    Converts review logs to Arrow record batches of at most batch_size rows, one batch at a time.
+
+    The card of each review log is stored in a struct column named card.
+
+    Args:
+        review_logs (Iterable[ReviewLog | FrozenReviewLog]): The review logs to convert.
+        batch_size (int): The maximum number of rows in each record batch.
+
+    Returns:
+        Iterator[pyarrow.RecordBatch]: The record batches.
+    """
+
+    pa = _import_pyarrow()
+    schema = _review_log_schema(pa)
+    card_type = schema.field("card").type
+
+    for chunk in _chunks(review_logs, batch_size):
+        card_array = pa.StructArray.from_arrays(
+            [
+                pa.array(values, field.type)
+                for values, field in zip(
+                    _card_columns([review_log.card for review_log in chunk]), card_type
+                )
+            ],
+            fields=list(card_type),
+        )
+        yield pa.RecordBatch.from_arrays(
+            [
+                card_array,
+                pa.array([int(review_log.rating) for review_log in chunk], pa.int8()),
+                pa.array(
+                    [review_log.review_datetime for review_log in chunk],
+                    schema.field("review_datetime").type,
+                ),
+                pa.array(
+                    [review_log.review_duration for review_log in chunk], pa.int64()
+                ),
+            ],
+            schema=schema,
+        )
+
+
+def review_logs_from_record_batches(batches: Iterable[Any]) -> Iterator[ReviewLog]:
+    """
+    Converts Arrow record batches with the schema of review_logs_to_record_batches back to review logs, one batch at
+    a time.
+
+    Datetimes are returned in UTC.
+    """
+
+    for batch in batches:
+        card_array = batch.column("card")
+        cards = _cards_from_columns(
+            [card_array.field(name).to_pylist() for name in _CARD_FIELDS]
+        )
+
+        for card, rating, review_datetime, review_duration in zip(
+            cards,
+            batch.column("rating").to_pylist(),
+            batch.column("review_datetime").to_pylist(),
+            batch.column("review_duration").to_pylist(),
+        ):
+            yield ReviewLog(
+                card=card,
+                rating=Rating(rating),
+                review_datetime=review_datetime,
+                review_duration=review_duration,
+            )
+
+
+def schedulers_to_record_batch(schedulers: Iterable[Scheduler]) -> Any:
+    """
+    Converts the configurations of schedulers to an Arrow record batch with one row per scheduler.
+
+    Learning and relearning steps are stored as lists of seconds, as in Scheduler.to_dict.
+    """
+
+    pa = _import_pyarrow()
+    schema = _scheduler_schema(pa)
+
+    scheduler_dicts = [scheduler.to_dict() for scheduler in schedulers]
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(
+                [scheduler_dict[field.name] for scheduler_dict in scheduler_dicts],
+                field.type,
+            )
+            for field in schema
+        ],
+        schema=schema,
+    )
+
+
+def schedulers_from_record_batch(batch: Any) -> list[Scheduler]:
+    """
+    Converts an Arrow record batch or table with the schema of schedulers_to_record_batch back to schedulers.
+    """
+
+    return [Scheduler.from_dict(scheduler_dict) for scheduler_dict in batch.to_pylist()]
+
+
+def write_cards_parquet(
+    path: str | os.PathLike[str],
+    cards: Iterable[Card | FrozenCard] | CardStore,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> None:
+    """
+    Writes cards to a Parquet file, converting and writing batch_size cards at a time.
+    """
+
+    pa = _import_pyarrow()
+    _write_parquet(path, _card_schema(pa), cards_to_record_batches(cards, batch_size))
+
+
+def read_cards_parquet(
+    path: str | os.PathLike[str], batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[Card]:
+    """
+    Reads cards from a Parquet file written by write_cards_parquet, reading batch_size rows at a time.
+    """
+
+    return cards_from_record_batches(_read_parquet(path, batch_size))
+
+
+def write_review_logs_parquet(
+    path: str | os.PathLike[str],
+    review_logs: Iterable[ReviewLog | FrozenReviewLog],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> None:
+    """
+    Writes review logs to a Parquet file, converting and writing batch_size review logs at a time.
+    """
+
+    pa = _import_pyarrow()
+    _write_parquet(
+        path,
+        _review_log_schema(pa),
+        review_logs_to_record_batches(review_logs, batch_size),
+    )
+
+
+def read_review_logs_parquet(
+    path: str | os.PathLike[str], batch_size: int = DEFAULT_BATCH_SIZE
+) -> Iterator[ReviewLog]:
+    """
+    Reads review logs from a Parquet file written by write_review_logs_parquet, reading batch_size rows at a time.
+    """
+
+    return review_logs_from_record_batches(_read_parquet(path, batch_size))
+
+
+def write_schedulers_parquet(
+    path: str | os.PathLike[str], schedulers: Iterable[Scheduler]
+) -> None:
+    """
+    Writes the configurations of schedulers to a Parquet file.
+    """
+
+    pa = _import_pyarrow()
+    _write_parquet(
+        path, _scheduler_schema(pa), [schedulers_to_record_batch(schedulers)]
+    )
+
+
+def read_schedulers_parquet(path: str | os.PathLike[str]) -> list[Scheduler]:
+    """
+    Reads schedulers from a Parquet file written by write_schedulers_parquet.
+    """
+
+    return [
+        scheduler
+        for batch in _read_parquet(path, DEFAULT_BATCH_SIZE)
+        for scheduler in schedulers_from_record_batch(batch)
+    ]
+
+
+_CARD_FIELDS = ("card_id", "state", "step", "ease", "due", "current_interval")
+
+
+def _import_pyarrow() -> Any:
+    try:
+        import pyarrow
+    except ImportError as error:
+        raise ImportError(
+            'Arrow and Parquet support requires pyarrow, install it with pip install "anki-sm-2[arrow]"'
+        ) from error
+
+    return pyarrow
+
+
+def _card_schema(pa: Any) -> Any:
+    return pa.schema(
+        [
+            pa.field("card_id", pa.int64(), nullable=False),
+            pa.field("state", pa.int8(), nullable=False),
+            pa.field("step", pa.int32()),
+            pa.field("ease", pa.float64()),
+            pa.field("due", pa.timestamp("us", tz="UTC"), nullable=False),
+            pa.field("current_interval", pa.int32()),
+        ]
+    )
+
+
+def _review_log_schema(pa: Any) -> Any:
+    return pa.schema(
+        [
+            pa.field("card", pa.struct(list(_card_schema(pa))), nullable=False),
+            pa.field("rating", pa.int8(), nullable=False),
+            pa.field("review_datetime", pa.timestamp("us", tz="UTC"), nullable=False),
+            pa.field("review_duration", pa.int64()),
+        ]
+    )
+
+
+def _scheduler_schema(pa: Any) -> Any:
+    return pa.schema(
+        [
+            pa.field("learning_steps", pa.list_(pa.int64()), nullable=False),
+            pa.field("graduating_interval", pa.int64(), nullable=False),
+            pa.field("easy_interval", pa.int64(), nullable=False),
+            pa.field("relearning_steps", pa.list_(pa.int64()), nullable=False),
+            pa.field("minimum_interval", pa.int64(), nullable=False),
+            pa.field("maximum_interval", pa.int64(), nullable=False),
+            pa.field("starting_ease", pa.float64(), nullable=False),
+            pa.field("easy_bonus", pa.float64(), nullable=False),
+            pa.field("interval_modifier", pa.float64(), nullable=False),
+            pa.field("hard_interval", pa.float64(), nullable=False),
+            pa.field("new_interval", pa.float64(), nullable=False),
+        ]
+    )
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _card_columns(cards: list[Card | FrozenCard]) -> list[list[Any]]:
+    return [
+        [card.card_id for card in cards],
+        [int(card.state) for card in cards],
+        [card.step for card in cards],
+        [card.ease for card in cards],
+        [card.due for card in cards],
+        [card.current_interval for card in cards],
+    ]
+
+
+def _cards_from_columns(columns: list[list[Any]]) -> list[Card]:
+    return [
+        Card(
+            card_id=card_id,
+            state=State(state),
+            step=step,
+            ease=ease,
+            due=due,
+            current_interval=current_interval,
+        )
+        for card_id, state, step, ease, due, current_interval in zip(*columns)
+    ]
+
+
+def _card_store_record_batch(
+    pa: Any, schema: Any, card_store: CardStore, start: int, stop: int
+) -> Any:
+    # each column slice is copied into an arrow buffer with a single memcpy, then the sentinel values CardStore uses
+    # for missing fields are replaced by nulls
+    import pyarrow.compute as pc
+
+    def column(values: Any, arrow_type: Any) -> Any:
+        values = values[start:stop]
+        return pa.Array.from_buffers(
+            arrow_type, len(values), [None, pa.py_buffer(values)]
+        )
+
+    steps = column(card_store.steps, pa.int32())
+    eases = column(card_store.eases, pa.float64())
+    dues = column(card_store.dues, pa.float64())
+    current_intervals = column(card_store.current_intervals, pa.int32())
+
+    due_microseconds = pc.cast(
+        pc.round(pc.multiply(dues, 1_000_000)), pa.int64(), safe=False
+    )
+
+    return pa.RecordBatch.from_arrays(
+        [
+            column(card_store.card_ids, pa.int64()),
+            column(card_store.states, pa.int8()),
+            pc.if_else(pc.equal(steps, -1), pa.scalar(None, pa.int32()), steps),
+            pc.if_else(pc.is_nan(eases), pa.scalar(None, pa.float64()), eases),
+            due_microseconds.cast(pa.timestamp("us", tz="UTC")),
+            pc.if_else(
+                pc.equal(current_intervals, -1),
+                pa.scalar(None, pa.int32()),
+                current_intervals,
+            ),
+        ],
+        schema=schema,
+    )
+
+
+def _write_parquet(
+    path: str | os.PathLike[str], schema: Any, batches: Iterable[Any]
+) -> None:
+    import pyarrow.parquet as pq
+
+    with pq.ParquetWriter(os.fspath(path), schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+
+
+def _read_parquet(path: str | os.PathLike[str], batch_size: int) -> Iterator[Any]:
+    _import_pyarrow()
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(os.fspath(path))
+    try:
+        yield from parquet_file.iter_batches(batch_size=batch_size)
+    finally:
+        parquet_file.close()
@@ -0,0 +1,259 @@
+"""
+anki_sm_2.async_scheduler
+
+This module defines an asyncio-friendly wrapper around the Scheduler.
+
+Classes:
+    AsyncScheduler: Reviews cards from async code by collecting concurrent reviews into batches that run off the event loop.
+"""
+
+import asyncio
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import Executor
+from contextlib import AbstractContextManager, nullcontext
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any
+
+from .anki_sm_2 import Card, Rating, ReviewLog, Scheduler
+
+# the exceptions the scheduler raises for an invalid card, rating or review datetime, e.g. AssertionError for a card
+# missing the fields of its state. these fail only the reviews that raised them
+_REVIEW_ERRORS = (AssertionError, AttributeError, KeyError, TypeError, ValueError)
+
+
+class AsyncScheduler:
+    """
+    Reviews cards from async code by collecting concurrent reviews into batches that run off the event loop.
+
+    Reviews requested within batch_window seconds of each other, up to max_batch_size of them, are run together
+    with Scheduler.review_cards_batch in an executor, and each caller's awaitable is resolved with its own result.
+    If reviewing the batch raises an exception, its cards are reviewed again one at a time, so only the reviews that
+    fail raise. If a batch is cancelled, e.g. because the event loop is shutting down, its reviews are cancelled too.
+
+    Batches can run in several executor threads at once. SchedulerStats updates are not synchronized, so if the
+    scheduler has stats, its batches are run one at a time.
+
+    Attributes:
+        scheduler (Scheduler): The scheduler used to review cards.
+        batch_window (float): The maximum number of seconds a review waits for other reviews to join its batch.
+        max_batch_size (int): The maximum number of reviews in a batch. A full batch is run immediately.
+        executor (Executor | None): The executor batches are run in or None for the event loop's default executor.
+    """
+
+    scheduler: Scheduler
+    batch_window: float
+    max_batch_size: int
+    executor: Executor | None
+
+    def __init__(
+        self,
+        scheduler: Scheduler,
+        batch_window: float = 0.002,
+        max_batch_size: int = 256,
+        executor: Executor | None = None,
+    ) -> None:
+        self.scheduler = scheduler
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.executor = executor
+
+        self._pending: list[
+            tuple[Card, Rating, datetime, int | None, asyncio.Future, float]
+        ] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._batch_tasks: set[asyncio.Task] = set()
+        self._stats_lock = threading.Lock()
+
+        self._num_requests = 0
+        self._num_batches = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+
+    async def review_card(
+        self,
+        card: Card,
+        rating: Rating,
+        review_datetime: datetime | None = None,
+        review_duration: int | None = None,
+    ) -> tuple[Card, ReviewLog]:
+        """
+        Reviews a card, as with Scheduler.review_card.
+
+        If unspecified, the review datetime is the time this method is called, not the time the batch runs.
+        """
+
+        loop = asyncio.get_running_loop()
+
+        if review_datetime is None:
+            review_datetime = datetime.now(timezone.utc)
+
+        future = loop.create_future()
+        self._pending.append(
+            (
+                card,
+                rating,
+                review_datetime,
+                review_duration,
+                future,
+                time.perf_counter(),
+            )
+        )
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+
+        return await future
+
+    async def flush(self) -> None:
+        """
+        Runs any waiting reviews immediately and waits for every running batch to finish.
+        """
+
+        self._flush()
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks)
+
+    def metrics(self) -> dict[str, float | int]:
+        """
+        Returns the number of reviews and batches run so far, the mean batch size and the mean and maximum latency
+        in seconds between a review being requested and its result being ready.
+        """
+
+        return {
+            "requests": self._num_requests,
+            "batches": self._num_batches,
+            "mean_batch_size": (
+                self._num_requests / self._num_batches if self._num_batches else 0.0
+            ),
+            "mean_latency": (
+                self._total_latency / self._num_requests if self._num_requests else 0.0
+            ),
+            "max_latency": self._max_latency,
+        }
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if not self._pending:
+            return
+
+        batch = self._pending
+        self._pending = []
+
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+        # a task cancelled before it starts never runs _run_batch, so no caller is left waiting on it this way
+        task.add_done_callback(
+            partial(_cancel_futures, [request[4] for request in batch])
+        )
+
+    async def _run_batch(
+        self,
+        batch: list[tuple[Card, Rating, datetime, int | None, asyncio.Future, float]],
+    ) -> None:
+        cards, ratings, review_datetimes, review_durations, futures, request_times = (
+            zip(*batch)
+        )
+
+        loop = asyncio.get_running_loop()
+        try:
+            try:
+                reviewed_cards, review_logs = await loop.run_in_executor(
+                    self.executor,
+                    self._review_batch,
+                    cards,
+                    ratings,
+                    review_datetimes,
+                    review_durations,
+                )
+                results: list[Any] = list(zip(reviewed_cards, review_logs))
+            except _REVIEW_ERRORS:
+                # review each card on its own, so one bad review doesn't fail the others
+                results = await loop.run_in_executor(
+                    self.executor,
+                    self._review_each,
+                    cards,
+                    ratings,
+                    review_datetimes,
+                    review_durations,
+                )
+        except Exception as exception:
+            # not a bad review, e.g. the executor has been shut down, so every caller gets the error
+            for future in futures:
+                if not future.done():
+                    future.set_exception(exception)
+            raise
+
+        finished = time.perf_counter()
+        self._num_batches += 1
+        self._num_requests += len(batch)
+        for request_time in request_times:
+            latency = finished - request_time
+            self._total_latency += latency
+            self._max_latency = max(self._max_latency, latency)
+
+        for future, result in zip(futures, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _review_batch(
+        self,
+        cards: Sequence[Card],
+        ratings: Sequence[Rating],
+        review_datetimes: Sequence[datetime],
+        review_durations: Sequence[int | None],
+    ) -> tuple[list[Card], list[ReviewLog]]:
+        with self._stats_guard():
+            return self.scheduler.review_cards_batch(
+                cards, ratings, review_datetimes, review_durations
+            )
+
+    def _review_each(
+        self,
+        cards: Sequence[Card],
+        ratings: Sequence[Rating],
+        review_datetimes: Sequence[datetime],
+        review_durations: Sequence[int | None],
+    ) -> list[Any]:
+        # each card's result or the exception reviewing it raised
+        results: list[Any] = []
+        with self._stats_guard():
+            for card, rating, review_datetime, review_duration in zip(
+                cards, ratings, review_datetimes, review_durations
+            ):
+                try:
+                    results.append(
+                        self.scheduler.review_card(
+                            card=card,
+                            rating=rating,
+                            review_datetime=review_datetime,
+                            review_duration=review_duration,
+                        )
+                    )
+                except _REVIEW_ERRORS as exception:
+                    results.append(exception)
+
+        return results
+
+    def _stats_guard(self) -> AbstractContextManager[Any]:
+        # batches running in other executor threads would update the same SchedulerStats
+        if self.scheduler.stats is None:
+            return nullcontext()
+        return self._stats_lock
+
+
+def _cancel_futures(futures: list[asyncio.Future], task: asyncio.Task) -> None:
+    for future in futures:
+        future.cancel()
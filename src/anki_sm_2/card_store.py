@@ -0,0 +1,362 @@
+"""
+anki_sm_2.card_store
+
+This module defines a compact, column-oriented container for large collections of cards.
+
+Classes:
+    CardStore: Stores the fields of many Card objects in typed arrays.
+"""
+
+import math
+import time
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import datetime, timezone
+from typing import Any
+
+from .anki_sm_2 import (
+    _RATING_VALUES,
+    _SECONDS_PER_DAY,
+    Card,
+    Rating,
+    Scheduler,
+    State,
+    _import_numpy,
+)
+
+
+class CardStore:
+    """
+    Stores the fields of many Card objects in typed arrays instead of one python object per card.
+
+    Card objects are only created when a card is looked up or iterated over. Cards are materialized with
+    their due datetime in UTC.
+
+    Attributes:
+        card_ids (array): The id of each card.
+        states (array): The integer value of each card's State.
+        steps (array): Each card's step, or -1 if the card has no step.
+        eases (array): Each card's ease factor, or nan if the card has no ease factor.
+        dues (array): When each card is due, in seconds since the unix epoch.
+        current_intervals (array): Each card's current interval in days, or -1 if the card has no interval.
+    """
+
+    card_ids: array
+    states: array
+    steps: array
+    eases: array
+    dues: array
+    current_intervals: array
+
+    def __init__(self, cards: Iterable[Card] = ()) -> None:
+        self.card_ids = array("q")
+        self.states = array("b")
+        self.steps = array("i")
+        self.eases = array("d")
+        self.dues = array("d")
+        self.current_intervals = array("i")
+        self._positions: dict[int, int] = {}
+
+        for card in cards:
+            self.add(card)
+
+    def __len__(self) -> int:
+        return len(self.card_ids)
+
+    def __contains__(self, card_id: object) -> bool:
+        return card_id in self._positions
+
+    def __getitem__(self, card_id: int) -> Card:
+        return self._card_at(self._positions[card_id])
+
+    def __iter__(self) -> Iterator[Card]:
+        for position in range(len(self.card_ids)):
+            yield self._card_at(position)
+
+    def position(self, card_id: int) -> int:
+        """
+        Returns the index of a card's row in the column arrays.
+
+        Raises:
+            KeyError: If no card with the given id is stored.
+        """
+
+        return self._positions[card_id]
+
+    def add(self, card: Card) -> None:
+        """
+        Stores a card, replacing any previously stored card with the same card_id.
+        """
+
+        self._append_or_replace(
+            card.card_id,
+            int(card.state),
+            card.step,
+            card.ease,
+            card.due.timestamp(),
+            card.current_interval,
+        )
+
+    def remove(self, card_id: int) -> None:
+        """
+        Removes a card from the store by moving the last row into its place.
+
+        Raises:
+            KeyError: If no card with the given id is stored.
+        """
+
+        position = self._positions.pop(card_id)
+        last = len(self.card_ids) - 1
+
+        if position != last:
+            for column in self._columns():
+                column[position] = column[last]
+            self._positions[self.card_ids[position]] = position
+
+        for column in self._columns():
+            column.pop()
+
+    def review(
+        self,
+        scheduler: Scheduler,
+        card_ids: Sequence[int],
+        ratings: Sequence[Rating],
+        review_times: Sequence[int | float] | None = None,
+    ) -> None:
+        """
+        Reviews many stored cards at once, updating their rows in place without creating Card or datetime objects.
+
+        The results are the same as calling review_card on each card in order, including the sequence of random
+        numbers drawn for fuzzing. No review logs are created. If the optional numpy dependency is installed, the rows
+        are reviewed together with array operations on the columns. Otherwise, or if a card is reviewed more than once
+        in the batch or the scheduler collects stats, each card is reviewed with Scheduler.review_epoch.
+
+        Args:
+            scheduler (Scheduler): The scheduler used to review the cards.
+            card_ids (Sequence[int]): The ids of the cards being reviewed.
+            ratings (Sequence[Rating]): The chosen rating for each card.
+            review_times (Sequence[int | float] | None): When each card was reviewed, in seconds since the unix epoch. If unspecified, every review happens at the current time rounded down to a whole second.
+
+        Raises:
+            KeyError: If no card with one of the given ids is stored.
+        """
+
+        if review_times is None:
+            review_times = [int(time.time())] * len(card_ids)
+
+        if not (len(card_ids) == len(ratings) == len(review_times)):
+            raise ValueError(
+                "card_ids, ratings and review_times must have the same length"
+            )
+
+        np = _import_numpy()
+        if (
+            np is not None
+            and scheduler.stats is None
+            and self._review_columnar(np, scheduler, card_ids, ratings, review_times)
+        ):
+            return
+
+        review_epoch = scheduler.review_epoch
+        positions = self._positions
+        states = self.states
+        steps = self.steps
+        eases = self.eases
+        dues = self.dues
+        current_intervals = self.current_intervals
+
+        for card_id, rating, review_time in zip(card_ids, ratings, review_times):
+            position = positions[card_id]
+            step = steps[position]
+            ease = eases[position]
+            current_interval = current_intervals[position]
+
+            state, step, ease, current_interval, due = review_epoch(
+                states[position],
+                None if step < 0 else step,
+                None if math.isnan(ease) else ease,
+                None if current_interval < 0 else current_interval,
+                dues[position],
+                rating,
+                review_time,
+            )
+
+            states[position] = state
+            steps[position] = -1 if step is None else step
+            eases[position] = math.nan if ease is None else ease
+            dues[position] = due
+            current_intervals[position] = (
+                -1 if current_interval is None else current_interval
+            )
+
+    def _review_columnar(
+        self,
+        np: Any,
+        scheduler: Scheduler,
+        card_ids: Sequence[int],
+        ratings: Sequence[Rating],
+        review_times: Sequence[int | float],
+    ) -> bool:
+        """
+        Reviews cards with Scheduler._review_columns, reading and writing the rows through numpy views of the columns.
+
+        Returns False without changing any rows if a card id is missing or repeated, or a row or rating would make
+        review_epoch raise, so that the caller can fall back to review_epoch.
+        """
+
+        num_reviews = len(card_ids)
+        if num_reviews == 0:
+            return True
+        if len(set(card_ids)) != num_reviews or not set(ratings) <= _RATING_VALUES:
+            return False
+
+        try:
+            positions = np.fromiter(
+                map(self._positions.__getitem__, card_ids),
+                dtype=np.int64,
+                count=num_reviews,
+            )
+        except KeyError:
+            return False
+
+        states_column, steps_column, eases_column, dues_column, intervals_column = (
+            np.frombuffer(column, dtype=column.typecode)
+            for column in (
+                self.states,
+                self.steps,
+                self.eases,
+                self.dues,
+                self.current_intervals,
+            )
+        )
+
+        states = states_column[positions].astype(np.int64)
+        steps = steps_column[positions].astype(np.int64)
+        eases = eases_column[positions]
+        intervals = intervals_column[positions].astype(np.int64)
+
+        # the same checks as the assertions in Scheduler._next_fields
+        if (
+            (states < State.Learning)
+            | (states > State.Relearning)
+            | (steps < 0) & (states != State.Review)
+            | (np.isnan(eases) | (intervals < 0)) & (states != State.Learning)
+        ).any():
+            return False
+
+        review_times = np.array(review_times, dtype=np.float64)
+        new_states, new_steps, new_eases, new_intervals, due_offsets = (
+            scheduler._review_columns(
+                np,
+                states,
+                steps,
+                eases,
+                intervals,
+                review_times - dues_column[positions],
+                np.array(ratings, dtype=np.int64),
+                scheduler._epoch_transitions,
+                _SECONDS_PER_DAY,
+            )
+        )
+
+        states_column[positions] = new_states
+        steps_column[positions] = new_steps
+        eases_column[positions] = new_eases
+        dues_column[positions] = review_times + due_offsets
+        intervals_column[positions] = new_intervals
+
+        return True
+
+    def to_dicts(self) -> list[dict[str, int | float | str | None]]:
+        """
+        Returns every stored card in the same format as Card.to_dict, without creating Card objects.
+        """
+
+        return [
+            {
+                "card_id": card_id,
+                "state": state,
+                "step": None if step < 0 else step,
+                "ease": None if math.isnan(ease) else ease,
+                "due": datetime.fromtimestamp(due, timezone.utc).isoformat(),
+                "current_interval": None if current_interval < 0 else current_interval,
+            }
+            for card_id, state, step, ease, due, current_interval in zip(
+                self.card_ids,
+                self.states,
+                self.steps,
+                self.eases,
+                self.dues,
+                self.current_intervals,
+            )
+        ]
+
+    @staticmethod
+    def from_dicts(source_dicts: Iterable[dict[str, Any]]) -> "CardStore":
+        """
+        Builds a store from dicts in the format returned by Card.to_dict, without creating Card objects.
+        """
+
+        card_store = CardStore()
+        for source_dict in source_dicts:
+            card_store._append_or_replace(
+                int(source_dict["card_id"]),
+                int(source_dict["state"]),
+                source_dict["step"],
+                source_dict["ease"],
+                datetime.fromisoformat(source_dict["due"]).timestamp(),
+                source_dict["current_interval"],
+            )
+
+        return card_store
+
+    def _columns(self) -> tuple[array, ...]:
+        return (
+            self.card_ids,
+            self.states,
+            self.steps,
+            self.eases,
+            self.dues,
+            self.current_intervals,
+        )
+
+    def _append_or_replace(
+        self,
+        card_id: int,
+        state: int,
+        step: int | None,
+        ease: float | None,
+        due: float,
+        current_interval: int | None,
+    ) -> None:
+        row = (
+            card_id,
+            state,
+            -1 if step is None else step,
+            math.nan if ease is None else ease,
+            due,
+            -1 if current_interval is None else current_interval,
+        )
+
+        position = self._positions.get(card_id)
+        if position is None:
+            self._positions[card_id] = len(self.card_ids)
+            for column, value in zip(self._columns(), row):
+                column.append(value)
+        else:
+            for column, value in zip(self._columns(), row):
+                column[position] = value
+
+    def _card_at(self, position: int) -> Card:
+        step = self.steps[position]
+        ease = self.eases[position]
+        current_interval = self.current_intervals[position]
+
+        return Card(
+            card_id=self.card_ids[position],
+            state=State(self.states[position]),
+            step=None if step < 0 else step,
+            ease=None if math.isnan(ease) else ease,
+            due=datetime.fromtimestamp(self.dues[position], timezone.utc),
+            current_interval=None if current_interval < 0 else current_interval,
+        )
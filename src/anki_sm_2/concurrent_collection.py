@@ -0,0 +1,196 @@
+"""
+anki_sm_2.concurrent_collection
+
+This module defines an in-memory collection of cards that many threads can review at once.
+
+Classes:
+    ConcurrentCollection: Thread-safe collection of versioned cards reviewed with a shared scheduler configuration.
+"""
+
+import random
+import threading
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from itertools import count
+
+from .anki_sm_2 import Card, FrozenCard, FrozenReviewLog, Rating, ReviewLog, Scheduler
+
+
+class _ThreadLocalRandom(threading.local):
+    """
+    A random number generator with a separate random.Random for each thread, usable as a Scheduler's rng.
+    """
+
+    def __init__(
+        self, seed: int | None, thread_numbers: Iterator[int], lock: threading.Lock
+    ) -> None:
+        # called once in each thread that uses the generator
+        if seed is None:
+            self._random = random.Random()
+        else:
+            # next() on a shared iterator isn't atomic without the GIL, so two threads could get the same number
+            with lock:
+                thread_number = next(thread_numbers)
+            self._random = random.Random(f"{seed}:{thread_number}")
+
+    def random(self) -> float:
+        return self._random.random()
+
+
+class ConcurrentCollection:
+    """
+    Thread-safe collection of versioned cards reviewed with a shared scheduler configuration.
+
+    Every stored card has a version, which is replaced by a higher one each time the card is stored. Updates are
+    compare-and-swap: a new card is only stored if the card's version is still the one it was computed from. Each
+    card_id maps to one of a fixed number of stripes, each with its own lock and version counter. The locks are only
+    held to compare and store, so threads reviewing different cards rarely wait for each other and the scheduling
+    itself runs without any lock held. Versions are drawn from the stripe's counter, which never goes backwards, so a
+    card that is removed and stored again never reuses a version it had before.
+
+    The collection reviews cards with its own copy of the scheduler, whose rng gives each thread its own
+    random.Random, so threads do not share the global random state.
+
+    Attributes:
+        scheduler (Scheduler): The collection's copy of the scheduler, with a per-thread rng.
+    """
+
+    scheduler: Scheduler
+
+    def __init__(
+        self,
+        scheduler: Scheduler,
+        cards: Iterable[Card | FrozenCard] = (),
+        stripes: int = 64,
+        seed: int | None = None,
+    ) -> None:
+        """
+        Args:
+            scheduler (Scheduler): The scheduler whose configuration is used to review cards. It is not modified.
+            cards (Iterable[Card | FrozenCard]): The cards to start with.
+            stripes (int): The number of locks card_ids are spread over.
+            seed (int | None): The seed from which each thread's random number generator is derived, in the order the
+                               threads first review a card, or None to seed them from the operating system.
+        """
+
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+
+        self.scheduler = Scheduler.from_dict(scheduler.to_dict())
+        self.scheduler.rng = _ThreadLocalRandom(seed, count(), threading.Lock())
+
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        # the last version handed out in each stripe
+        self._versions = [0] * stripes
+        # card_id -> (version, card). each entry is replaced as a whole, so readers never see a torn update
+        self._entries: dict[int, tuple[int, Card | FrozenCard]] = {}
+
+        for card in cards:
+            self.put(card)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, card_id: object) -> bool:
+        return card_id in self._entries
+
+    def get(self, card_id: int) -> tuple[Card | FrozenCard, int]:
+        """
+        Returns a card and its current version, without taking a lock.
+
+        Raises:
+            KeyError: If no card with the given id is stored.
+        """
+
+        version, card = self._entries[card_id]
+        return card, version
+
+    def put(self, card: Card | FrozenCard) -> int:
+        """
+        Stores a card unconditionally, replacing any stored card with the same card_id.
+
+        Returns:
+            int: The card's new version.
+        """
+
+        stripe = self._stripe(card.card_id)
+        with self._locks[stripe]:
+            version = self._versions[stripe] + 1
+            self._versions[stripe] = version
+            self._entries[card.card_id] = (version, card)
+
+        return version
+
+    def compare_and_swap(
+        self, card: Card | FrozenCard, expected_version: int
+    ) -> int | None:
+        """
+        Stores a card only if the stored card with the same card_id is still at the expected version.
+
+        Returns:
+            int | None: The card's new version or None if the card has changed since the expected version.
+
+        Raises:
+            KeyError: If no card with the given id is stored.
+        """
+
+        stripe = self._stripe(card.card_id)
+        with self._locks[stripe]:
+            version, _ = self._entries[card.card_id]
+            if version != expected_version:
+                return None
+
+            version = self._versions[stripe] + 1
+            self._versions[stripe] = version
+            self._entries[card.card_id] = (version, card)
+
+        return version
+
+    def review(
+        self,
+        card_id: int,
+        rating: Rating,
+        review_datetime: datetime | None = None,
+        review_duration: int | None = None,
+    ) -> tuple[Card, ReviewLog] | tuple[FrozenCard, FrozenReviewLog]:
+        """
+        Reviews a stored card, as with Scheduler.review_card, and stores the result.
+
+        The card is reviewed without holding a lock and stored with compare_and_swap. If another thread replaced the
+        card in the meantime, the review is retried on the newer card, so concurrent reviews of the same card are
+        applied one after the other and none are lost.
+
+        Returns:
+            tuple: The reviewed card, as stored, and its review log.
+
+        Raises:
+            KeyError: If no card with the given id is stored.
+        """
+
+        review_card = self.scheduler.review_card
+        while True:
+            card, version = self.get(card_id)
+            reviewed = review_card(card, rating, review_datetime, review_duration)
+            if self.compare_and_swap(reviewed[0], version) is not None:
+                return reviewed
+
+    def remove(self, card_id: int) -> None:
+        """
+        Removes a card from the collection.
+
+        Raises:
+            KeyError: If no card with the given id is stored.
+        """
+
+        with self._locks[self._stripe(card_id)]:
+            del self._entries[card_id]
+
+    def cards(self) -> list[Card | FrozenCard]:
+        """
+        Returns a snapshot of every stored card.
+        """
+
+        return [card for _, card in list(self._entries.values())]
+
+    def _stripe(self, card_id: int) -> int:
+        return hash(card_id) % len(self._locks)
@@ -0,0 +1,196 @@
+"""
+anki_sm_2.due_forecast
+
+This module defines a cache of how many cards fall due on each day.
+
+Classes:
+    DueForecast: Per-day counts of due cards that are updated incrementally as cards are reviewed.
+"""
+
+import datetime as dt
+from collections.abc import Iterable
+from datetime import date, datetime, timezone
+from typing import Any
+
+from .anki_sm_2 import Card, FrozenCard
+
+
+class DueForecast:
+    """
+    Per-day counts of due cards that are updated incrementally as cards are reviewed.
+
+    Cards are counted under the date of their Card.due in tzinfo. Adding, removing and updating a card are O(1), so
+    the forecast can be kept up to date by calling update with the card passed to Scheduler.review_card and the card
+    it returned.
+
+    Cards due before the current day are folded into a single overdue count the first time the forecast is queried
+    on a later day, so a day rollover costs one step per day elapsed rather than a rescan of the cards. Once rolled
+    forward, the forecast cannot be queried for an earlier day.
+
+    Attributes:
+        tzinfo (tzinfo): The timezone whose dates the days are counted in.
+    """
+
+    tzinfo: dt.tzinfo
+
+    def __init__(
+        self,
+        cards: Iterable[Card | FrozenCard] = (),
+        tzinfo: dt.tzinfo = timezone.utc,
+    ) -> None:
+        self.tzinfo = tzinfo
+
+        # date ordinal -> number of cards due on that date, for dates on or after self._today
+        self._counts: dict[int, int] = {}
+        # number of cards due before self._today
+        self._num_overdue = 0
+        # ordinal of the latest day the forecast has been rolled forward to, or None if never queried
+        self._today: int | None = None
+        self._num_cards = 0
+
+        for card in cards:
+            self.add(card)
+
+    def __len__(self) -> int:
+        return self._num_cards
+
+    def add(self, card: Card | FrozenCard) -> None:
+        """
+        Counts a card under the day it is due.
+        """
+
+        self._change(self._day(card.due), 1)
+        self._num_cards += 1
+
+    def remove(self, card: Card | FrozenCard) -> None:
+        """
+        Stops counting a card. The card must be as it was when it was added.
+
+        Raises:
+            ValueError: If no card is counted under the day the card is due.
+        """
+
+        self._change(self._day(card.due), -1)
+        self._num_cards -= 1
+
+    def update(self, old_card: Card | FrozenCard, new_card: Card | FrozenCard) -> None:
+        """
+        Moves a card from the day it used to be due to the day it is due now, e.g. after a review.
+
+        Raises:
+            ValueError: If no card is counted under the day old_card is due.
+        """
+
+        old_day = self._day(old_card.due)
+        new_day = self._day(new_card.due)
+        if old_day != new_day:
+            self._change(old_day, -1)
+            self._change(new_day, 1)
+
+    def forecast(self, days: int, now: datetime | None = None) -> list[int]:
+        """
+        Returns the number of cards due on each of the next days, starting with today.
+
+        Args:
+            days (int): The number of days to return counts for.
+            now (datetime | None): The current time, which determines today. If unspecified, the current time in UTC.
+
+        Returns:
+            list[int]: The number of cards due on each day, where today's count includes every overdue card.
+
+        Raises:
+            ValueError: If now is on an earlier day than a previous query.
+        """
+
+        today = self._roll_forward(now)
+
+        counts = [self._counts.get(today + offset, 0) for offset in range(days)]
+        if counts:
+            counts[0] += self._num_overdue
+
+        return counts
+
+    def count_due(self, days: int = 1, now: datetime | None = None) -> int:
+        """
+        Returns the number of cards that are overdue or due within the next days, starting with today.
+
+        For example, count_due(1) is the number of cards due by the end of today and count_due(7) by the end of the
+        sixth day after today.
+
+        Raises:
+            ValueError: If now is on an earlier day than a previous query.
+        """
+
+        return sum(self.forecast(days, now))
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Returns the forecast's counts as a JSON-serializable dict, which can be passed to restore.
+        """
+
+        return {
+            "today": None
+            if self._today is None
+            else date.fromordinal(self._today).isoformat(),
+            "num_overdue": self._num_overdue,
+            "num_cards": self._num_cards,
+            "counts": {
+                date.fromordinal(day).isoformat(): count
+                for day, count in sorted(self._counts.items())
+            },
+        }
+
+    def restore(self, snapshot: dict[str, Any]) -> None:
+        """
+        Replaces the forecast's counts with those of a dict returned by snapshot.
+        """
+
+        today = snapshot["today"]
+        self._today = None if today is None else date.fromisoformat(today).toordinal()
+        self._num_overdue = int(snapshot["num_overdue"])
+        self._num_cards = int(snapshot["num_cards"])
+        self._counts = {
+            date.fromisoformat(day).toordinal(): int(count)
+            for day, count in snapshot["counts"].items()
+        }
+
+    def _day(self, due: datetime) -> int:
+        return due.astimezone(self.tzinfo).toordinal()
+
+    def _change(self, day: int, delta: int) -> None:
+        if self._today is not None and day < self._today:
+            if self._num_overdue + delta < 0:
+                raise ValueError("no card is counted as overdue")
+            self._num_overdue += delta
+            return
+
+        count = self._counts.get(day, 0) + delta
+        if count < 0:
+            raise ValueError(f"no card is counted as due on {date.fromordinal(day)}")
+        if count:
+            self._counts[day] = count
+        else:
+            del self._counts[day]
+
+    def _roll_forward(self, now: datetime | None) -> int:
+        if now is None:
+            now = datetime.now(timezone.utc)
+        today = self._day(now)
+
+        if self._today is not None and today < self._today:
+            raise ValueError(
+                "the forecast has already been rolled forward past this day"
+            )
+
+        # whichever is fewer: the days with counts or the days elapsed since the last query
+        past_days: Iterable[int]
+        if self._today is None or today - self._today > len(self._counts):
+            past_days = [day for day in self._counts if day < today]
+        else:
+            past_days = range(self._today, today)
+
+        for day in past_days:
+            self._num_overdue += self._counts.pop(day, 0)
+
+        self._today = today
+        return today
@@ -0,0 +1,183 @@
+"""
+anki_sm_2.due_index
+
+This module defines an index for quickly finding which cards are due.
+
+Classes:
+    DueIndex: Priority index of cards ordered by when they are due.
+"""
+
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from heapq import heapify, heappop, heappush
+from itertools import count
+
+from .anki_sm_2 import Card, FrozenCard, State
+
+
+class DueIndex:
+    """
+    Priority index of cards ordered by when they are due.
+
+    Cards are kept in one binary heap per State, keyed on Card.due. Adding a card whose card_id is already
+    indexed replaces the old entry, so the index can be kept up to date by adding every card returned by
+    Scheduler.review_card. Additions and removals are O(log N).
+    """
+
+    def __init__(self, cards: Iterable[Card | FrozenCard] = ()) -> None:
+        self._heaps: dict[State, list[tuple[float, int, int]]] = {
+            state: [] for state in State
+        }
+        # card_id -> (sequence number of the card's live heap entry, card)
+        self._entries: dict[int, tuple[int, Card | FrozenCard]] = {}
+        self._sequence = count()
+        self._num_stale = 0
+
+        for card in cards:
+            self.add(card)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, card_id: object) -> bool:
+        return card_id in self._entries
+
+    def add(self, card: Card | FrozenCard) -> None:
+        """
+        Adds a card to the index, replacing any indexed card with the same card_id.
+        """
+
+        if card.card_id in self._entries:
+            self._num_stale += 1
+
+        sequence = next(self._sequence)
+        self._entries[card.card_id] = (sequence, card)
+        heappush(
+            self._heaps[card.state], (card.due.timestamp(), sequence, card.card_id)
+        )
+
+        self._maybe_compact()
+
+    def remove(self, card_id: int) -> None:
+        """
+        Removes a card from the index.
+
+        Raises:
+            KeyError: If no card with the given id is indexed.
+        """
+
+        del self._entries[card_id]
+        self._num_stale += 1
+
+        self._maybe_compact()
+
+    def pop_due(
+        self,
+        now: datetime | None = None,
+        limit: int | None = None,
+        state: State | None = None,
+    ) -> list[Card | FrozenCard]:
+        """
+        Removes and returns the cards that are due, ordered from most to least overdue.
+
+        Args:
+            now (datetime | None): Cards due at or before this time are returned. If unspecified, the current time in UTC.
+            limit (int | None): The maximum number of cards to return or None for no limit.
+            state (State | None): Only return cards in this state or None for cards in any state.
+
+        Returns:
+            list: The due cards.
+        """
+
+        if now is None:
+            now = datetime.now(timezone.utc)
+        now_timestamp = now.timestamp()
+
+        if state is None:
+            heaps = list(self._heaps.values())
+        else:
+            heaps = [self._heaps[state]]
+
+        due_cards: list[Card | FrozenCard] = []
+        while limit is None or len(due_cards) < limit:
+            next_heap = None
+            for heap in heaps:
+                self._drop_stale(heap)
+                if (
+                    heap
+                    and heap[0][0] <= now_timestamp
+                    and (next_heap is None or heap[0] < next_heap[0])
+                ):
+                    next_heap = heap
+
+            if next_heap is None:
+                break
+
+            _, _, card_id = heappop(next_heap)
+            _, card = self._entries.pop(card_id)
+            due_cards.append(card)
+
+        return due_cards
+
+    def count_due(
+        self, until: datetime | None = None, state: State | None = None
+    ) -> int:
+        """
+        Counts the cards that are due, without removing them.
+
+        Only the part of each heap holding due cards is visited, so the cost grows with the number of due cards
+        rather than the size of the index.
+
+        Args:
+            until (datetime | None): Cards due at or before this time are counted. If unspecified, the current time in UTC.
+            state (State | None): Only count cards in this state or None for cards in any state.
+
+        Returns:
+            int: The number of due cards.
+        """
+
+        if until is None:
+            until = datetime.now(timezone.utc)
+        until_timestamp = until.timestamp()
+
+        if state is None:
+            heaps = list(self._heaps.values())
+        else:
+            heaps = [self._heaps[state]]
+
+        num_due = 0
+        for heap in heaps:
+            stack = [0] if heap else []
+            while stack:
+                position = stack.pop()
+                due_timestamp, sequence, card_id = heap[position]
+                if due_timestamp > until_timestamp:
+                    continue
+
+                if self._is_live(sequence, card_id):
+                    num_due += 1
+
+                for child in (2 * position + 1, 2 * position + 2):
+                    if child < len(heap):
+                        stack.append(child)
+
+        return num_due
+
+    def _is_live(self, sequence: int, card_id: int) -> bool:
+        entry = self._entries.get(card_id)
+        return entry is not None and entry[0] == sequence
+
+    def _drop_stale(self, heap: list[tuple[float, int, int]]) -> None:
+        while heap and not self._is_live(heap[0][1], heap[0][2]):
+            heappop(heap)
+            self._num_stale -= 1
+
+    def _maybe_compact(self) -> None:
+        # rebuild the heaps once more than half of their entries are stale
+        if self._num_stale <= max(len(self._entries), 64):
+            return
+
+        for heap in self._heaps.values():
+            heap[:] = [entry for entry in heap if self._is_live(entry[1], entry[2])]
+            heapify(heap)
+        self._num_stale = 0
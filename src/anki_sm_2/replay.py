@@ -0,0 +1,351 @@
+"""
+anki_sm_2.replay
+
+This module defines functions for rebuilding card state from review log history.
+
+Functions:
+    replay: Rebuilds the final state of each card from a stream of review logs.
+    replay_steps: Rebuilds card state from a stream of review logs, yielding the card after every review.
+    replay_parallel: Rebuilds the final state of each card from review logs, using a pool of worker processes.
+"""
+
+import multiprocessing
+import os
+import queue
+import random
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from typing import Any
+
+from .anki_sm_2 import (
+    Card,
+    FrozenCard,
+    FrozenReviewLog,
+    Rating,
+    ReviewLog,
+    Scheduler,
+)
+
+ReviewLogLike = ReviewLog | FrozenReviewLog | dict[str, Any]
+
+# seconds to wait on a worker's queue before checking that the worker is still alive
+_POLL_TIMEOUT = 1.0
+
+
+def replay_steps(
+    logs: Iterable[ReviewLogLike],
+    scheduler: Scheduler,
+    grouped: bool = False,
+) -> Iterator[tuple[Card | FrozenCard, ReviewLog | FrozenReviewLog]]:
+    """
+    Rebuilds card state from a stream of review logs, yielding the card after every review.
+
+    Each card starts from the card stored in its first review log and is then reviewed with the scheduler using
+    the rating, review datetime and review duration of each of its logs. The logs of each card must be in
+    chronological order.
+
+    Args:
+        logs (Iterable[ReviewLog | FrozenReviewLog | dict]): The review logs, as objects or in the format returned by ReviewLog.to_dict.
+        scheduler (Scheduler): The scheduler used to review the cards.
+        grouped (bool): Whether all logs of each card are adjacent in the stream. If True, only the current card is held in memory.
+                        Otherwise, the latest state of every card seen so far is held in memory.
+
+    Returns:
+        Iterator[tuple]: The reviewed card and its new review log, for each review log in the stream.
+    """
+
+    return _replay_steps(logs, scheduler, grouped, {})
+
+
+def replay(
+    logs: Iterable[ReviewLogLike],
+    scheduler: Scheduler,
+    grouped: bool = False,
+) -> Iterator[Card | FrozenCard]:
+    """
+    Rebuilds the final state of each card from a stream of review logs.
+
+    See replay_steps for how cards are rebuilt.
+
+    Args:
+        logs (Iterable[ReviewLog | FrozenReviewLog | dict]): The review logs, as objects or in the format returned by ReviewLog.to_dict.
+        scheduler (Scheduler): The scheduler used to review the cards.
+        grouped (bool): Whether all logs of each card are adjacent in the stream. If True, each card is yielded as soon as
+                        the logs of the next card start and only the current card is held in memory. Otherwise, cards
+                        are yielded once the stream is exhausted.
+
+    Returns:
+        Iterator[Card | FrozenCard]: The final state of each card.
+    """
+
+    if grouped:
+        last_card = None
+        for card, _ in _replay_steps(logs, scheduler, True, {}):
+            if last_card is not None and card.card_id != last_card.card_id:
+                yield last_card
+            last_card = card
+
+        if last_card is not None:
+            yield last_card
+
+    else:
+        cards: dict[int, Card | FrozenCard] = {}
+        for _ in _replay_steps(logs, scheduler, False, cards):
+            pass
+
+        yield from cards.values()
+
+
+def replay_parallel(
+    logs: Iterable[ReviewLogLike],
+    scheduler: Scheduler,
+    processes: int | None = None,
+    shards: int | None = None,
+    seed: int = 0,
+    grouped: bool = False,
+    chunk_size: int = 10_000,
+) -> Iterator[Card]:
+    """
+    Rebuilds the final state of each card from review logs, using a pool of worker processes.
+
+    Cards are partitioned into shards by card_id and each shard is replayed independently, as with replay, by the
+    worker process that owns it. Logs are buffered per shard and each buffer is sent to its worker, packed with
+    ReviewLog.dumps_many, as soon as it holds chunk_size logs, so the logs are never all held in memory at once and
+    workers replay while the stream is still being read. The scheduler's configuration is sent to each worker once,
+    and each shard fuzzes intervals with its own random.Random seeded from seed and the shard number, so results
+    depend only on seed and the number of shards, not on the number of processes. Cards are sent back in the binary
+    format of Card.dumps_many.
+
+    Args:
+        logs (Iterable[ReviewLog | FrozenReviewLog | dict]): The review logs, as objects or in the format returned by ReviewLog.to_dict.
+        scheduler (Scheduler): The scheduler whose configuration is used to review the cards. Its rng is not used.
+        processes (int | None): The number of worker processes. If None, the number of CPUs.
+        shards (int | None): The number of shards to partition the cards into. If None, the number of processes.
+        seed (int): The seed from which each shard's random number generator is derived.
+        grouped (bool): Whether all logs of each card are adjacent in the stream. If True, workers pack each card as soon
+                        as the logs of the next card in its shard start, instead of holding every card until the end.
+        chunk_size (int): The number of logs of a shard buffered before they are sent to its worker.
+
+    Returns:
+        Iterator[Card]: The final state of each card, shard by shard.
+    """
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if shards is None:
+        shards = processes
+    processes = min(processes, shards)
+
+    context = multiprocessing.get_context()
+    # a few chunks per shard can be waiting for each worker, so reading the logs can't run far ahead of replaying them
+    chunk_queues = [context.Queue(maxsize=2 * shards) for _ in range(processes)]
+    result_queue = context.Queue()
+    workers = [
+        context.Process(
+            target=_replay_worker,
+            args=(
+                scheduler.to_dict(),
+                range(worker, shards, processes),
+                seed,
+                grouped,
+                chunk_queues[worker],
+                result_queue,
+            ),
+            daemon=True,
+        )
+        for worker in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+
+    try:
+        shard_logs: list[list[ReviewLog | FrozenReviewLog]] = [
+            [] for _ in range(shards)
+        ]
+        for log in logs:
+            if isinstance(log, dict):
+                log = ReviewLog.from_dict(log)
+
+            shard = log.card.card_id % shards
+            buffer = shard_logs[shard]
+            buffer.append(log)
+            if len(buffer) >= chunk_size:
+                _send(
+                    chunk_queues[shard % processes],
+                    (shard, ReviewLog.dumps_many(buffer)),
+                    workers[shard % processes],
+                )
+                buffer.clear()
+
+        for shard, buffer in enumerate(shard_logs):
+            if buffer:
+                _send(
+                    chunk_queues[shard % processes],
+                    (shard, ReviewLog.dumps_many(buffer)),
+                    workers[shard % processes],
+                )
+        del shard_logs
+
+        for worker, chunk_queue in zip(workers, chunk_queues):
+            _send(chunk_queue, None, worker)
+
+        # the number of shards each worker has yet to send back. a worker that has sent all of its shards may exit
+        num_pending = [
+            len(range(worker, shards, processes)) for worker in range(processes)
+        ]
+        shard_cards: dict[int, list[bytes]] = {}
+        while len(shard_cards) < shards:
+            result = _receive(
+                result_queue,
+                [worker for worker, pending in zip(workers, num_pending) if pending],
+            )
+            if isinstance(result, Exception):
+                raise result
+            shard, data = result
+            shard_cards[shard] = data
+            num_pending[shard % processes] -= 1
+
+        for shard in range(shards):
+            for data in shard_cards.pop(shard):
+                yield from Card.loads_many(data)
+
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+
+
+def _send(chunk_queue: Any, message: Any, worker: Any) -> None:
+    # a worker that has died would never take the message, so check on it instead of blocking forever
+    while True:
+        try:
+            chunk_queue.put(message, timeout=_POLL_TIMEOUT)
+            return
+        except queue.Full:
+            if not worker.is_alive():
+                raise RuntimeError("a replay worker process exited unexpectedly")
+
+
+def _receive(result_queue: Any, pending_workers: list[Any]) -> Any:
+    # only workers that still owe results are checked, since the others exit once they have sent them
+    while True:
+        try:
+            return result_queue.get(timeout=_POLL_TIMEOUT)
+        except queue.Empty:
+            if any(
+                not worker.is_alive() or worker.exitcode not in (0, None)
+                for worker in pending_workers
+            ):
+                # a worker may have put its last result just before exiting
+                try:
+                    return result_queue.get(timeout=_POLL_TIMEOUT)
+                except queue.Empty:
+                    raise RuntimeError(
+                        "a replay worker process exited unexpectedly"
+                    ) from None
+
+
+def _replay_worker(
+    scheduler_dict: dict[str, Any],
+    shards: Iterable[int],
+    seed: int,
+    grouped: bool,
+    chunk_queue: Any,
+    result_queue: Any,
+) -> None:
+    # each shard keeps its scheduler and cards across chunks, so a shard replays as one stream
+    schedulers = {}
+    shard_cards: dict[int, dict[int, Card | FrozenCard]] = {}
+    # cards that are done, packed with Card.dumps_many
+    packed_cards: dict[int, list[bytes]] = {}
+    for shard in shards:
+        schedulers[shard] = Scheduler.from_dict(scheduler_dict)
+        schedulers[shard].rng = random.Random(f"{seed}:{shard}")
+        shard_cards[shard] = {}
+        packed_cards[shard] = []
+
+    error = None
+    while True:
+        message = chunk_queue.get()
+        if message is None:
+            break
+        if error is not None:
+            # keep taking chunks, so the parent isn't blocked sending them
+            continue
+
+        shard, data = message
+        try:
+            cards = shard_cards[shard]
+            if grouped:
+                done_cards = []
+                last_card = next(iter(cards.values()), None)
+                for card, _ in _replay_steps(
+                    ReviewLog.loads_many(data), schedulers[shard], True, cards
+                ):
+                    if last_card is not None and card.card_id != last_card.card_id:
+                        done_cards.append(last_card)
+                    last_card = card
+                if done_cards:
+                    packed_cards[shard].append(Card.dumps_many(done_cards))
+            else:
+                for _ in _replay_steps(
+                    ReviewLog.loads_many(data), schedulers[shard], False, cards
+                ):
+                    pass
+        except Exception as exception:  # noqa: BLE001
+            # sent to the parent, which raises it
+            error = exception
+
+    if error is not None:
+        result_queue.put(error)
+        return
+
+    for shard, cards in shard_cards.items():
+        packed_cards[shard].append(Card.dumps_many(cards.values()))
+        result_queue.put((shard, packed_cards[shard]))
+
+
+def _replay_steps(
+    logs: Iterable[ReviewLogLike],
+    scheduler: Scheduler,
+    grouped: bool,
+    cards: dict[int, Card | FrozenCard],
+) -> Iterator[tuple[Card | FrozenCard, ReviewLog | FrozenReviewLog]]:
+    review_card = scheduler.review_card
+
+    for log in logs:
+        if isinstance(log, dict):
+            # only parse the logged card when its card_id hasn't been seen yet
+            card_dict = log["card"]
+            card_id = int(card_dict["card_id"])
+            card = cards.get(card_id)
+            if card is None:
+                card = Card.from_dict(card_dict)
+
+            rating = Rating(int(log["rating"]))
+            review_datetime = datetime.fromisoformat(log["review_datetime"])
+            review_duration = log["review_duration"]
+
+        else:
+            card_id = log.card.card_id
+            card = cards.get(card_id)
+            if card is None:
+                card = log.card
+
+            rating = log.rating
+            review_datetime = log.review_datetime
+            review_duration = log.review_duration
+
+        card, review_log = review_card(
+            card=card,
+            rating=rating,
+            review_datetime=review_datetime,
+            review_duration=review_duration,
+        )
+
+        if grouped:
+            cards.clear()
+        cards[card_id] = card
+
+        yield card, review_log
@@ -0,0 +1,108 @@
+"""
+anki_sm_2.scheduler_registry
+
+This module defines a cache of shared schedulers for serving many users with their own settings.
+
+Classes:
+    SchedulerRegistry: Bounded LRU cache of frozen schedulers keyed by their configuration.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from .anki_sm_2 import Scheduler
+
+
+class SchedulerRegistry:
+    """
+    Bounded LRU cache of frozen schedulers keyed by their configuration.
+
+    Looking up a configuration in the format of Scheduler.to_dict returns the same frozen Scheduler every time the
+    configuration is seen again, so the scheduler and everything it precomputes, such as its step tuples and
+    transition tables, are built once per distinct configuration instead of once per request. Once more than
+    maxsize configurations are cached, the least recently used one is dropped.
+
+    Shared schedulers fuzz intervals with the global random module and collect no stats. The registry is safe to use
+    from multiple threads.
+
+    Attributes:
+        maxsize (int): The maximum number of schedulers kept in the cache.
+        hits (int): The number of lookups that returned a cached scheduler.
+        misses (int): The number of lookups that built a new scheduler.
+        evictions (int): The number of schedulers dropped from the cache to make room for new ones.
+    """
+
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._schedulers: OrderedDict[str, Scheduler] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._schedulers)
+
+    def get(self, config: dict[str, Any]) -> Scheduler:
+        """
+        Returns the shared, frozen scheduler for a configuration in the format of Scheduler.to_dict.
+        """
+
+        key = json.dumps(config, sort_keys=True)
+
+        with self._lock:
+            scheduler = self._schedulers.get(key)
+            if scheduler is not None:
+                self._schedulers.move_to_end(key)
+                self.hits += 1
+                return scheduler
+
+        # build outside the lock; if another thread builds the same configuration first, its scheduler is kept
+        scheduler = Scheduler.from_dict(config).freeze()
+
+        with self._lock:
+            self.misses += 1
+            existing_scheduler = self._schedulers.get(key)
+            if existing_scheduler is not None:
+                self._schedulers.move_to_end(key)
+                return existing_scheduler
+
+            self._schedulers[key] = scheduler
+            if len(self._schedulers) > self.maxsize:
+                self._schedulers.popitem(last=False)
+                self.evictions += 1
+
+        return scheduler
+
+    def clear(self) -> None:
+        """
+        Drops every cached scheduler. The hit, miss and eviction counts are kept.
+        """
+
+        with self._lock:
+            self._schedulers.clear()
+
+    def stats(self) -> dict[str, float | int]:
+        """
+        Returns the number of cached schedulers, hits, misses and evictions and the fraction of lookups that were hits.
+        """
+
+        num_lookups = self.hits + self.misses
+        return {
+            "size": len(self._schedulers),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / num_lookups if num_lookups else 0.0,
+        }
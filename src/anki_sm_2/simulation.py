@@ -0,0 +1,168 @@
+"""
+anki_sm_2.simulation
+
+This module defines a Monte Carlo simulator for forecasting future review workload.
+
+Functions:
+    simulate_workload: Forecasts the number of reviews per day for a collection of cards.
+"""
+
+import random
+from bisect import bisect
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from datetime import datetime, timezone
+from itertools import accumulate
+from typing import Any
+
+from .anki_sm_2 import Card, FrozenCard, Rating, Scheduler, State
+from .card_store import CardStore
+
+_RATINGS = (Rating.Again, Rating.Hard, Rating.Good, Rating.Easy)
+
+
+def simulate_workload(
+    cards: Iterable[Card | FrozenCard],
+    scheduler: Scheduler,
+    rating_probabilities: dict[State, Sequence[float]],
+    days: int = 365,
+    start: datetime | None = None,
+    runs: int = 1,
+    processes: int | None = 1,
+    seed: int = 0,
+) -> list[float]:
+    """
+    Forecasts the number of reviews per day for a collection of cards.
+
+    Each run reviews every card at its due time, day by day, with a rating drawn at random from the probabilities
+    given for the card's state. Cards that are overdue at the start are reviewed at the start. Each run draws its
+    ratings and fuzz from its own random.Random seeded from seed and the run number, so results depend only on seed
+    and the number of runs, not on the number of processes.
+
+    The cards are held in a CardStore and all cards due in a day are reviewed together with CardStore.review, so no
+    Card or datetime objects are created per review.
+
+    Args:
+        cards (Iterable[Card | FrozenCard]): The cards in the collection.
+        scheduler (Scheduler): The scheduler whose configuration is used to review the cards. Its rng is not used.
+        rating_probabilities (dict[State, Sequence[float]]): For each state, the probability of rating a card in that state Again, Hard, Good and Easy.
+        days (int): The number of days to forecast. Must be at least 1.
+        start (datetime | None): The start of the first day. If unspecified, the current time in UTC.
+        runs (int): The number of Monte Carlo runs to average over.
+        processes (int | None): The number of worker processes to spread the runs over. If None, the number of CPUs.
+        seed (int): The seed from which each run's random number generator is derived.
+
+    Returns:
+        list[float]: The mean number of reviews on each day.
+
+    Raises:
+        ValueError: If days is less than 1 or a state does not have four rating probabilities.
+    """
+
+    if start is None:
+        start = datetime.now(timezone.utc)
+
+    if days < 1:
+        raise ValueError("days must be at least 1")
+    for state in State:
+        if len(rating_probabilities[state]) != len(_RATINGS):
+            raise ValueError(
+                f"expected {len(_RATINGS)} rating probabilities for {state.name}"
+            )
+
+    # cards are stored under their position, so cards that share a card_id are still simulated separately
+    card_store = CardStore()
+    for position, card in enumerate(cards):
+        card_store._append_or_replace(
+            position,
+            int(card.state),
+            card.step,
+            card.ease,
+            card.due.timestamp(),
+            card.current_interval,
+        )
+
+    scheduler_dict = scheduler.to_dict()
+    run_args = [
+        (card_store, scheduler_dict, rating_probabilities, days, start, seed, run)
+        for run in range(runs)
+    ]
+
+    if processes == 1 or runs == 1:
+        run_counts = [_simulate_run(*args) for args in run_args]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            run_counts = list(executor.map(_simulate_run, *zip(*run_args)))
+
+    return [sum(day_counts) / runs for day_counts in zip(*run_counts)]
+
+
+def _simulate_run(
+    card_store: CardStore,
+    scheduler_dict: dict[str, Any],
+    rating_probabilities: dict[State, Sequence[float]],
+    days: int,
+    start: datetime,
+    seed: int,
+    run: int,
+) -> list[int]:
+    rng = random.Random(f"{seed}:{run}")
+    random_function = rng.random
+
+    scheduler = Scheduler.from_dict(scheduler_dict)
+    scheduler.rng = rng
+
+    card_store = deepcopy(card_store)
+    states = card_store.states
+    dues = card_store.dues
+
+    # the cumulative weights and their total for each state, drawn from as in random.choices
+    cum_weights = {}
+    for state in State:
+        state_cum_weights = list(accumulate(rating_probabilities[state]))
+        cum_weights[int(state)] = (state_cum_weights, state_cum_weights[-1] + 0.0)
+
+    start_time = start.timestamp()
+
+    # the cards due on each day, by their card_id, which is also their position in the store.
+    # cards that are overdue at the start are reviewed at the start
+    due_days: list[list[int]] = [[] for _ in range(days)]
+    for card_id, due in enumerate(dues):
+        day = int((due - start_time) // 86400)
+        if day < days:
+            due_days[max(day, 0)].append(card_id)
+
+    day_counts = [0] * days
+    for day in range(days):
+        day_end = start_time + (day + 1) * 86400
+
+        # every card due today is reviewed at once, at its due time, and cards that are due again later today,
+        # e.g. on their next learning step, are reviewed in the next round
+        card_ids = due_days[day]
+        due_days[day] = []
+        while card_ids:
+            day_counts[day] += len(card_ids)
+
+            ratings = []
+            for card_id in card_ids:
+                state_cum_weights, total = cum_weights[states[card_id]]
+                ratings.append(
+                    _RATINGS[bisect(state_cum_weights, random_function() * total, 0, 3)]
+                )
+            review_times = [max(dues[card_id], start_time) for card_id in card_ids]
+
+            card_store.review(scheduler, card_ids, ratings, review_times)
+
+            next_card_ids = []
+            for card_id in card_ids:
+                due = dues[card_id]
+                if due < day_end:
+                    next_card_ids.append(card_id)
+                else:
+                    due_day = int((due - start_time) // 86400)
+                    if due_day < days:
+                        due_days[due_day].append(card_id)
+            card_ids = next_card_ids
+
+    return day_counts
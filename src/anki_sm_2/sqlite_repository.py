@@ -0,0 +1,372 @@
+"""
+anki_sm_2.sqlite_repository
+
+This module defines a SQLite database for storing cards and review logs.
+
+Classes:
+    SQLiteRepository: Stores cards and review logs in a local SQLite database.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any
+
+from .anki_sm_2 import (
+    Card,
+    FrozenCard,
+    FrozenReviewLog,
+    Rating,
+    ReviewLog,
+    State,
+    _datetime_from_fields,
+    _datetime_to_fields,
+)
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+# each migration brings the database from the schema version equal to its index to the next one.
+# the schema version is stored in PRAGMA user_version. datetimes are stored as epoch microseconds plus their utc
+# offset in seconds, as in the binary format of Card.dumps_many, so they round-trip exactly and sort correctly.
+_MIGRATIONS = (
+    """
+    CREATE TABLE cards (
+        card_id INTEGER PRIMARY KEY,
+        state INTEGER NOT NULL,
+        step INTEGER,
+        ease REAL,
+        due INTEGER NOT NULL,
+        due_offset INTEGER NOT NULL,
+        current_interval INTEGER
+    );
+    CREATE INDEX cards_due ON cards (due);
+    CREATE INDEX cards_state_due ON cards (state, due);
+
+    CREATE TABLE review_logs (
+        review_log_id INTEGER PRIMARY KEY,
+        card_id INTEGER NOT NULL,
+        card_state INTEGER NOT NULL,
+        card_step INTEGER,
+        card_ease REAL,
+        card_due INTEGER NOT NULL,
+        card_due_offset INTEGER NOT NULL,
+        card_current_interval INTEGER,
+        rating INTEGER NOT NULL,
+        review_datetime INTEGER NOT NULL,
+        review_datetime_offset INTEGER NOT NULL,
+        review_duration INTEGER
+    );
+    CREATE INDEX review_logs_card_id ON review_logs (card_id, review_log_id);
+    CREATE INDEX review_logs_review_datetime ON review_logs (review_datetime);
+    """,
+)
+
+_CARD_COLUMNS = "card_id, state, step, ease, due, due_offset, current_interval"
+
+_UPSERT_CARD = f"""
+    INSERT INTO cards ({_CARD_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (card_id) DO UPDATE SET
+        state = excluded.state,
+        step = excluded.step,
+        ease = excluded.ease,
+        due = excluded.due,
+        due_offset = excluded.due_offset,
+        current_interval = excluded.current_interval
+"""
+
+_INSERT_REVIEW_LOG = """
+    INSERT INTO review_logs (
+        card_id, card_state, card_step, card_ease, card_due, card_due_offset, card_current_interval,
+        rating, review_datetime, review_datetime_offset, review_duration
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+class SQLiteRepository:
+    """
+    Stores cards and review logs in a local SQLite database.
+
+    The database is opened in WAL mode, so readers do not block the writer or each other. Writes go through a single
+    connection guarded by a lock and each call writes its rows in one transaction with executemany. Reads use a pool
+    of up to readers connections, so several threads can query the database at once. The schema is created or
+    migrated to the latest version when the repository is opened.
+
+    Cards and review logs are stored one row each with indexed due and state columns, so queries such as due_cards
+    only read the rows they return.
+
+    Attributes:
+        path (str): The path of the database file.
+    """
+
+    path: str
+
+    def __init__(self, path: str | os.PathLike[str], readers: int = 4) -> None:
+        if readers < 1:
+            raise ValueError("readers must be at least 1")
+
+        self.path = os.fspath(path)
+
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode = WAL")
+        self._writer.execute("PRAGMA synchronous = NORMAL")
+        self._write_lock = threading.Lock()
+        self._migrate()
+
+        self._readers: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._reader_slots = threading.Semaphore(readers)
+        self._all_readers: list[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._reader() as connection:
+            (num_cards,) = connection.execute("SELECT COUNT(*) FROM cards").fetchone()
+        return num_cards
+
+    def __enter__(self) -> "Self":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    @property
+    def schema_version(self) -> int:
+        """
+        The version of the database schema, the number of migrations applied to it.
+        """
+
+        with self._write_lock:
+            (version,) = self._writer.execute("PRAGMA user_version").fetchone()
+        return version
+
+    def upsert_cards(self, cards: Iterable[Card | FrozenCard]) -> None:
+        """
+        Stores cards, replacing any stored cards with the same card_ids, in a single transaction.
+        """
+
+        self.save_reviews(cards, ())
+
+    def add_review_logs(
+        self, review_logs: Iterable[ReviewLog | FrozenReviewLog]
+    ) -> None:
+        """
+        Appends review logs in a single transaction.
+        """
+
+        self.save_reviews((), review_logs)
+
+    def save_reviews(
+        self,
+        cards: Iterable[Card | FrozenCard],
+        review_logs: Iterable[ReviewLog | FrozenReviewLog],
+    ) -> None:
+        """
+        Stores reviewed cards and appends their review logs in a single transaction, e.g. with the results of
+        Scheduler.review_cards_batch.
+        """
+
+        card_rows = [_card_row(card) for card in cards]
+        review_log_rows = [
+            (
+                *_card_row(review_log.card),
+                int(review_log.rating),
+                *_datetime_to_fields(review_log.review_datetime),
+                review_log.review_duration,
+            )
+            for review_log in review_logs
+        ]
+
+        with self._write_lock, self._writer:
+            if card_rows:
+                self._writer.executemany(_UPSERT_CARD, card_rows)
+            if review_log_rows:
+                self._writer.executemany(_INSERT_REVIEW_LOG, review_log_rows)
+
+    def delete_cards(self, card_ids: Iterable[int]) -> None:
+        """
+        Deletes cards and their review logs in a single transaction.
+        """
+
+        rows = [(card_id,) for card_id in card_ids]
+        with self._write_lock, self._writer:
+            self._writer.executemany("DELETE FROM cards WHERE card_id = ?", rows)
+            self._writer.executemany("DELETE FROM review_logs WHERE card_id = ?", rows)
+
+    def get_card(self, card_id: int) -> Card | None:
+        """
+        Returns the stored card with the given id or None if there is none.
+        """
+
+        with self._reader() as connection:
+            row = connection.execute(
+                f"SELECT {_CARD_COLUMNS} FROM cards WHERE card_id = ?", (card_id,)
+            ).fetchone()
+
+        return None if row is None else _card_from_row(*row)
+
+    def due_cards(
+        self,
+        before: datetime | None = None,
+        limit: int | None = None,
+        state: State | None = None,
+    ) -> list[Card]:
+        """
+        Returns the cards that are due, ordered from most to least overdue, using the index on due.
+
+        Args:
+            before (datetime | None): Cards due at or before this time are returned. If unspecified, the current time in UTC.
+            limit (int | None): The maximum number of cards to return or None for no limit.
+            state (State | None): Only return cards in this state or None for cards in any state.
+
+        Returns:
+            list[Card]: The due cards.
+        """
+
+        if before is None:
+            before = datetime.now(timezone.utc)
+
+        query = f"SELECT {_CARD_COLUMNS} FROM cards WHERE due <= ?"
+        parameters: list[Any] = [_datetime_to_fields(before)[0]]
+        if state is not None:
+            query += " AND state = ?"
+            parameters.append(int(state))
+        query += " ORDER BY due, card_id"
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+
+        with self._reader() as connection:
+            rows = connection.execute(query, parameters).fetchall()
+
+        return [_card_from_row(*row) for row in rows]
+
+    def count_due(
+        self, before: datetime | None = None, state: State | None = None
+    ) -> int:
+        """
+        Counts the cards that are due at or before a time, optionally only those in a given state.
+        """
+
+        if before is None:
+            before = datetime.now(timezone.utc)
+
+        query = "SELECT COUNT(*) FROM cards WHERE due <= ?"
+        parameters: list[Any] = [_datetime_to_fields(before)[0]]
+        if state is not None:
+            query += " AND state = ?"
+            parameters.append(int(state))
+
+        with self._reader() as connection:
+            (num_due,) = connection.execute(query, parameters).fetchone()
+
+        return num_due
+
+    def history(self, card_id: int) -> list[ReviewLog]:
+        """
+        Returns the review logs of a card in the order they were added.
+        """
+
+        with self._reader() as connection:
+            rows = connection.execute(
+                """
+                SELECT card_id, card_state, card_step, card_ease, card_due, card_due_offset,
+                    card_current_interval, rating, review_datetime, review_datetime_offset, review_duration
+                FROM review_logs WHERE card_id = ? ORDER BY review_log_id
+                """,
+                (card_id,),
+            ).fetchall()
+
+        return [
+            ReviewLog(
+                card=_card_from_row(*row[:7]),
+                rating=Rating(row[7]),
+                review_datetime=_datetime_from_fields(row[8], row[9]),
+                review_duration=row[10],
+            )
+            for row in rows
+        ]
+
+    def close(self) -> None:
+        """
+        Closes the writer and every reader connection.
+        """
+
+        with self._readers_lock:
+            for connection in self._all_readers:
+                connection.close()
+            self._all_readers.clear()
+
+        with self._write_lock:
+            self._writer.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, check_same_thread=False)
+
+    def _migrate(self) -> None:
+        with self._write_lock:
+            (version,) = self._writer.execute("PRAGMA user_version").fetchone()
+            if version > len(_MIGRATIONS):
+                self._writer.close()
+                raise ValueError(
+                    f"database schema version {version} is newer than this version of anki-sm-2 supports"
+                )
+
+            for next_version in range(version + 1, len(_MIGRATIONS) + 1):
+                # executescript commits on its own, so the version bump is part of the script
+                self._writer.executescript(
+                    "BEGIN;\n"
+                    + _MIGRATIONS[next_version - 1]
+                    + f"\nPRAGMA user_version = {next_version};\nCOMMIT;"
+                )
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        self._reader_slots.acquire()
+        try:
+            try:
+                connection = self._readers.get_nowait()
+            except queue.Empty:
+                connection = self._connect()
+                with self._readers_lock:
+                    self._all_readers.append(connection)
+
+            try:
+                yield connection
+            finally:
+                self._readers.put(connection)
+        finally:
+            self._reader_slots.release()
+
+
+def _card_row(card: Card | FrozenCard) -> tuple[Any, ...]:
+    return (
+        card.card_id,
+        int(card.state),
+        card.step,
+        card.ease,
+        *_datetime_to_fields(card.due),
+        card.current_interval,
+    )
+
+
+def _card_from_row(
+    card_id: int,
+    state: int,
+    step: int | None,
+    ease: float | None,
+    due: int,
+    due_offset: int,
+    current_interval: int | None,
+) -> Card:
+    return Card(
+        card_id=card_id,
+        state=State(state),
+        step=step,
+        ease=ease,
+        due=_datetime_from_fields(due, due_offset),
+        current_interval=current_interval,
+    )
@@ -0,0 +1,162 @@
+"""
+anki_sm_2.sweep
+
+This module defines a harness for comparing scheduler configurations against the same review history.
+
+Classes:
+    ReviewHistory: Review logs parsed once into a compact form that can be replayed many times.
+
+Functions:
+    sweep: Replays a review history with each of several schedulers and reports metrics for each.
+"""
+
+import random
+from collections.abc import Iterable, Sequence
+from datetime import datetime
+from statistics import median
+from typing import Any
+
+from .anki_sm_2 import (
+    Card,
+    FrozenCard,
+    FrozenReviewLog,
+    Rating,
+    ReviewLog,
+    Scheduler,
+    State,
+)
+
+# upper bounds (in days) of the buckets of the interval histogram reported by sweep
+INTERVAL_BUCKETS = (1, 7, 30, 90, 365)
+
+
+class ReviewHistory:
+    """
+    Review logs parsed once into a compact form that can be replayed many times.
+
+    For each card, the card stored in its first review log is kept along with the rating, review datetime and review
+    duration of each of its reviews, in the order the logs were given.
+
+    Attributes:
+        cards (list[tuple]): For each card, its starting card and a list of its (rating, review_datetime, review_duration) tuples.
+    """
+
+    cards: list[tuple[Card | FrozenCard, list[tuple[Rating, datetime, int | None]]]]
+
+    def __init__(
+        self, logs: Iterable[ReviewLog | FrozenReviewLog | dict[str, Any]]
+    ) -> None:
+        reviews_by_card_id: dict[
+            int,
+            tuple[Card | FrozenCard, list[tuple[Rating, datetime, int | None]]],
+        ] = {}
+
+        for log in logs:
+            if isinstance(log, dict):
+                card_id = int(log["card"]["card_id"])
+                review = (
+                    Rating(int(log["rating"])),
+                    datetime.fromisoformat(log["review_datetime"]),
+                    log["review_duration"],
+                )
+                if card_id not in reviews_by_card_id:
+                    reviews_by_card_id[card_id] = (Card.from_dict(log["card"]), [])
+
+            else:
+                card_id = log.card.card_id
+                review = (log.rating, log.review_datetime, log.review_duration)
+                if card_id not in reviews_by_card_id:
+                    reviews_by_card_id[card_id] = (log.card, [])
+
+            reviews_by_card_id[card_id][1].append(review)
+
+        self.cards = list(reviews_by_card_id.values())
+
+    def __len__(self) -> int:
+        return sum(len(reviews) for _, reviews in self.cards)
+
+
+def sweep(
+    history: ReviewHistory | Iterable[ReviewLog | FrozenReviewLog | dict[str, Any]],
+    schedulers: Sequence[Scheduler],
+    seed: int = 0,
+) -> list[dict[str, Any]]:
+    """
+    Replays a review history with each of several schedulers and reports metrics for each.
+
+    The history is walked once, card by card, and each card's reviews are replayed with every scheduler before moving
+    on to the next card. Each scheduler fuzzes intervals with its own random.Random seeded from seed and the
+    scheduler's position, so results are reproducible. The given schedulers are not modified.
+
+    Args:
+        history (ReviewHistory | Iterable): A parsed ReviewHistory, or review logs to parse into one.
+        schedulers (Sequence[Scheduler]): The scheduler configurations to compare.
+        seed (int): The seed from which each scheduler's random number generator is derived.
+
+    Returns:
+        list[dict]: For each scheduler, a dict with:
+            "lapses": the number of times a Review-state card was rated Again.
+            "workload": the expected number of reviews per day of the cards in the Review state, the sum of one over their intervals.
+            "mean_interval" and "median_interval": of the final intervals of the cards in the Review state, or None if there are none.
+            "interval_histogram": the number of cards in the Review state whose final interval is at most each bound of
+                                  INTERVAL_BUCKETS, keyed by bound, with the rest under None.
+    """
+
+    if not isinstance(history, ReviewHistory):
+        history = ReviewHistory(history)
+
+    sweep_schedulers = []
+    for position, scheduler in enumerate(schedulers):
+        sweep_scheduler = Scheduler.from_dict(scheduler.to_dict())
+        sweep_scheduler.rng = random.Random(f"{seed}:{position}")
+        sweep_schedulers.append(sweep_scheduler)
+
+    lapses = [0] * len(sweep_schedulers)
+    final_intervals: list[list[int]] = [[] for _ in sweep_schedulers]
+
+    for start_card, reviews in history.cards:
+        for position, scheduler in enumerate(sweep_schedulers):
+            review_card = scheduler.review_card
+            card = start_card
+            num_lapses = 0
+
+            for rating, review_datetime, review_duration in reviews:
+                if card.state == State.Review and rating == Rating.Again:
+                    num_lapses += 1
+
+                card, _ = review_card(
+                    card=card,
+                    rating=rating,
+                    review_datetime=review_datetime,
+                    review_duration=review_duration,
+                )
+
+            lapses[position] += num_lapses
+            if card.state == State.Review:
+                assert card.current_interval is not None  # mypy
+                final_intervals[position].append(card.current_interval)
+
+    results = []
+    for num_lapses, intervals in zip(lapses, final_intervals):
+        interval_histogram: dict[int | None, int] = {
+            bound: 0 for bound in (*INTERVAL_BUCKETS, None)
+        }
+        for interval in intervals:
+            for bound in INTERVAL_BUCKETS:
+                if interval <= bound:
+                    interval_histogram[bound] += 1
+                    break
+            else:
+                interval_histogram[None] += 1
+
+        results.append(
+            {
+                "lapses": num_lapses,
+                "workload": sum(1 / interval for interval in intervals),
+                "mean_interval": sum(intervals) / len(intervals) if intervals else None,
+                "median_interval": median(intervals) if intervals else None,
+                "interval_histogram": interval_histogram,
+            }
+        )
+
+    return results
@@ -1,8 +1,55 @@
-from datetime import datetime, timezone, timedelta
-from anki_sm_2 import Scheduler, Card, Rating, ReviewLog, State
+import asyncio
+import importlib
 import json
-from copy import deepcopy
+import pickle
 import random
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from anki_sm_2 import (
+    AsyncScheduler,
+    Card,
+    CardStore,
+    ConcurrentCollection,
+    DueForecast,
+    DueIndex,
+    FrozenCard,
+    FrozenReviewLog,
+    LazyCard,
+    Rating,
+    ReviewHistory,
+    ReviewLog,
+    ReviewLogArchive,
+    Scheduler,
+    SchedulerRegistry,
+    SchedulerStats,
+    SQLiteRepository,
+    State,
+    cards_from_record_batches,
+    cards_to_record_batches,
+    import_anki_cards,
+    import_anki_review_logs,
+    read_cards_parquet,
+    read_review_logs_parquet,
+    read_schedulers_parquet,
+    replay,
+    replay_parallel,
+    replay_steps,
+    review_logs_from_record_batches,
+    review_logs_to_record_batches,
+    schedulers_from_record_batch,
+    schedulers_to_record_batch,
+    simulate_workload,
+    sweep,
+    write_cards_parquet,
+    write_review_logs_parquet,
+    write_schedulers_parquet,
+)
 
 
 class TestAnkiSM2:
@@ -410,3 +457,1472 @@ class TestAnkiSM2:
             card=card, rating=Rating.Good, review_datetime=card.due
         )
         assert (card.due - last_review).days <= scheduler.maximum_interval
+
+    def test_review_cards_batch(self):
+        scheduler = Scheduler()
+
+        start = datetime(2024, 1, 1, 0, 0, 0, 0, timezone.utc)
+        cards = [Card(card_id=i, due=start) for i in range(100)]
+        ratings = [Rating(i % 4 + 1) for i in range(100)]
+
+        # walk the cards through learning, review and relearning
+        for day in range(10):
+            review_datetimes = [card.due for card in cards]
+
+            random.seed(day)
+            expected = [
+                scheduler.review_card(
+                    card=card, rating=rating, review_datetime=review_datetime
+                )
+                for card, rating, review_datetime in zip(
+                    cards, ratings, review_datetimes
+                )
+            ]
+
+            random.seed(day)
+            batch_cards, batch_review_logs = scheduler.review_cards_batch(
+                cards=cards, ratings=ratings, review_datetimes=review_datetimes
+            )
+
+            assert [card.to_dict() for card in batch_cards] == [
+                card.to_dict() for card, _ in expected
+            ]
+            assert [review_log.to_dict() for review_log in batch_review_logs] == [
+                review_log.to_dict() for _, review_log in expected
+            ]
+
+            cards = batch_cards
+            ratings = ratings[1:] + ratings[:1]
+
+        with pytest.raises(ValueError):
+            scheduler.review_cards_batch(cards=cards, ratings=ratings[:1])
+
+    def test_card_store(self):
+        scheduler = Scheduler()
+
+        cards = [
+            Card(card_id=i, due=datetime(2024, 1, 1, 0, 0, i, 1000 * i, timezone.utc))
+            for i in range(50)
+        ]
+        for i in range(50):
+            for _ in range(i % 5):
+                cards[i], _ = scheduler.review_card(
+                    card=cards[i], rating=Rating.Good, review_datetime=cards[i].due
+                )
+
+        card_store = CardStore(cards)
+        assert len(card_store) == 50
+        assert 7 in card_store
+        assert 50 not in card_store
+
+        for card in cards:
+            assert card_store[card.card_id].to_dict() == card.to_dict()
+        assert [card.to_dict() for card in card_store] == [
+            card.to_dict() for card in cards
+        ]
+
+        # round trip through the Card.to_dict format
+        card_dicts = card_store.to_dicts()
+        assert card_dicts == [card.to_dict() for card in cards]
+        assert CardStore.from_dicts(card_dicts).to_dicts() == card_dicts
+
+        # adding a card with an existing id replaces it
+        card, _ = scheduler.review_card(
+            card=cards[3], rating=Rating.Again, review_datetime=cards[3].due
+        )
+        card_store.add(card)
+        assert len(card_store) == 50
+        assert card_store[3].to_dict() == card.to_dict()
+
+        card_store.remove(0)
+        assert len(card_store) == 49
+        assert 0 not in card_store
+        assert card_store[49].to_dict() == cards[49].to_dict()
+        assert card_store.position(49) == 0
+
+    def test_columnar_review(self):
+        pytest.importorskip("numpy")
+
+        start = datetime(2024, 1, 1, 0, 0, 0, 0, timezone.utc)
+        schedulers = [
+            Scheduler(),
+            Scheduler(learning_steps=(), relearning_steps=()),
+            Scheduler(
+                learning_steps=(timedelta(minutes=1), timedelta(seconds=2.5)),
+                relearning_steps=(timedelta(minutes=5), timedelta(days=1)),
+                maximum_interval=100,
+                interval_modifier=1.3,
+                minimum_interval=3,
+            ),
+        ]
+
+        for seed, scheduler in enumerate(schedulers):
+            rng = random.Random(seed)
+
+            # cards in every state, some on steps the scheduler does not have, reviewed early and days overdue
+            cards = []
+            for i in range(2000):
+                state = State(i % 3 + 1)
+                cards.append(
+                    Card(
+                        card_id=i,
+                        state=state,
+                        step=None if state == State.Review else rng.randrange(4),
+                        ease=None if state == State.Learning else rng.uniform(1.3, 3.5),
+                        due=start
+                        + timedelta(
+                            seconds=rng.randrange(-(10**7), 10**6), microseconds=i
+                        ),
+                        current_interval=(
+                            None if state == State.Learning else rng.randrange(1, 400)
+                        ),
+                    )
+                )
+            ratings = [Rating(rng.randint(1, 4)) for _ in cards]
+            review_datetimes = [
+                start + timedelta(seconds=rng.randrange(10**6)) for _ in cards
+            ]
+
+            scheduler.rng = random.Random(seed)
+            expected = [
+                scheduler.review_card(card, rating, review_datetime)
+                for card, rating, review_datetime in zip(
+                    cards, ratings, review_datetimes
+                )
+            ]
+            expected_next_random = scheduler.rng.random()
+
+            scheduler.rng = random.Random(seed)
+            batch_cards, batch_review_logs = scheduler.review_cards_batch(
+                cards, ratings, review_datetimes
+            )
+            assert scheduler.rng.random() == expected_next_random
+            assert [card.to_dict() for card in batch_cards] == [
+                card.to_dict() for card, _ in expected
+            ]
+            assert [review_log.to_dict() for review_log in batch_review_logs] == [
+                review_log.to_dict() for _, review_log in expected
+            ]
+            assert all(type(card.state) is State for card in batch_cards)
+
+            # CardStore.review against review_epoch, on a shuffled subset of the cards
+            card_ids = list(range(len(cards)))
+            rng.shuffle(card_ids)
+            card_ids = card_ids[:1500]
+            review_times = [start.timestamp() + rng.random() * 10**6 for _ in card_ids]
+
+            card_store = CardStore(cards)
+            expected_store = CardStore(cards)
+            scheduler.rng = random.Random(seed)
+            for card_id, review_time in zip(card_ids, review_times):
+                card = expected_store[card_id]
+                state, step, ease, current_interval, due = scheduler.review_epoch(
+                    card.state,
+                    card.step,
+                    card.ease,
+                    card.current_interval,
+                    card.due.timestamp(),
+                    ratings[card_id],
+                    review_time,
+                )
+                expected_store._append_or_replace(
+                    card_id, int(state), step, ease, due, current_interval
+                )
+            expected_next_random = scheduler.rng.random()
+
+            scheduler.rng = random.Random(seed)
+            card_store.review(
+                scheduler,
+                card_ids,
+                [ratings[card_id] for card_id in card_ids],
+                review_times,
+            )
+            assert scheduler.rng.random() == expected_next_random
+            assert card_store.to_dicts() == expected_store.to_dicts()
+
+        # invalid cards still raise as in review_card
+        with pytest.raises(AssertionError):
+            Scheduler().review_cards_batch(
+                [Card(card_id=1, state=State.Review, due=start)], [Rating.Good]
+            )
+
+    def test_review_epoch(self):
+        rng = random.Random(42)
+        ratings = [Rating(rng.choice([1, 2, 3, 3, 3, 4])) for _ in range(400)]
+        start = datetime(2024, 1, 1, 0, 0, 0, 0, timezone.utc)
+        start_time = int(start.timestamp())
+
+        # reviews at varying lateness, so some cards are reviewed early and others days overdue
+        lateness = [rng.randrange(-86400, 5 * 86400) for _ in range(400)]
+
+        datetime_scheduler = Scheduler(rng=random.Random(0))
+        epoch_scheduler = Scheduler(rng=random.Random(0))
+
+        card = Card(card_id=1, due=start)
+        fields = (State.Learning, 0, None, None, start_time)
+        for rating, late in zip(ratings, lateness):
+            card, _ = datetime_scheduler.review_card(
+                card=card,
+                rating=rating,
+                review_datetime=card.due + timedelta(seconds=late),
+            )
+            state, step, ease, current_interval, due = epoch_scheduler.review_epoch(
+                *fields[:4], due=fields[4], rating=rating, review_time=fields[4] + late
+            )
+            fields = (state, step, ease, current_interval, due)
+
+            assert type(due) == int
+            assert (state, step, ease, current_interval) == (
+                card.state,
+                card.step,
+                card.ease,
+                card.current_interval,
+            )
+            assert due == card.due.timestamp()
+
+        # batch reviews of a CardStore update its rows in place
+        datetime_scheduler = Scheduler(rng=random.Random(0))
+        epoch_scheduler = Scheduler(rng=random.Random(0))
+
+        cards = [Card(card_id=i, due=start) for i in range(20)]
+        card_store = CardStore(cards)
+        for day in range(20):
+            review_time = start_time + day * 86400
+            batch_ratings = [ratings[day * 20 + i] for i in range(20)]
+            for i in range(20):
+                cards[i], _ = datetime_scheduler.review_card(
+                    card=cards[i],
+                    rating=batch_ratings[i],
+                    review_datetime=datetime.fromtimestamp(review_time, timezone.utc),
+                )
+            card_store.review(
+                epoch_scheduler, range(20), batch_ratings, [review_time] * 20
+            )
+
+        assert card_store.to_dicts() == [card.to_dict() for card in cards]
+
+        with pytest.raises(ValueError):
+            card_store.review(epoch_scheduler, [0, 1], [Rating.Good])
+
+    def test_review_card_does_not_mutate(self):
+        scheduler = Scheduler()
+
+        card = Card()
+        card_dict = card.to_dict()
+
+        new_card, review_log = scheduler.review_card(
+            card=card, rating=Rating.Good, review_datetime=card.due
+        )
+
+        assert card.to_dict() == card_dict
+        assert review_log.card.to_dict() == card_dict
+        assert review_log.card is not card
+        assert new_card is not card
+        assert new_card.to_dict() != card_dict
+
+    def test_frozen_card(self):
+        scheduler = Scheduler()
+
+        card = Card()
+        frozen_card = FrozenCard.from_card(card)
+
+        assert frozen_card.to_dict() == card.to_dict()
+        assert FrozenCard.from_dict(card.to_dict()) == frozen_card
+        assert frozen_card.to_card().to_dict() == card.to_dict()
+        assert pickle.loads(pickle.dumps(frozen_card)) == frozen_card
+        assert deepcopy(frozen_card) is frozen_card
+
+        with pytest.raises(AttributeError):
+            frozen_card.step = 1
+        with pytest.raises(AttributeError):
+            _ = frozen_card.__dict__
+
+        replaced_card = frozen_card.replace(step=1)
+        assert replaced_card.step == 1
+        assert frozen_card.step == 0
+        # None is a value to replace with, not the same as leaving an attribute unchanged
+        review_card = frozen_card.replace(
+            state=State.Review, step=None, ease=2.5, current_interval=1
+        )
+        assert review_card.step is None
+        assert review_card.due == frozen_card.due
+        assert review_card.replace(ease=None).ease is None
+        with pytest.raises(TypeError):
+            frozen_card.replace(interval=1)
+
+        # frozen cards are reviewed exactly like cards
+        for rating in [
+            Rating.Good,
+            Rating.Good,
+            Rating.Good,
+            Rating.Again,
+            Rating.Easy,
+        ]:
+            random.seed(42)
+            card, review_log = scheduler.review_card(
+                card=card, rating=rating, review_datetime=card.due
+            )
+            random.seed(42)
+            previous_frozen_card = frozen_card
+            frozen_card, frozen_review_log = scheduler.review_card(
+                card=frozen_card, rating=rating, review_datetime=frozen_card.due
+            )
+
+            assert isinstance(frozen_card, FrozenCard)
+            assert isinstance(frozen_review_log, FrozenReviewLog)
+            assert frozen_review_log.card is previous_frozen_card
+            assert frozen_card.to_dict() == card.to_dict()
+            assert frozen_review_log.to_dict() == review_log.to_dict()
+            assert (
+                FrozenReviewLog.from_dict(frozen_review_log.to_dict())
+                == frozen_review_log
+            )
+
+    def test_due_index(self):
+        scheduler = Scheduler()
+
+        start = datetime(2024, 1, 1, 0, 0, 0, 0, timezone.utc)
+        cards = [Card(card_id=i, due=start + timedelta(minutes=i)) for i in range(200)]
+        due_index = DueIndex(cards)
+
+        assert len(due_index) == 200
+        assert due_index.count_due(start - timedelta(minutes=1)) == 0
+        assert due_index.count_due(start + timedelta(minutes=99)) == 100
+        assert due_index.count_due(start + timedelta(days=1)) == 200
+
+        # review the first 50 cards and re-index them
+        for card in cards[:50]:
+            card, _ = scheduler.review_card(
+                card=card, rating=Rating.Easy, review_datetime=card.due
+            )
+            due_index.add(card)
+
+        assert len(due_index) == 200
+        assert due_index.count_due(start + timedelta(minutes=99)) == 50
+        assert due_index.count_due(start + timedelta(days=30)) == 200
+        assert due_index.count_due(start + timedelta(days=30), State.Review) == 50
+        assert due_index.count_due(start + timedelta(days=30), State.Learning) == 150
+
+        due_index.remove(199)
+        assert 199 not in due_index
+        assert due_index.count_due(start + timedelta(days=1), State.Learning) == 149
+
+        due_cards = due_index.pop_due(start + timedelta(minutes=99), limit=10)
+        assert [card.card_id for card in due_cards] == list(range(50, 60))
+        assert due_index.count_due(start + timedelta(minutes=99)) == 40
+
+        due_cards = due_index.pop_due(start + timedelta(days=30))
+        assert len(due_cards) == 189
+        assert [card.due for card in due_cards] == sorted(
+            card.due for card in due_cards
+        )
+        assert due_cards[-1].state == State.Review
+        assert len(due_index) == 0
+
+    def test_due_forecast(self):
+        scheduler = Scheduler(rng=random.Random(0))
+        start = datetime(2024, 1, 1, 12, 0, 0, 0, timezone.utc)
+
+        cards = [
+            Card(card_id=i, due=start + timedelta(hours=7 * i)) for i in range(100)
+        ]
+        due_forecast = DueForecast(cards)
+        assert len(due_forecast) == 100
+
+        def expected_forecast(days, now):
+            counts = [0] * days
+            for card in cards:
+                offset = max((card.due.date() - now.date()).days, 0)
+                if offset < days:
+                    counts[offset] += 1
+            return counts
+
+        now = start
+        assert due_forecast.forecast(30, now) == expected_forecast(30, now)
+
+        rng = random.Random(0)
+        for _ in range(10):
+            now += timedelta(hours=rng.randrange(1, 60))
+            for i in rng.sample(range(100), 20):
+                new_card, _ = scheduler.review_card(
+                    card=cards[i], rating=Rating(rng.randint(1, 4)), review_datetime=now
+                )
+                due_forecast.update(cards[i], new_card)
+                cards[i] = new_card
+
+            # the counts stay correct as the day rolls over
+            assert due_forecast.forecast(30, now) == expected_forecast(30, now)
+            assert due_forecast.count_due(7, now) == sum(expected_forecast(7, now))
+
+        # snapshots round trip through json
+        snapshot = json.loads(json.dumps(due_forecast.snapshot()))
+        restored_forecast = DueForecast()
+        restored_forecast.restore(snapshot)
+        assert restored_forecast.snapshot() == due_forecast.snapshot()
+        assert restored_forecast.forecast(30, now) == expected_forecast(30, now)
+
+        due_forecast.remove(cards[0])
+        assert len(due_forecast) == 99
+        with pytest.raises(ValueError):
+            due_forecast.forecast(1, now - timedelta(days=1))
+        with pytest.raises(ValueError):
+            DueForecast().remove(cards[0])
+
+    def test_changing_steps_after_construction(self):
+        scheduler = Scheduler()
+
+        scheduler.learning_steps = (timedelta(minutes=5),)
+        scheduler.relearning_steps = ()
+
+        card = Card()
+        card, review_log = scheduler.review_card(
+            card=card, rating=Rating.Again, review_datetime=card.due
+        )
+        assert card.state == State.Learning
+        assert card.step == 0
+        assert round((card.due - review_log.review_datetime).total_seconds()) == 300
+
+        card, _ = scheduler.review_card(
+            card=card, rating=Rating.Good, review_datetime=card.due
+        )
+        assert card.state == State.Review
+
+        card, _ = scheduler.review_card(
+            card=card, rating=Rating.Again, review_datetime=card.due
+        )
+        assert card.state == State.Review
+
+        # the transition table is rebuilt, so fresh and modified schedulers match
+        assert vars(scheduler) == vars(Scheduler.from_dict(scheduler.to_dict()))
+
+    def test_rng(self):
+        def review_many(scheduler):
+            card = Card(due=datetime(2024, 1, 1, 0, 0, 0, 0, timezone.utc))
+            intervals = []
+            for _ in range(10):
+                card, _ = scheduler.review_card(
+                    card=card, rating=Rating.Good, review_datetime=card.due
+                )
+                intervals.append(card.current_interval)
+            return intervals
+
+        # schedulers with equally seeded generators fuzz intervals identically,
+        # regardless of the global random state
+        random.seed(1)
+        intervals = review_many(Scheduler(rng=random.Random(42)))
+        random.seed(2)
+        assert review_many(Scheduler(rng=random.Random(42))) == intervals
+
+        assert review_many(Scheduler(rng=random.Random(43))) != intervals
+
+        # the generator is not part of the scheduler's configuration
+        assert "rng" not in Scheduler(rng=random.Random(42)).to_dict()
+
+    def test_replay(self):
+        start = datetime(2024, 1, 1, 0, 0, 0, 0, timezone.utc)
+        rating_rng = random.Random(0)
+
+        # review 20 cards one after another, keeping their review logs
+        scheduler = Scheduler(rng=random.Random(42))
+        cards = []
+        review_logs = []
+        for card_id in range(20):
+            card = Card(card_id=card_id, due=start)
+            for _ in range(15):
+                card, review_log = scheduler.review_card(
+                    card=card,
+                    rating=Rating(rating_rng.randint(1, 4)),
+                    review_datetime=card.due,
+                    review_duration=rating_rng.randint(500, 5000),
+                )
+                review_logs.append(review_log)
+            cards.append(card)
+
+        expected = [card.to_dict() for card in cards]
+
+        for grouped in (False, True):
+            for logs in (review_logs, [log.to_dict() for log in review_logs]):
+                replayed_cards = replay(
+                    iter(logs), Scheduler(rng=random.Random(42)), grouped=grouped
+                )
+                assert [card.to_dict() for card in replayed_cards] == expected
+
+        steps = list(
+            replay_steps(review_logs, Scheduler(rng=random.Random(42)), grouped=True)
+        )
+        assert len(steps) == len(review_logs)
+        assert [review_log.to_dict() for _, review_log in steps] == [
+            review_log.to_dict() for review_log in review_logs
+        ]
+        assert steps[14][0].to_dict() == expected[0]
+
+    def test_replay_parallel(self, monkeypatch):
+        start = datetime(2024, 1, 1, 0, 0, 0, 0, timezone.utc)
+        rating_rng = random.Random(0)
+
+        scheduler = Scheduler()
+        review_logs = []
+        for card_id in range(40):
+            card = Card(card_id=card_id, due=start)
+            for _ in range(10):
+                card, review_log = scheduler.review_card(
+                    card=card,
+                    rating=Rating(rating_rng.randint(1, 4)),
+                    review_datetime=card.due,
+                )
+                review_logs.append(review_log)
+
+        # reschedule the history with a different configuration
+        new_scheduler = Scheduler(interval_modifier=0.8, starting_ease=2.2)
+        replayed_cards = list(
+            replay_parallel(review_logs, new_scheduler, processes=2, shards=3, seed=7)
+        )
+        assert sorted(card.card_id for card in replayed_cards) == list(range(40))
+
+        # each shard matches a sequential replay seeded the same way
+        expected = []
+        for shard in range(3):
+            shard_scheduler = Scheduler.from_dict(new_scheduler.to_dict())
+            shard_scheduler.rng = random.Random(f"7:{shard}")
+            shard_logs = [log for log in review_logs if log.card.card_id % 3 == shard]
+            expected.extend(replay(shard_logs, shard_scheduler))
+        assert [card.to_dict() for card in replayed_cards] == [
+            card.to_dict() for card in expected
+        ]
+
+        # results don't depend on the number of processes
+        assert [
+            card.to_dict()
+            for card in replay_parallel(
+                review_logs, new_scheduler, processes=1, shards=3, seed=7
+            )
+        ] == [card.to_dict() for card in expected]
+
+        # logs are sent in chunks as they are read, and grouped logs are packed card by card
+        review_log_dicts = [review_log.to_dict() for review_log in review_logs]
+        for grouped in (False, True):
+            assert [
+                card.to_dict()
+                for card in replay_parallel(
+                    iter(review_log_dicts),
+                    new_scheduler,
+                    processes=2,
+                    shards=3,
+                    seed=7,
+                    grouped=grouped,
+                    chunk_size=4,
+                )
+            ] == [card.to_dict() for card in expected]
+
+        # errors in a worker are raised in the caller
+        bad_log = ReviewLog(
+            card=Card(card_id=1, state=State.Review, due=start),
+            rating=Rating.Good,
+            review_datetime=start,
+        )
+        with pytest.raises(AssertionError):
+            list(replay_parallel([bad_log], new_scheduler, processes=2, shards=2))
+
+        # a worker that has sent all of its shards and exited is not mistaken for one that died, even when another
+        # worker takes much longer than the poll timeout to finish
+        monkeypatch.setattr(
+            importlib.import_module("anki_sm_2.replay"), "_POLL_TIMEOUT", 0.01
+        )
+        skewed_logs = [review_logs[0]]
+        card = Card(card_id=1, due=start)
+        for _ in range(5000):
+            card, review_log = scheduler.review_card(
+                card=card, rating=Rating.Again, review_datetime=card.due
+            )
+            skewed_logs.append(review_log)
+        assert [
+            card.card_id
+            for card in replay_parallel(
+                skewed_logs, new_scheduler, processes=2, shards=2
+            )
+        ] == [0, 1]
+
+    def test_binary_serialization(self):
+        scheduler = Scheduler()
+
+        cards = [
+            Card(due=datetime(2024, 1, 1, 0, 0, 0, 123456, timezone.utc)),
+            Card(due=datetime(2024, 1, 1, 9, 30, tzinfo=timezone(timedelta(hours=9)))),
+            Card(due=datetime(1969, 7, 20, 20, 17)),
+        ]
+        review_logs = []
+        for _ in range(4):
+            for i, card in enumerate(cards):
+                cards[i], review_log = scheduler.review_card(
+                    card=card,
+                    rating=Rating.Good,
+                    review_datetime=card.due,
+                    review_duration=None if i == 0 else 1000 * i,
+                )
+                review_logs.append(review_log)
+
+        data = Card.dumps_many(cards)
+        assert type(data) == bytes
+        assert [card.to_dict() for card in Card.loads_many(data)] == [
+            card.to_dict() for card in cards
+        ]
+        assert Card.loads_many(Card.dumps_many([])) == []
+
+        data = ReviewLog.dumps_many(review_logs)
+        assert [review_log.to_dict() for review_log in ReviewLog.loads_many(data)] == [
+            review_log.to_dict() for review_log in review_logs
+        ]
+
+        with pytest.raises(ValueError):
+            Card.loads_many(data)
+        with pytest.raises(ValueError):
+            ReviewLog.loads_many(data[:-1])
+
+    def test_review_log_archive(self, tmp_path):
+        scheduler = Scheduler()
+        start = datetime(2024, 1, 1, 0, 0, 0, 0, timezone.utc)
+
+        cards = [Card(card_id=i, due=start) for i in range(5)]
+        review_logs = []
+        for _ in range(6):
+            for i, card in enumerate(cards):
+                cards[i], review_log = scheduler.review_card(
+                    card=card, rating=Rating.Good, review_datetime=card.due
+                )
+                review_logs.append(review_log)
+
+        path = tmp_path / "review_logs.sm2a"
+        with ReviewLogArchive(path) as archive:
+            assert len(archive) == 0
+            archive.append(review_logs[:10])
+            archive.append(review_logs[10:])
+            archive.append([])
+
+            assert len(archive) == 30
+            assert sorted(archive.card_ids()) == list(range(5))
+            assert [log.to_dict() for log in archive] == [
+                log.to_dict() for log in review_logs
+            ]
+
+            history = archive.history(3)
+            assert [log.to_dict() for log in history] == [
+                log.to_dict() for log in review_logs if log.card.card_id == 3
+            ]
+            assert archive.history(99) == []
+
+            range_start = start + timedelta(minutes=5)
+            range_end = start + timedelta(days=2)
+            assert [
+                log.to_dict() for log in archive.iter_range(range_start, range_end)
+            ] == [
+                log.to_dict()
+                for log in review_logs
+                if range_start <= log.review_datetime < range_end
+            ]
+
+        # appending while iter_range is suspended doesn't invalidate it, and the new logs aren't included
+        with ReviewLogArchive(tmp_path / "appended.sm2a") as archive:
+            archive.append(review_logs[:10])
+            logs_in_range = archive.iter_range()
+            first_log = next(logs_in_range)
+            archive.append(review_logs[10:])
+            assert len(archive.history(0)) == 6
+            assert [first_log.to_dict()] + [log.to_dict() for log in logs_in_range] == [
+                log.to_dict() for log in review_logs[:10]
+            ]
+
+        # simulate a crash part way through writing a record
+        with open(path, "ab") as archive_file:
+            archive_file.write(b"\x00" * 20)
+
+        with ReviewLogArchive(path) as archive:
+            assert len(archive) == 30
+            assert [log.to_dict() for log in archive.history(0)] == [
+                log.to_dict() for log in review_logs if log.card.card_id == 0
+            ]
+
+        not_an_archive = tmp_path / "not_an_archive"
+        not_an_archive.write_bytes(b"hello world")
+        with pytest.raises(ValueError):
+            ReviewLogArchive(not_an_archive)
+
+    def test_anki_import(self, tmp_path):
+        collection_created = 1704067200  # 2024-01-01 in seconds since the unix epoch
+        start = datetime(2024, 1, 1, 0, 0, 0, 0, timezone.utc)
+
+        path = tmp_path / "collection.anki2"
+        connection = sqlite3.connect(path)
+        connection.executescript(
+            """
+            CREATE TABLE col (id integer PRIMARY KEY, crt integer NOT NULL);
+            CREATE TABLE cards (
+                id integer PRIMARY KEY, type integer NOT NULL, queue integer NOT NULL,
+                due integer NOT NULL, ivl integer NOT NULL, factor integer NOT NULL,
+                left integer NOT NULL, odue integer NOT NULL, odid integer NOT NULL
+            );
+            CREATE TABLE revlog (
+                id integer PRIMARY KEY, cid integer NOT NULL, ease integer NOT NULL,
+                ivl integer NOT NULL, lastIvl integer NOT NULL, factor integer NOT NULL,
+                time integer NOT NULL, type integer NOT NULL
+            );
+            """
+        )
+        connection.execute("INSERT INTO col VALUES (1, ?)", (collection_created,))
+        connection.executemany(
+            "INSERT INTO cards VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (1, 0, 0, 5, 0, 0, 0, 0, 0),  # new
+                (
+                    2,
+                    1,
+                    1,
+                    collection_created + 600,
+                    0,
+                    0,
+                    1001,
+                    0,
+                    0,
+                ),  # learning, one step left
+                (3, 2, 2, 10, 7, 2300, 0, 0, 0),  # review
+                (4, 3, 1, collection_created + 300, 3, 2100, 1, 0, 0),  # relearning
+                (5, 2, 2, -100000, 4, 2500, 0, 20, 1),  # review, in a filtered deck
+                (
+                    6,
+                    1,
+                    -1,
+                    collection_created + 900,
+                    0,
+                    0,
+                    1002,
+                    0,
+                    0,
+                ),  # suspended learning
+                (7, 3, 3, 3, 5, 2000, 1, 0, 0),  # relearning, due on a later day
+            ],
+        )
+        review_ms = collection_created * 1000
+        connection.executemany(
+            "INSERT INTO revlog VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (review_ms, 3, 3, -600, 0, 0, 5000, 0),
+                (review_ms + 600_000, 3, 3, 1, -600, 2500, 4000, 0),
+                (review_ms + 87_000_000, 3, 1, -600, 1, 2300, 3000, 1),
+                (review_ms + 87_000_001, 3, 0, 2, 1, 2300, 0, 4),  # manual reschedule
+                (review_ms + 87_600_000, 3, 3, 1, -600, 2300, 2000, 2),
+                (review_ms + 1000, 1, 4, 4, 0, 2500, 1000, 0),
+            ],
+        )
+        connection.commit()
+        connection.close()
+
+        card_store = import_anki_cards(path, now=collection_created, chunk_size=2)
+        assert [card.to_dict() for card in card_store] == [
+            Card(card_id=1, due=start).to_dict(),
+            Card(card_id=2, step=1, due=start + timedelta(minutes=10)).to_dict(),
+            Card(
+                card_id=3,
+                state=State.Review,
+                ease=2.3,
+                current_interval=7,
+                due=start + timedelta(days=10),
+            ).to_dict(),
+            Card(
+                card_id=4,
+                state=State.Relearning,
+                step=0,
+                ease=2.1,
+                current_interval=3,
+                due=start + timedelta(minutes=5),
+            ).to_dict(),
+            Card(
+                card_id=5,
+                state=State.Review,
+                ease=2.5,
+                current_interval=4,
+                due=start + timedelta(days=20),
+            ).to_dict(),
+            Card(card_id=6, step=0, due=start + timedelta(minutes=15)).to_dict(),
+            Card(
+                card_id=7,
+                state=State.Relearning,
+                step=0,
+                ease=2.0,
+                current_interval=5,
+                due=start + timedelta(days=3),
+            ).to_dict(),
+        ]
+
+        with ReviewLogArchive(tmp_path / "review_logs.sm2a") as archive:
+            assert import_anki_review_logs(path, archive, chunk_size=2) == 5
+            assert sorted(archive.card_ids()) == [1, 3]
+
+            history = archive.history(3)
+            assert [log.rating for log in history] == [
+                Rating.Good,
+                Rating.Good,
+                Rating.Again,
+                Rating.Good,
+            ]
+            assert [log.review_duration for log in history] == [5000, 4000, 3000, 2000]
+            assert [
+                (
+                    log.card.state,
+                    log.card.step,
+                    log.card.ease,
+                    log.card.current_interval,
+                )
+                for log in history
+            ] == [
+                (State.Learning, 0, None, None),
+                (State.Learning, 1, None, None),
+                (State.Review, None, 2.5, 1),
+                (State.Relearning, 0, 2.3, None),
+            ]
+            assert history[0].card.due == start
+            assert history[1].card.due == start + timedelta(minutes=10)
+            assert history[2].card.due == start + timedelta(minutes=10, days=1)
+            # due as set by the manual reschedule
+            assert history[3].card.due == start + timedelta(
+                days=2, seconds=87_000, milliseconds=1
+            )
+
+    def test_sqlite_repository(self, tmp_path):
+        scheduler = Scheduler(rng=random.Random(0))
+        start = datetime(2024, 1, 1, 0, 0, 0, 0, timezone.utc)
+
+        cards = [Card(card_id=i, due=start + timedelta(minutes=i)) for i in range(20)]
+        path = tmp_path / "collection.db"
+
+        with SQLiteRepository(path, readers=2) as repository:
+            assert repository.schema_version == 1
+            repository.upsert_cards(cards)
+            assert len(repository) == 20
+
+            review_logs = []
+            for _ in range(3):
+                cards, batch_review_logs = scheduler.review_cards_batch(
+                    cards,
+                    [Rating(i % 4 + 1) for i in range(20)],
+                    [card.due for card in cards],
+                )
+                repository.save_reviews(cards, batch_review_logs)
+                review_logs += batch_review_logs
+
+            assert len(repository) == 20
+            for card in cards:
+                assert repository.get_card(card.card_id).to_dict() == card.to_dict()
+            assert repository.get_card(99) is None
+
+            for before, limit, state in (
+                (start + timedelta(days=2), None, None),
+                (start + timedelta(days=30), 5, None),
+                (start + timedelta(days=30), None, State.Review),
+                (start, None, State.Learning),
+            ):
+                expected_cards = sorted(
+                    (
+                        card
+                        for card in cards
+                        if card.due <= before and (state is None or card.state == state)
+                    ),
+                    key=lambda card: (card.due, card.card_id),
+                )[:limit]
+                assert [
+                    card.to_dict()
+                    for card in repository.due_cards(before, limit, state)
+                ] == [card.to_dict() for card in expected_cards]
+                if limit is None:
+                    assert repository.count_due(before, state) == len(expected_cards)
+
+            assert [review_log.to_dict() for review_log in repository.history(7)] == [
+                review_log.to_dict()
+                for review_log in review_logs
+                if review_log.card.card_id == 7
+            ]
+
+            repository.delete_cards([7])
+            assert repository.get_card(7) is None
+            assert repository.history(7) == []
+
+        # reopening the database keeps its contents and does not migrate it again
+        with SQLiteRepository(path) as repository:
+            assert repository.schema_version == 1
+            assert len(repository) == 19
+            assert repository.get_card(3).to_dict() == cards[3].to_dict()
+
+    def test_arrow(self, tmp_path):
+        pa = pytest.importorskip("pyarrow")
+
+        scheduler = Scheduler(rng=random.Random(0))
+        start = datetime(2024, 1, 1, 0, 0, 0, 0, timezone.utc)
+
+        cards = [
+            Card(card_id=i, due=start + timedelta(seconds=i, microseconds=7 * i))
+            for i in range(10)
+        ]
+        review_logs = []
+        for _ in range(3):
+            for i, card in enumerate(cards):
+                cards[i], review_log = scheduler.review_card(
+                    card, Rating(i % 4 + 1), card.due, review_duration=i or None
+                )
+                review_logs.append(review_log)
+
+        batches = list(cards_to_record_batches(cards, batch_size=4))
+        assert [batch.num_rows for batch in batches] == [4, 4, 2]
+        assert batches[0].schema.field("state").type == pa.int8()
+        assert batches[0].schema.field("due").type == pa.timestamp("us", tz="UTC")
+        assert [card.to_dict() for card in cards_from_record_batches(batches)] == [
+            card.to_dict() for card in cards
+        ]
+
+        # a CardStore is exported from its columns with the same result
+        card_store_batches = cards_to_record_batches(CardStore(cards), batch_size=4)
+        assert all(
+            batch.equals(card_store_batch)
+            for batch, card_store_batch in zip(batches, card_store_batches)
+        )
+
+        review_log_batches = list(
+            review_logs_to_record_batches(review_logs, batch_size=7)
+        )
+        assert [
+            review_log.to_dict()
+            for review_log in review_logs_from_record_batches(review_log_batches)
+        ] == [review_log.to_dict() for review_log in review_logs]
+
+        schedulers = [scheduler, Scheduler(learning_steps=[], starting_ease=2.0)]
+        assert [
+            scheduler.to_dict()
+            for scheduler in schedulers_from_record_batch(
+                schedulers_to_record_batch(schedulers)
+            )
+        ] == [scheduler.to_dict() for scheduler in schedulers]
+
+        write_cards_parquet(tmp_path / "cards.parquet", cards, batch_size=4)
+        assert [
+            card.to_dict() for card in read_cards_parquet(tmp_path / "cards.parquet")
+        ] == [card.to_dict() for card in cards]
+
+        write_review_logs_parquet(tmp_path / "review_logs.parquet", review_logs)
+        assert [
+            review_log.to_dict()
+            for review_log in read_review_logs_parquet(
+                tmp_path / "review_logs.parquet", batch_size=5
+            )
+        ] == [review_log.to_dict() for review_log in review_logs]
+
+        write_schedulers_parquet(tmp_path / "schedulers.parquet", schedulers)
+        assert [
+            scheduler.to_dict()
+            for scheduler in read_schedulers_parquet(tmp_path / "schedulers.parquet")
+        ] == [scheduler.to_dict() for scheduler in schedulers]
+
+    def test_simulate_workload(self):
+        scheduler = Scheduler()
+        start = datetime(2024, 1, 1, 0, 0, 0, 0, timezone.utc)
+
+        # always rating Good: two learning steps on the first day, then a review the next day
+        always_good = {state: (0.0, 0.0, 1.0, 0.0) for state in State}
+        day_counts = simulate_workload(
+            [Card(due=start)], scheduler, always_good, days=3, start=start
+        )
+        assert day_counts == [2.0, 1.0, 0.0]
+
+        cards = [Card(card_id=i, due=start + timedelta(hours=i)) for i in range(50)]
+        rating_probabilities = {
+            State.Learning: (0.2, 0.1, 0.6, 0.1),
+            State.Review: (0.1, 0.1, 0.7, 0.1),
+            State.Relearning: (0.2, 0.0, 0.8, 0.0),
+        }
+        day_counts = simulate_workload(
+            cards, scheduler, rating_probabilities, days=30, start=start, runs=4, seed=1
+        )
+        assert len(day_counts) == 30
+        assert sum(day_counts) > 100
+
+        # results don't depend on the number of processes
+        assert (
+            simulate_workload(
+                cards,
+                scheduler,
+                rating_probabilities,
+                days=30,
+                start=start,
+                runs=4,
+                processes=2,
+                seed=1,
+            )
+            == day_counts
+        )
+
+        with pytest.raises(ValueError):
+            simulate_workload(cards, scheduler, {state: (1.0,) for state in State})
+
+        # overdue cards are reviewed on the first day, and there must be a first day
+        overdue_cards = [
+            Card(card_id=i, due=start - timedelta(days=3)) for i in range(5)
+        ]
+        assert simulate_workload(
+            overdue_cards, scheduler, always_good, days=1, start=start
+        ) == [10.0]
+        with pytest.raises(ValueError):
+            simulate_workload(
+                overdue_cards, scheduler, always_good, days=0, start=start
+            )
+
+    def test_sweep(self):
+        start = datetime(2024, 1, 1, 0, 0, 0, 0, timezone.utc)
+        rating_rng = random.Random(0)
+
+        scheduler = Scheduler()
+        review_logs = []
+        for card_id in range(30):
+            card = Card(card_id=card_id, due=start)
+            for _ in range(12):
+                card, review_log = scheduler.review_card(
+                    card=card,
+                    rating=Rating(rating_rng.choice([1, 3, 3, 3, 4])),
+                    review_datetime=card.due,
+                )
+                review_logs.append(review_log)
+
+        history = ReviewHistory(log.to_dict() for log in review_logs)
+        assert len(history) == len(review_logs)
+
+        schedulers = [
+            Scheduler(),
+            Scheduler(interval_modifier=0.5),
+            Scheduler(interval_modifier=1.5, starting_ease=3.0),
+        ]
+        results = sweep(history, schedulers, seed=3)
+        assert len(results) == 3
+        assert all(scheduler.rng is None for scheduler in schedulers)
+
+        # the metrics match a plain replay with an equally seeded scheduler
+        replay_scheduler = Scheduler(interval_modifier=0.5, rng=random.Random("3:1"))
+        review_cards = [
+            card
+            for card in replay(review_logs, replay_scheduler)
+            if card.state == State.Review
+        ]
+        intervals = [card.current_interval for card in review_cards]
+        assert results[1]["mean_interval"] == sum(intervals) / len(intervals)
+        assert sum(results[1]["interval_histogram"].values()) == len(intervals)
+        assert results[1]["workload"] == pytest.approx(
+            sum(1 / interval for interval in intervals)
+        )
+
+        assert (
+            results[1]["mean_interval"]
+            < results[0]["mean_interval"]
+            < results[2]["mean_interval"]
+        )
+        assert results[1]["workload"] > results[2]["workload"]
+        assert results[0]["lapses"] > 0
+
+        assert sweep(review_logs, schedulers, seed=3) == results
+
+    def test_async_scheduler(self):
+        scheduler = Scheduler()
+        start = datetime(2024, 1, 1, 0, 0, 0, 0, timezone.utc)
+        cards = [Card(card_id=i, due=start) for i in range(100)]
+        ratings = [Rating(i % 4 + 1) for i in range(100)]
+
+        async def review_all(async_scheduler):
+            results = await asyncio.gather(
+                *(
+                    async_scheduler.review_card(
+                        card=card, rating=rating, review_datetime=card.due
+                    )
+                    for card, rating in zip(cards, ratings)
+                )
+            )
+            await async_scheduler.flush()
+            return results
+
+        async_scheduler = AsyncScheduler(scheduler, max_batch_size=32)
+        results = asyncio.run(review_all(async_scheduler))
+
+        for card, rating, (reviewed_card, review_log) in zip(cards, ratings, results):
+            expected_card, expected_review_log = scheduler.review_card(
+                card=card, rating=rating, review_datetime=card.due
+            )
+            assert reviewed_card.to_dict() == expected_card.to_dict()
+            assert review_log.to_dict() == expected_review_log.to_dict()
+
+        metrics = async_scheduler.metrics()
+        assert metrics["requests"] == 100
+        assert metrics["batches"] == 4
+        assert metrics["mean_batch_size"] == 25
+        assert 0 < metrics["mean_latency"] <= metrics["max_latency"]
+
+        async def review_invalid():
+            return await AsyncScheduler(scheduler).review_card(
+                card=Card(state=State.Review), rating=Rating.Good
+            )
+
+        with pytest.raises(AssertionError):
+            asyncio.run(review_invalid())
+
+        # a bad review in a batch only fails its own caller
+        async_scheduler = AsyncScheduler(scheduler)
+
+        async def review_mixed():
+            return await asyncio.gather(
+                *(
+                    async_scheduler.review_card(
+                        card=card, rating=Rating.Good, review_datetime=start
+                    )
+                    for card in (cards[0], Card(state=State.Review), cards[1])
+                ),
+                return_exceptions=True,
+            )
+
+        first, invalid, second = asyncio.run(review_mixed())
+        assert async_scheduler.metrics()["batches"] == 1
+        assert isinstance(invalid, AssertionError)
+        for card, (reviewed_card, _) in zip(cards[:2], (first, second)):
+            expected_card, _ = scheduler.review_card(
+                card=card, rating=Rating.Good, review_datetime=start
+            )
+            assert reviewed_card.to_dict() == expected_card.to_dict()
+
+        # cancelling a batch cancels its reviews instead of leaving them waiting
+        async def cancel_batch():
+            async_scheduler = AsyncScheduler(scheduler, batch_window=60)
+            review = asyncio.ensure_future(
+                async_scheduler.review_card(card=cards[0], rating=Rating.Good)
+            )
+            await asyncio.sleep(0)
+            async_scheduler._flush()
+            for task in list(async_scheduler._batch_tasks):
+                task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await review
+
+        asyncio.run(cancel_batch())
+
+        # batches running in several threads at once don't lose stats updates
+        stats_scheduler = Scheduler(stats=SchedulerStats())
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            async_scheduler = AsyncScheduler(
+                stats_scheduler, max_batch_size=8, executor=executor
+            )
+            asyncio.run(review_all(async_scheduler))
+        assert stats_scheduler.stats.to_dict()["reviews"] == 100
+
+        # errors that aren't from a bad review, e.g. from a shut down executor, are raised to every caller
+        async_scheduler = AsyncScheduler(scheduler, executor=executor)
+
+        async def review_after_shutdown():
+            return await asyncio.gather(
+                *(
+                    async_scheduler.review_card(
+                        card=card, rating=Rating.Good, review_datetime=start
+                    )
+                    for card in cards[:2]
+                ),
+                return_exceptions=True,
+            )
+
+        assert all(
+            isinstance(result, RuntimeError)
+            for result in asyncio.run(review_after_shutdown())
+        )
+
+    def test_scheduler_stats(self):
+        stats = SchedulerStats()
+        scheduler = Scheduler(maximum_interval=10, minimum_interval=2, stats=stats)
+
+        card = Card()
+        for rating in [
+            Rating.Good,
+            Rating.Good,
+            Rating.Easy,
+            Rating.Easy,
+            Rating.Again,
+        ]:
+            card, _ = scheduler.review_card(
+                card=card, rating=rating, review_datetime=card.due
+            )
+
+        assert stats.transitions == {
+            (State.Learning, Rating.Good, State.Learning): 1,
+            (State.Learning, Rating.Good, State.Review): 1,
+            (State.Review, Rating.Easy, State.Review): 2,
+            (State.Review, Rating.Again, State.Relearning): 1,
+        }
+        assert stats.maximum_interval_clamps >= 1
+        assert stats.minimum_interval_clamps == 1
+        assert stats.fuzz_applied >= 2
+
+        stats_dict = stats.to_dict()
+        assert type(json.dumps(stats_dict)) == str
+        assert stats_dict["reviews"] == 5
+        assert stats_dict["transitions"]["Review-Easy-Review"] == 2
+        assert sum(stats_dict["review_time_ns"]["histogram"].values()) == 5
+        assert (
+            0
+            < stats_dict["review_time_ns"]["p50"]
+            <= stats_dict["review_time_ns"]["p99"]
+        )
+
+        # CardStore passes states as plain ints, including to cards that stay in the Review state
+        stats = SchedulerStats()
+        scheduler = Scheduler(stats=stats)
+        card_store = CardStore([card])
+        for rating in [Rating.Good, Rating.Good, Rating.Good]:
+            card_store.review(scheduler, [card.card_id], [rating], [card_store.dues[0]])
+        assert stats.transitions == {
+            (State.Relearning, Rating.Good, State.Review): 1,
+            (State.Review, Rating.Good, State.Review): 2,
+        }
+        assert stats.to_dict()["transitions"]["Review-Good-Review"] == 2
+
+        state, _, _, _, _ = scheduler.review_epoch(
+            2, None, 2.5, 10, 0, Rating.Good, review_time=86400 * 10
+        )
+        assert type(state) is State
+
+        # stats are not part of the scheduler's configuration
+        assert "stats" not in scheduler.to_dict()
+        assert SchedulerStats().review_time_percentile(99) is None
+
+    def test_preview_card(self):
+        scheduler = Scheduler()
+        start = datetime(2024, 1, 1, 0, 0, 0, 0, timezone.utc)
+
+        learning_card = Card(card_id=1, due=start)
+        review_card = Card(
+            card_id=2, state=State.Review, ease=2.5, current_interval=20, due=start
+        )
+        relearning_card = Card(
+            card_id=3,
+            state=State.Relearning,
+            step=0,
+            ease=2.5,
+            current_interval=20,
+            due=start,
+        )
+        review_datetime = start + timedelta(days=3)
+
+        # outcomes without fuzz are the same as reviewing with each rating
+        for card in (learning_card, relearning_card):
+            previews = scheduler.preview_card(card, review_datetime)
+            assert list(previews) == list(Rating)
+            for rating, preview in previews.items():
+                expected_card, _ = scheduler.review_card(card, rating, review_datetime)
+                assert preview.to_dict() == expected_card.to_dict()
+
+        # fuzzed intervals fall in the fuzz range of the unfuzzed ones
+        unfuzzed_previews = scheduler.preview_card(
+            review_card, review_datetime, fuzz=False
+        )
+        good_interval = unfuzzed_previews[Rating.Good].current_interval
+        assert good_interval == round((20 + 3 / 2) * 2.5)
+        for _ in range(20):
+            previews = scheduler.preview_card(review_card, review_datetime)
+            for rating, preview in previews.items():
+                unfuzzed_interval = unfuzzed_previews[rating].current_interval
+                if unfuzzed_interval < 2.5:
+                    assert preview.current_interval == unfuzzed_interval
+                else:
+                    # fuzzed intervals are rounded from [min_ivl, max_ivl + 1)
+                    min_ivl, max_ivl = scheduler._get_fuzz_range(unfuzzed_interval)
+                    assert min_ivl <= preview.current_interval <= max_ivl + 1
+
+        # frozen cards preview into frozen cards and cards are not modified
+        card_dict = review_card.to_dict()
+        frozen_previews = scheduler.preview_card(
+            FrozenCard.from_card(review_card), review_datetime, fuzz=False
+        )
+        assert review_card.to_dict() == card_dict
+        assert all(
+            isinstance(preview, FrozenCard) for preview in frozen_previews.values()
+        )
+        assert [preview.to_dict() for preview in frozen_previews.values()] == [
+            preview.to_dict() for preview in unfuzzed_previews.values()
+        ]
+
+        batch_previews = scheduler.preview_cards(
+            [learning_card, review_card], review_datetime, fuzz=False
+        )
+        assert len(batch_previews) == 2
+        assert [preview.to_dict() for preview in batch_previews[1].values()] == [
+            preview.to_dict() for preview in unfuzzed_previews.values()
+        ]
+
+        # previews are not counted in the scheduler's stats, even when they fuzz and clamp intervals
+        stats = SchedulerStats()
+        stats_scheduler = Scheduler(
+            maximum_interval=30, minimum_interval=2, stats=stats
+        )
+        stats_scheduler.preview_cards(
+            [learning_card, review_card, relearning_card], review_datetime
+        )
+        assert stats.to_dict() == SchedulerStats().to_dict()
+
+    def test_scheduler_registry(self):
+        registry = SchedulerRegistry(maxsize=2)
+
+        config = Scheduler().to_dict()
+        other_config = Scheduler(starting_ease=2.0).to_dict()
+
+        scheduler = registry.get(config)
+        assert registry.get(json.loads(json.dumps(config))) is scheduler
+        assert registry.get(other_config) is not scheduler
+        assert registry.get(other_config).starting_ease == 2.0
+        assert (registry.hits, registry.misses) == (2, 2)
+
+        # shared schedulers review cards as usual but cannot be changed
+        card = Card()
+        new_card, _ = scheduler.review_card(card, Rating.Good, card.due)
+        expected_card, _ = Scheduler().review_card(card, Rating.Good, card.due)
+        assert new_card.to_dict() == expected_card.to_dict()
+        with pytest.raises(AttributeError):
+            scheduler.learning_steps = (timedelta(minutes=5),)
+        with pytest.raises(AttributeError):
+            scheduler.rng = random.Random(0)
+
+        # the least recently used configuration is evicted
+        registry.get(config)
+        registry.get(Scheduler(maximum_interval=100).to_dict())
+        assert len(registry) == 2
+        assert registry.evictions == 1
+        assert registry.get(config) is scheduler
+        assert registry.get(other_config) is not scheduler
+        assert registry.stats()["misses"] == 4
+
+        with pytest.raises(ValueError):
+            SchedulerRegistry(maxsize=0)
+
+    def test_concurrent_collection(self):
+        scheduler = Scheduler()
+        start = datetime(2024, 1, 1, 0, 0, 0, 0, timezone.utc)
+        collection = ConcurrentCollection(
+            scheduler,
+            [Card(card_id=i, due=start) for i in range(10)],
+            stripes=4,
+            seed=0,
+        )
+        assert len(collection) == 10
+        assert collection.scheduler is not scheduler
+        assert scheduler.rng is None
+
+        # each thread fuzzes with its own generator, derived from the seed
+        assert collection.scheduler.rng.random() == random.Random("0:0").random()
+        thread_values = []
+        thread = threading.Thread(
+            target=lambda: thread_values.append(collection.scheduler.rng.random())
+        )
+        thread.start()
+        thread.join()
+        assert thread_values == [random.Random("0:1").random()]
+
+        # threads that start at once still each get their own number
+        barrier = threading.Barrier(8)
+
+        def first_value():
+            barrier.wait()
+            thread_values.append(collection.scheduler.rng.random())
+
+        threads = [threading.Thread(target=first_value) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(thread_values) == sorted(
+            random.Random(f"0:{thread_number}").random()
+            for thread_number in range(1, 10)
+        )
+
+        # concurrent reviews of the same cards are all applied
+        def review_cards():
+            for _ in range(50):
+                for card_id in range(10):
+                    collection.review(card_id, Rating.Again, start)
+
+        threads = [threading.Thread(target=review_cards) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # every successful store takes a new version from its stripe: 10 puts and 2000 reviews
+        assert sum(collection._versions) == 10 + 4 * 50 * 10
+        for card_id in range(10):
+            card, version = collection.get(card_id)
+            assert card.state == State.Learning
+
+        # a stale version is rejected
+        card, version = collection.get(0)
+        new_version = collection.compare_and_swap(card, version)
+        assert new_version is not None and new_version > version
+        assert collection.compare_and_swap(card, version) is None
+        assert collection.put(card) > new_version
+
+        # a card that is removed and stored again does not reuse an old version
+        card, version = collection.get(0)
+        collection.remove(0)
+        assert 0 not in collection
+        assert len(collection.cards()) == 9
+        assert collection.put(card) > version
+        assert collection.compare_and_swap(card, version) is None
+        assert collection.get(0)[0] is card
+
+    def test_lazy_card(self):
+        scheduler = Scheduler()
+
+        cards = [Card(card_id=1), Card(card_id=2)]
+        cards[1], _ = scheduler.review_card(
+            card=cards[1], rating=Rating.Easy, review_datetime=cards[1].due
+        )
+
+        lazy_cards = [LazyCard(card.to_dict()) for card in cards]
+        lazy_cards += LazyCard.loads_many(Card.dumps_many(cards))
+
+        for lazy_card, card in zip(lazy_cards, cards + cards):
+            assert isinstance(lazy_card, Card)
+            # nothing is decoded until it is accessed
+            assert "due" not in vars(lazy_card)
+            assert lazy_card.to_dict() == card.to_dict()
+            assert "due" in vars(lazy_card)
+
+            random.seed(42)
+            reviewed_lazy_card, lazy_review_log = scheduler.review_card(
+                card=lazy_card, rating=Rating.Good
+            )
+            random.seed(42)
+            reviewed_card, review_log = scheduler.review_card(
+                card=card,
+                rating=Rating.Good,
+                review_datetime=lazy_review_log.review_datetime,
+            )
+            assert reviewed_lazy_card.to_dict() == reviewed_card.to_dict()
+            assert lazy_review_log.to_dict() == review_log.to_dict()
+
+        # cards sliced from a binary buffer can be pickled and copied, before and after they are decoded, as can the
+        # review logs that hold them
+        binary_card = LazyCard.loads_many(Card.dumps_many(cards))[1]
+        for copied_card in (
+            pickle.loads(pickle.dumps(binary_card)),
+            deepcopy(binary_card),
+        ):
+            assert copied_card.to_dict() == cards[1].to_dict()
+        _, binary_review_log = scheduler.review_card(binary_card, Rating.Good)
+        for copied_card in (
+            pickle.loads(pickle.dumps(binary_card)),
+            deepcopy(binary_card),
+        ):
+            assert copied_card.to_dict() == cards[1].to_dict()
+        for copied_review_log in (
+            pickle.loads(pickle.dumps(binary_review_log)),
+            deepcopy(binary_review_log),
+        ):
+            assert copied_review_log.to_dict() == binary_review_log.to_dict()
+
+        lazy_card = LazyCard(cards[0].to_dict())
+        lazy_card.step = 1
+        assert lazy_card.step == 1
+        assert lazy_card.to_dict()["step"] == 1